@@ -1,6 +1,7 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, Category
+from .models import User, Category, Order
+from . import order_states, sales
 
 
 @admin.register(User)
@@ -15,6 +16,7 @@ class UserAdmin(BaseUserAdmin):
     fieldsets = (
         (None, {"fields": ("email", "password")}),
         ("Personal info", {"fields": ("name", "phone_number", "address", "role")}),
+        ("Delivery", {"fields": ("latitude", "longitude", "is_available")}),
         (
             "Permissions",
             {
@@ -63,6 +65,32 @@ class ProductAdmin(admin.ModelAdmin):
     readonly_fields = ("created_at", "updated_at")
 
 
+def transition_action(target, description):
+    """An admin action moving the selected orders to `target` in bulk."""
+
+    @admin.action(description=description)
+    def action(modeladmin, request, queryset):
+        result = order_states.transition(
+            list(queryset.values_list("pk", flat=True)), target
+        )
+        if result.updated:
+            modeladmin.message_user(
+                request, f"{len(result.updated)} orders marked as {target}."
+            )
+        if result.unchanged:
+            modeladmin.message_user(
+                request,
+                f"{len(result.unchanged)} orders were already {target}.",
+                messages.INFO,
+            )
+        for pk, error in result.failed.items():
+            modeladmin.message_user(request, f"Order #{pk}: {error}", messages.ERROR)
+
+    action.__name__ = f"mark_{target}"
+    return action
+
+
+@admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     list_display = (
         "id",
@@ -74,8 +102,24 @@ class OrderAdmin(admin.ModelAdmin):
         "delivery_date",
     )
     list_filter = ("status",)
+    list_select_related = ("buyer", "product")
     search_fields = ("buyer__email", "product__name")
+    # status changes go through the actions, which keep stock and sales
+    # rollups in step
     readonly_fields = (
+        "status",
         "created_at",
         "updated_at",
     )
+    actions = [
+        transition_action("confirmed", "Confirm selected orders"),
+        transition_action("delivered", "Mark selected orders as delivered"),
+        transition_action("cancelled", "Cancel selected orders"),
+    ]
+
+    # deleting a confirmed or delivered order takes it out of the rollups
+    def delete_model(self, request, obj):
+        sales.delete_orders(Order.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        sales.delete_orders(queryset)
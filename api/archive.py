@@ -0,0 +1,102 @@
+"""
+Hot/cold storage for orders.
+
+Delivered and cancelled orders past a cutoff move from api_order to
+api_archivedorder (`manage.py archive_orders`), keeping their ids, so the
+hot table only holds recent and open orders. OrderHistory is a view over
+both tables.
+
+Order listings read the hot table; only a created_after/created_before
+filter that reaches back past the newest archived order reads the view.
+"""
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import DateTimeField, Max, Value
+
+from .models import ArchivedOrder, Order, OrderHistory
+
+ARCHIVABLE_STATUSES = ("delivered", "cancelled")
+
+FIELDS = (
+    "id",
+    "buyer",
+    "product",
+    "quantity",
+    "total_price",
+    "status",
+    "delivery_date",
+    "created_at",
+    "updated_at",
+)
+
+
+def archivable(cutoff, using=DEFAULT_DB_ALIAS):
+    return Order.objects.using(using).filter(
+        status__in=ARCHIVABLE_STATUSES, created_at__lt=cutoff
+    )
+
+
+def candidate_ids(cutoff, after, limit, using=DEFAULT_DB_ALIAS):
+    """The next `limit` archivable ids above `after`, in id order."""
+    return list(
+        archivable(cutoff, using)
+        .filter(pk__gt=after)
+        .order_by("pk")
+        .values_list("pk", flat=True)[:limit]
+    )
+
+
+def archive_batch(ids, cutoff, now, using=DEFAULT_DB_ALIAS):
+    """
+    Move the orders in `ids` that are still archivable; returns how many.
+
+    One INSERT ... SELECT and one DELETE in a short transaction. Both
+    re-check the status and cutoff, so an order reopened or changed since
+    `ids` was read stays where it is. The DELETE skips the ORM's cascade:
+    delivery jobs stay, still pointing at their order's id.
+    """
+    rows = archivable(cutoff, using).filter(pk__in=ids)
+    connection = connections[using]
+    select, params = (
+        rows.values_list(*FIELDS, Value(now, output_field=DateTimeField()))
+        .query.get_compiler(connection=connection)
+        .as_sql()
+    )
+    table = connection.ops.quote_name(ArchivedOrder._meta.db_table)
+    columns = ", ".join(
+        connection.ops.quote_name(ArchivedOrder._meta.get_field(name).column)
+        for name in (*FIELDS, "archived_at")
+    )
+    with transaction.atomic(using=using):
+        with connection.cursor() as cursor:
+            # the INSERT takes the write lock, so nothing changes the rows
+            # between it and the DELETE
+            cursor.execute(f"INSERT INTO {table} ({columns}) {select}", params)
+            copied = cursor.rowcount
+        deleted = (
+            Order.objects.using(using)
+            .filter(pk__in=ArchivedOrder.objects.using(using).filter(pk__in=ids))
+            ._raw_delete(using)
+        )
+        if deleted != copied:
+            raise RuntimeError(
+                f"Archived {copied} orders but deleted {deleted}; rolled back."
+            )
+    return copied
+
+
+def newest_archived(using=None):
+    queryset = ArchivedOrder.objects.all()
+    if using:
+        queryset = queryset.using(using)
+    return queryset.aggregate(newest=Max("created_at"))["newest"]
+
+
+def order_model(created_after=None, created_before=None):
+    """Order, or OrderHistory when the date range can reach archived orders."""
+    if created_after is None and created_before is None:
+        return Order
+    newest = newest_archived()
+    if newest is None or (created_after is not None and created_after > newest):
+        return Order
+    return OrderHistory
@@ -0,0 +1,289 @@
+"""
+Matching pending delivery jobs to nearby available transporters.
+
+assign() runs one round:
+
+1. reads the pending jobs that have a pickup point, oldest first, and the
+   available transporters that have a position and spare CAPACITY (open
+   assigned jobs count against it): two queries, plus one GROUP BY
+2. puts transporters and jobs into grid indexes of square cells, so a
+   lookup only visits the cells around a point instead of every
+   transporter or every job; full transporters and taken jobs are dropped
+   from the cells as they are visited
+3. takes the oldest unassigned job as a seed and gives it the nearest
+   transporter within MAX_PICKUP_KM, searching the cells ring by ring
+   outwards until no nearer one can be left; then fills that
+   transporter's spare capacity with the unassigned jobs nearest to the
+   seed within BATCH_RADIUS_KM, so one transporter collects several
+   neighbouring pickups on one trip
+4. writes the round with one UPDATE per chunk of jobs; the
+   `status = 'pending'` guard leaves jobs that were cancelled or assigned
+   meanwhile alone
+
+Distances are equirectangular, which is well within a percent of the
+great-circle distance at these ranges. Cells do not wrap around the
+antimeridian.
+"""
+
+import functools
+import math
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import DeliveryJob, User
+
+DEFAULTS = {
+    # farthest a transporter is sent to its first pickup
+    "MAX_PICKUP_KM": 25,
+    # how far from the first pickup the others of a batch may be
+    "BATCH_RADIUS_KM": 5,
+    # open jobs a transporter holds at most
+    "CAPACITY": 5,
+}
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+# transporter cells per MAX_PICKUP_KM: the nearest transporter is searched
+# ring by ring, and usually turns up in the first rings
+TRANSPORTER_CELLS = 2
+
+# jobs per UPDATE: two parameters each in the CASE and one in the IN list,
+# under SQLite's old limit of 999 variables
+WRITE_CHUNK = 300
+
+
+def get_setting(name):
+    return getattr(settings, "DELIVERY_ASSIGNMENT", {}).get(name, DEFAULTS[name])
+
+
+def distance_km(lat1, lon1, lat2, lon2):
+    x = math.radians(lon2 - lon1) * math.cos(math.radians((lat1 + lat2) / 2))
+    y = math.radians(lat2 - lat1)
+    return EARTH_RADIUS_KM * math.hypot(x, y)
+
+
+@functools.lru_cache(maxsize=None)
+def ring_offsets(rows, cols):
+    """(row, column) offsets of the cells around one, ring by ring."""
+    rings = []
+    for r in range(max(rows, cols) + 1):
+        ring = []
+        for dr in range(-min(r, rows), min(r, rows) + 1):
+            if abs(dr) == r:
+                ring.extend((dr, dc) for dc in range(-min(r, cols), min(r, cols) + 1))
+            elif r <= cols:
+                ring.extend(((dr, -r), (dr, r)))
+        rings.append(tuple(ring))
+    return tuple(rings)
+
+
+class Grid:
+    """Items bucketed by (row, column) cells `cell_km` wide."""
+
+    def __init__(self, cell_km):
+        self.cell_km = cell_km
+        self.cell = cell_km / KM_PER_DEGREE
+        self.cells = defaultdict(list)
+
+    def key(self, lat, lon):
+        return math.floor(lat / self.cell), math.floor(lon / self.cell)
+
+    def add(self, item, lat, lon):
+        self.cells[self.key(lat, lon)].append(item)
+
+    def rings(self, lat, lon, radius_km):
+        """
+        The cell lists that can hold items within `radius_km` of a point,
+        ring by ring outwards; each ring comes with a lower bound on the
+        distance of anything in it.
+        """
+        row, col = self.key(lat, lon)
+        rows = math.ceil(radius_km / self.cell_km)
+        # a degree of longitude shrinks towards the poles: size the columns
+        # for the edge of the area nearest to the pole
+        edge = min(abs(lat) + rows * self.cell, 89.0)
+        shrink = math.cos(math.radians(edge))
+        cols = math.ceil(radius_km / (self.cell_km * shrink))
+        cells = self.cells
+        for r, offsets in enumerate(ring_offsets(rows, cols)):
+            ring = [
+                items
+                for dr, dc in offsets
+                if (items := cells.get((row + dr, col + dc)))
+            ]
+            yield max(r - 1, 0) * self.cell_km * shrink, ring
+
+    def near(self, lat, lon, radius_km):
+        """The cell lists that can hold items within `radius_km` of a point."""
+        for _, ring in self.rings(lat, lon, radius_km):
+            yield from ring
+
+
+@dataclass
+class AssignmentResult:
+    assigned: int = 0
+    transporters: int = 0
+    # pending jobs with no available transporter in reach
+    unmatched: int = 0
+    # {"load": s, "match": s, "write": s}
+    timings: dict = None
+
+
+def load_jobs(limit=None):
+    jobs = (
+        DeliveryJob.objects.filter(
+            status="pending",
+            pickup_latitude__isnull=False,
+            pickup_longitude__isnull=False,
+        )
+        .order_by("created_at", "id")
+        .values_list("id", "pickup_latitude", "pickup_longitude")
+    )
+    return list(jobs[:limit] if limit else jobs)
+
+
+def load_transporters(capacity):
+    """[(id, latitude, longitude, spare capacity)] of the available transporters."""
+    holding = dict(
+        DeliveryJob.objects.filter(status="assigned", transporter__isnull=False)
+        .values("transporter")
+        .annotate(n=Count("id"))
+        .values_list("transporter", "n")
+    )
+    rows = User.objects.filter(
+        role=User.ROLE_TRANSPORTER,
+        is_active=True,
+        is_available=True,
+        latitude__isnull=False,
+        longitude__isnull=False,
+    ).values_list("id", "latitude", "longitude")
+    return [
+        (pk, lat, lon, capacity - holding.get(pk, 0))
+        for pk, lat, lon in rows
+        if holding.get(pk, 0) < capacity
+    ]
+
+
+def match(jobs, transporters, max_pickup_km, batch_radius_km):
+    """
+    {job id: transporter id} for `jobs` ([(id, lat, lon)], oldest first)
+    and `transporters` ([(id, lat, lon, spare capacity)]).
+    """
+    job_grid = Grid(batch_radius_km)
+    for index, (_, lat, lon) in enumerate(jobs):
+        job_grid.add(index, lat, lon)
+    transporter_grid = Grid(max_pickup_km / TRANSPORTER_CELLS)
+    for index, (_, lat, lon, _) in enumerate(transporters):
+        transporter_grid.add(index, lat, lon)
+
+    taken = [False] * len(jobs)
+    spare = [row[3] for row in transporters]
+    assignments = {}
+
+    def with_spare(cell):
+        # full transporters leave the index as it is searched
+        cell[:] = [t for t in cell if spare[t]]
+        return cell
+
+    for seed, (job_id, lat, lon) in enumerate(jobs):
+        if taken[seed]:
+            continue
+        nearest, best = None, max_pickup_km
+        for bound, ring in transporter_grid.rings(lat, lon, max_pickup_km):
+            if bound > best:
+                break
+            for cell in ring:
+                for t in with_spare(cell):
+                    _, t_lat, t_lon, _ = transporters[t]
+                    km = distance_km(lat, lon, t_lat, t_lon)
+                    if km <= best:
+                        nearest, best = t, km
+        if nearest is None:
+            continue
+
+        batch = [(0.0, seed)]
+        if spare[nearest] > 1:
+            for cell in job_grid.near(lat, lon, batch_radius_km):
+                cell[:] = [j for j in cell if not taken[j]]
+                for j in cell:
+                    if j != seed:
+                        _, j_lat, j_lon = jobs[j]
+                        km = distance_km(lat, lon, j_lat, j_lon)
+                        if km <= batch_radius_km:
+                            batch.append((km, j))
+            batch.sort()
+        transporter_id = transporters[nearest][0]
+        for _, j in batch[: spare[nearest]]:
+            taken[j] = True
+            assignments[jobs[j][0]] = transporter_id
+        spare[nearest] -= min(len(batch), spare[nearest])
+    return assignments
+
+
+def write(assignments, using=DEFAULT_DB_ALIAS):
+    """
+    Assign the jobs; returns how many were still pending.
+
+    The SQL is written out, as compiling a few hundred When() expressions
+    per chunk costs far more than running the UPDATE.
+    """
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    opts = DeliveryJob._meta
+    table = quote(opts.db_table)
+    pk = quote(opts.pk.column)
+    transporter = quote(opts.get_field("transporter").column)
+    status = quote(opts.get_field("status").column)
+    now = opts.get_field("updated_at").get_db_prep_value(timezone.now(), connection)
+    # in id order, so each chunk touches neighbouring pages
+    items = sorted(assignments.items())
+    written = 0
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        for start in range(0, len(items), WRITE_CHUNK):
+            chunk = items[start : start + WRITE_CHUNK]
+            cases = " ".join(["WHEN %s THEN %s"] * len(chunk))
+            ids = ", ".join(["%s"] * len(chunk))
+            cursor.execute(
+                f"UPDATE {table} SET {transporter} = CASE {pk} {cases} END, "
+                f"{status} = 'assigned', "
+                f"{quote('assigned_at')} = %s, {quote('updated_at')} = %s "
+                f"WHERE {pk} IN ({ids}) AND {status} = 'pending'",
+                [value for item in chunk for value in item]
+                + [now, now]
+                + [job_id for job_id, _ in chunk],
+            )
+            written += cursor.rowcount
+    return written
+
+
+def assign(limit=None):
+    """One assignment round over at most `limit` pending jobs."""
+    started = time.perf_counter()
+    jobs = load_jobs(limit)
+    transporters = load_transporters(get_setting("CAPACITY"))
+    loaded = time.perf_counter()
+    assignments = match(
+        jobs,
+        transporters,
+        get_setting("MAX_PICKUP_KM"),
+        get_setting("BATCH_RADIUS_KM"),
+    )
+    matched = time.perf_counter()
+    assigned = write(assignments)
+    return AssignmentResult(
+        assigned=assigned,
+        transporters=len(set(assignments.values())),
+        unmatched=len(jobs) - len(assignments),
+        timings={
+            "load": loaded - started,
+            "match": matched - loaded,
+            "write": time.perf_counter() - matched,
+        },
+    )
@@ -0,0 +1,121 @@
+"""
+Async read path for the hot DRF views, served under ASGI.
+
+Views that mix in AsyncListModelMixin/AsyncRetrieveModelMixin get an
+`aget()` next to `get()`, built from the same queryset, filter, pagination
+and serializer configuration, but fetching rows with the async ORM.
+CachedResponseMixin and ConditionalGetMixin have matching `aget()`s.
+AsyncReadView serves a view's GET through `aget()` and hands every other
+method to the regular DRF view; config/asgi_urls.py routes to it.
+
+Serialization runs in the event loop: the serializers only read fields
+that were fetched with the rows (select_related), so it does no I/O.
+Django 4.2's async ORM still runs each query on the shared sync thread, but
+the request spends only that query there, not its whole lifetime.
+"""
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from django.views import View
+from rest_framework.response import Response
+
+
+class AsyncGenericMixin:
+    async def aget_filtered_queryset(self):
+        # get_queryset() may query by itself (search asks FTS5 for a
+        # candidate floor), so it is built off the event loop
+        return await sync_to_async(lambda: self.filter_queryset(self.get_queryset()))()
+
+    async def apaginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        return await self.paginator.apaginate_queryset(
+            queryset, self.request, view=self
+        )
+
+
+class AsyncListModelMixin(AsyncGenericMixin):
+    """Async twin of ListModelMixin.list()."""
+
+    async def aget(self, request, *args, **kwargs):
+        return await self.alist(request, *args, **kwargs)
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = await self.aget_filtered_queryset()
+
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        rows = [obj async for obj in queryset.aiterator()]
+        return Response(self.get_serializer(rows, many=True).data)
+
+
+class AsyncRetrieveModelMixin(AsyncGenericMixin):
+    """Async twin of RetrieveModelMixin.retrieve()."""
+
+    async def aget(self, request, *args, **kwargs):
+        return await self.aretrieve(request, *args, **kwargs)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        return Response(self.get_serializer(instance).data)
+
+    async def aget_object(self):
+        queryset = await self.aget_filtered_queryset()
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.aget(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            # same message as get_object_or_404()
+            raise Http404(
+                f"No {queryset.model._meta.object_name} matches the given query."
+            )
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+
+class AsyncReadView(View):
+    """
+    GET goes through `view_class.aget()` with the same request handling as
+    APIView.dispatch(); other methods are passed to the DRF view unchanged.
+    """
+
+    view_class = None
+    sync_view = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        initkwargs.setdefault("sync_view", initkwargs["view_class"].as_view())
+        view = super().as_view(**initkwargs)
+        # CSRF is left to the DRF view, as APIView.as_view() does
+        view.csrf_exempt = True
+        return view
+
+    async def get(self, request, *args, **kwargs):
+        view = self.view_class()
+        view.setup(request, *args, **kwargs)
+        request = view.initialize_request(request, *args, **kwargs)
+        view.request = request
+        view.headers = view.default_response_headers
+
+        try:
+            # authentication may hit the database
+            await sync_to_async(view.initial)(request, *args, **kwargs)
+            response = await view.aget(request, *args, **kwargs)
+        except Exception as exc:
+            response = view.handle_exception(exc)
+        return view.finalize_response(request, response, *args, **kwargs)
+
+    async def delegate(self, request, *args, **kwargs):
+        return await sync_to_async(self.sync_view)(request, *args, **kwargs)
+
+    post = put = patch = delete = options = delegate
+
+
+def as_async_view(view_class):
+    return AsyncReadView.as_view(view_class=view_class)
@@ -0,0 +1,133 @@
+"""
+Native async views for the endpoints that hash passwords.
+
+Under ASGI (config/asgi.py) Django runs every sync view on one shared
+thread, so a PBKDF2 hash inside a sync view blocks all the other sync views
+for ~100ms. These views await the hash in the bounded pool from
+api/hashing.py instead and only touch the database through sync_to_async
+for the short queries around it. config/asgi_urls.py routes the auth
+endpoints here; WSGI workers keep the DRF views in api/views.py.
+
+Request parsing, validation and error bodies are the same as those DRF
+views'.
+"""
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.hashers import make_password
+from django.views import View
+from rest_framework import serializers, status
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import APIException
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .hashing import PoolFull, get_pool, get_setting, verify_password
+from .serializers import LoginSerializer, RegisterSerializer, UserSerializer
+
+PARSERS = (JSONParser(), FormParser(), MultiPartParser())
+
+
+def json_response(data, status=status.HTTP_200_OK):
+    """A DRF Response, rendered as JSON without an APIView to negotiate it."""
+    response = Response(data, status=status)
+    response.accepted_renderer = JSONRenderer()
+    response.accepted_media_type = response.accepted_renderer.media_type
+    response.renderer_context = {}
+    return response
+
+
+def busy_response():
+    response = json_response(
+        {"detail": "Too many login attempts in progress, try again shortly."},
+        status=status.HTTP_429_TOO_MANY_REQUESTS,
+    )
+    response["Retry-After"] = str(get_setting("RETRY_AFTER"))
+    return response
+
+
+class DeferredLoginSerializer(LoginSerializer):
+    verify_password = False
+
+
+class AsyncAPIView(View):
+    http_method_names = ["post", "options"]
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # token endpoints, like DRF's APIView, do not use CSRF
+        view.csrf_exempt = True
+        return view
+
+    async def post(self, request):
+        try:
+            # the body is already in memory, parsing does no I/O
+            data = Request(request, parsers=PARSERS).data
+        except APIException as exc:
+            return json_response({"detail": exc.detail}, status=exc.status_code)
+        return await self.handle(data)
+
+
+class AsyncRegisterView(AsyncAPIView):
+    """
+    POST /api/auth/register/
+    - Create a new user (farmer/buyer/transporter)
+    - Returns token + user object (429 + Retry-After when the hashing pool is full)
+    """
+
+    async def handle(self, data):
+        serializer = RegisterSerializer(data=data)
+        if not await sync_to_async(serializer.is_valid)():
+            return json_response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            password_hash = await get_pool().run(
+                make_password, serializer.validated_data["password"]
+            )
+        except PoolFull:
+            return busy_response()
+
+        user = await sync_to_async(serializer.save)(password_hash=password_hash)
+        token, _ = await Token.objects.aget_or_create(user=user)
+        return json_response(
+            {"token": token.key, "user": UserSerializer(user).data},
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class AsyncLoginView(AsyncAPIView):
+    """
+    POST /api/auth/login/
+    - Returns token + user object for valid credentials
+      (429 + Retry-After when the hashing pool is full)
+    """
+
+    async def handle(self, data):
+        serializer = DeferredLoginSerializer(data=data)
+        if not await sync_to_async(serializer.is_valid)():
+            return json_response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        user = serializer.validated_data["user"]
+
+        try:
+            password_ok, new_hash = await get_pool().run(
+                verify_password, serializer.validated_data["password"], user.password
+            )
+        except PoolFull:
+            return busy_response()
+
+        try:
+            serializer.check_user(user, password_ok)
+        except serializers.ValidationError as exc:
+            return json_response(
+                {api_settings.NON_FIELD_ERRORS_KEY: exc.detail},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if new_hash is not None:
+            user.password = new_hash
+            await user.asave(update_fields=["password"])
+        token, _ = await Token.objects.aget_or_create(user=user)
+        return json_response({"token": token.key, "user": UserSerializer(user).data})
@@ -0,0 +1,108 @@
+"""
+Token authentication with an in-process cache of token -> user lookups.
+
+DRF's TokenAuthentication joins Token and User on every authenticated
+request. CachedTokenAuthentication keeps recent lookups in a bounded LRU
+with a TTL, so a client making a burst of requests pays for the join once.
+
+Entries are dropped by the signal handlers in api/signals.py when the token
+is deleted or the user's is_active/is_staff/is_superuser/role changes. The
+cache is per process: other workers only notice such a change when their
+entry expires, so keep TOKEN_AUTH_CACHE["TTL"] short. Writes that bypass
+signals (queryset.update() on users) are likewise only seen after the TTL.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework.authentication import TokenAuthentication
+
+DEFAULTS = {
+    "MAX_SIZE": 1024,
+    "TTL": 60,
+}
+
+# changes to these fields must be seen by the next request
+AUTH_FIELDS = frozenset({"is_active", "is_staff", "is_superuser", "role"})
+
+
+def get_setting(name):
+    return getattr(settings, "TOKEN_AUTH_CACHE", {}).get(name, DEFAULTS[name])
+
+
+class TokenCache:
+    """Thread-safe LRU of token key -> (user, token, expires_at)."""
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[2] <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[0], entry[1]
+
+    def set(self, key, user, token):
+        expires_at = time.monotonic() + get_setting("TTL")
+        with self.lock:
+            self.entries[key] = (user, token, expires_at)
+            self.entries.move_to_end(key)
+            while len(self.entries) > get_setting("MAX_SIZE"):
+                self.entries.popitem(last=False)
+
+    def evict(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def evict_user(self, user_pk):
+        # the cache is small and user changes are rare: a scan is fine
+        with self.lock:
+            for key in [k for k, e in self.entries.items() if e[0].pk == user_pk]:
+                del self.entries[key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+token_cache = TokenCache()
+
+
+def invalidate_token(key):
+    """
+    Evict now and again once the transaction commits, so an entry re-cached
+    from pre-commit data in between is dropped too.
+    """
+    token_cache.evict(key)
+    transaction.on_commit(lambda: token_cache.evict(key))
+
+
+def invalidate_user(user_pk):
+    token_cache.evict_user(user_pk)
+    transaction.on_commit(lambda: token_cache.evict_user(user_pk))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Drop-in replacement for TokenAuthentication (see module docstring)."""
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is None:
+            # raises for unknown tokens and inactive users: those are not cached
+            cached = super().authenticate_credentials(key)
+            token_cache.set(key, *cached)
+        # each request gets its own copies, so nothing it sets on them
+        # leaks into other requests
+        user, token = copy.copy(cached[0]), copy.copy(cached[1])
+        token.user = user
+        return user, token
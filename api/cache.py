@@ -0,0 +1,316 @@
+"""
+Versioned response cache for the public read endpoints.
+
+Cache keys embed a version counter per model the view depends on. The
+signal handlers in api/signals.py bump a model's counter on every
+save/delete, which makes every cached response built from the old data
+unreachable at once; nothing has to be deleted key by key.
+
+Views with a `cache_row_model` also embed a counter of their rows: the
+detail view the row's own, list views one shared "list" counter. Stock
+changes on every order bump only those (invalidate_rows()), so the other
+products' detail entries survive an order burst.
+
+Entries are served fresh for TIMEOUT seconds, then for up to STALE_TIMEOUT
+more while a single request (holding a short cache lock) rebuilds them.
+On a cold miss the requests that lose the lock wait for the winner's
+result instead of all hitting the database together, or build their own
+once the winner releases the lock without storing one.
+"""
+
+import asyncio
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from rest_framework.response import Response
+
+DEFAULTS = {
+    "ALIAS": "default",
+    "TIMEOUT": 60,
+    "STALE_TIMEOUT": 30,
+    "LOCK_TIMEOUT": 5,
+    "POLL_INTERVAL": 0.01,
+}
+
+
+def get_setting(name):
+    return getattr(settings, "API_RESPONSE_CACHE", {}).get(name, DEFAULTS[name])
+
+
+def get_cache():
+    return caches[get_setting("ALIAS")]
+
+
+class InProcessAsyncCache:
+    """
+    a*() methods for backends that never block. Django's defaults wrap each
+    call in sync_to_async, a thread hop per cache lookup for no benefit.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    async def aget(self, key, default=None):
+        return self.cache.get(key, default)
+
+    async def aget_many(self, keys):
+        return self.cache.get_many(keys)
+
+    async def aadd(self, key, value, timeout):
+        return self.cache.add(key, value, timeout)
+
+    async def aset(self, key, value, timeout):
+        return self.cache.set(key, value, timeout)
+
+    async def adelete(self, key):
+        return self.cache.delete(key)
+
+
+def get_async_cache():
+    cache = get_cache()
+    if isinstance(cache, (LocMemCache, DummyCache)):
+        return InProcessAsyncCache(cache)
+    return cache
+
+
+def version_key(model, scope=None):
+    """The counter of a whole model, or of one `scope` of it (a pk, "list")."""
+    key = f"api:version:{model._meta.label_lower}"
+    return key if scope is None else f"{key}:{scope}"
+
+
+def get_versions(keys):
+    cache = get_cache()
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # start from the clock, so a counter that was evicted and
+            # re-created cannot collide with the keys it was part of
+            cache.add(key, time.time_ns() // 1000, timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+async def aget_versions(keys):
+    cache = get_async_cache()
+    versions = await cache.aget_many(keys)
+    for key in keys:
+        if key not in versions:
+            await cache.aadd(key, time.time_ns() // 1000, timeout=None)
+            versions[key] = await cache.aget(key)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(keys):
+    cache = get_cache()
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns() // 1000, timeout=None)
+
+
+def invalidate(model):
+    """
+    Bump now, so readers stop using the old entries, and again once the
+    transaction commits, so an entry rebuilt from pre-commit data in between
+    is orphaned too.
+    """
+    keys = [version_key(model)]
+    bump_versions(keys)
+    transaction.on_commit(lambda: bump_versions(keys))
+
+
+def invalidate_rows(model, pks):
+    """invalidate() for changes to a few rows: their details and the lists."""
+    keys = [version_key(model, "list"), *(version_key(model, pk) for pk in pks)]
+    bump_versions(keys)
+    transaction.on_commit(lambda: bump_versions(keys))
+
+
+def get_or_build(key, build):
+    """
+    Return the cached value for key, calling build() at most once across
+    concurrent callers when it is missing or stale. build() returns
+    (value, cacheable).
+    """
+    cache = get_cache()
+    lock_key = f"{key}:lock"
+    lock_timeout = get_setting("LOCK_TIMEOUT")
+
+    entry = cache.get(key)
+    if entry is not None:
+        value, fresh_until = entry
+        if time.time() < fresh_until or not cache.add(lock_key, 1, lock_timeout):
+            # fresh, or stale while another request refreshes it
+            return value
+        return _rebuild(key, lock_key, build)
+
+    if cache.add(lock_key, 1, lock_timeout):
+        return _rebuild(key, lock_key, build)
+
+    # someone else is building it: wait for their result
+    deadline = time.time() + lock_timeout
+    while time.time() < deadline:
+        time.sleep(get_setting("POLL_INTERVAL"))
+        found = cache.get_many([key, lock_key])
+        if key in found:
+            return found[key][0]
+        if lock_key not in found:
+            # they finished without storing anything (a 304, 404, ...)
+            break
+    value, _ = build()
+    return value
+
+
+def _rebuild(key, lock_key, build):
+    cache = get_cache()
+    try:
+        value, cacheable = build()
+        if cacheable:
+            timeout = get_setting("TIMEOUT")
+            cache.set(
+                key,
+                (value, time.time() + timeout),
+                timeout + get_setting("STALE_TIMEOUT"),
+            )
+        return value
+    finally:
+        cache.delete(lock_key)
+
+
+async def aget_or_build(key, build):
+    """get_or_build() for async callers; build is a coroutine function."""
+    cache = get_async_cache()
+    lock_key = f"{key}:lock"
+    lock_timeout = get_setting("LOCK_TIMEOUT")
+
+    entry = await cache.aget(key)
+    if entry is not None:
+        value, fresh_until = entry
+        if time.time() < fresh_until or not await cache.aadd(lock_key, 1, lock_timeout):
+            return value
+        return await _arebuild(key, lock_key, build)
+
+    if await cache.aadd(lock_key, 1, lock_timeout):
+        return await _arebuild(key, lock_key, build)
+
+    deadline = time.time() + lock_timeout
+    while time.time() < deadline:
+        await asyncio.sleep(get_setting("POLL_INTERVAL"))
+        found = await cache.aget_many([key, lock_key])
+        if key in found:
+            return found[key][0]
+        if lock_key not in found:
+            break
+    value, _ = await build()
+    return value
+
+
+async def _arebuild(key, lock_key, build):
+    cache = get_async_cache()
+    try:
+        value, cacheable = await build()
+        if cacheable:
+            timeout = get_setting("TIMEOUT")
+            await cache.aset(
+                key,
+                (value, time.time() + timeout),
+                timeout + get_setting("STALE_TIMEOUT"),
+            )
+        return value
+    finally:
+        await cache.adelete(lock_key)
+
+
+class CachedResponseMixin:
+    """
+    Serve GET from the versioned response cache.
+
+    The cache key is the view, the versions of `cache_dependencies` (and of
+    the requested `cache_row_model` row, or its lists) and the absolute URL (query string included; pagination links embed the host).
+    Only 200 responses are stored, as data plus the ETag/Last-Modified
+    headers, so a hit also answers conditional requests without touching
+    the database.
+    """
+
+    cache_dependencies = ()
+    cache_row_model = None
+    cached_headers = ("ETag", "Last-Modified")
+
+    def cache_version_keys(self):
+        keys = [version_key(model) for model in self.cache_dependencies]
+        if self.cache_row_model is not None:
+            pk = self.kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+            keys.append(version_key(self.cache_row_model, "list" if pk is None else pk))
+        return keys
+
+    def get(self, request, *args, **kwargs):
+        key = self.response_cache_key(request, get_versions(self.cache_version_keys()))
+        built = []
+
+        def build():
+            response = super(CachedResponseMixin, self).get(request, *args, **kwargs)
+            built.append(response)
+            return self.cache_entry(response)
+
+        entry = get_or_build(key, build)
+        if built:
+            # this request did the work: return its own response
+            return built[0]
+        if entry is None:
+            return super().get(request, *args, **kwargs)
+        return self.cached_response(request, entry)
+
+    async def aget(self, request, *args, **kwargs):
+        versions = await aget_versions(self.cache_version_keys())
+        key = self.response_cache_key(request, versions)
+        built = []
+
+        async def build():
+            response = await super(CachedResponseMixin, self).aget(
+                request, *args, **kwargs
+            )
+            built.append(response)
+            return self.cache_entry(response)
+
+        entry = await aget_or_build(key, build)
+        if built:
+            return built[0]
+        if entry is None:
+            return await super().aget(request, *args, **kwargs)
+        return self.cached_response(request, entry)
+
+    def response_cache_key(self, request, versions):
+        versions = ".".join(str(v) for v in versions)
+        url = hashlib.sha1(request.build_absolute_uri().encode()).hexdigest()
+        return f"api:response:{type(self).__name__}:{versions}:{url}"
+
+    def cache_entry(self, response):
+        if response.status_code != 200:
+            return None, False
+        headers = {
+            name: response.headers[name]
+            for name in self.cached_headers
+            if name in response.headers
+        }
+        return (response.data, headers), True
+
+    def cached_response(self, request, entry):
+        data, headers = entry
+        not_modified = get_conditional_response(
+            request,
+            etag=headers.get("ETag"),
+            last_modified=parse_http_date_safe(headers.get("Last-Modified", "")),
+        )
+        response = not_modified or Response(data)
+        for name, value in headers.items():
+            response.headers[name] = value
+        return response
@@ -0,0 +1,132 @@
+import hashlib
+from calendar import timegm
+from itertools import chain
+
+from asgiref.sync import sync_to_async
+from django.db.models import Count, Max, Subquery
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .pagination import KeysetPagination
+
+
+class ConditionalGetMixin:
+    """
+    Strong ETag + Last-Modified on GET, derived from `updated_at`.
+
+    The validators come from one cheap query instead of the page query:
+    - detail: the object's timestamps
+    - page-number list: COUNT(*) and MAX(updated_at) over the filtered
+      queryset (the count makes deletes change the ETag)
+    - keyset list: the ids and timestamps of the rows on the page, since
+      keyset pages must never count the table
+
+    `conditional_timestamp_fields` lists every timestamp that shows up in the
+    response, e.g. "category__updated_at" when the category name is
+    serialized. If-None-Match / If-Modified-Since matches get a 304 without
+    the page being queried or serialized.
+    """
+
+    conditional_timestamp_fields = ("updated_at",)
+
+    def get(self, request, *args, **kwargs):
+        validators = self.get_conditional_validators()
+        if validators is None:
+            return super().get(request, *args, **kwargs)
+
+        not_modified = self.not_modified_response(request, *validators)
+        if not_modified is not None:
+            return not_modified
+
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            self.set_validator_headers(response, *validators)
+        return response
+
+    async def aget(self, request, *args, **kwargs):
+        # one aggregate or values_list query, built by the sync helpers
+        validators = await sync_to_async(self.get_conditional_validators)()
+        if validators is None:
+            return await super().aget(request, *args, **kwargs)
+
+        not_modified = self.not_modified_response(request, *validators)
+        if not_modified is not None:
+            return not_modified
+
+        response = await super().aget(request, *args, **kwargs)
+        if response.status_code == 200:
+            self.set_validator_headers(response, *validators)
+        return response
+
+    def not_modified_response(self, request, etag, last_modified):
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if not_modified is not None:
+            return self.set_validator_headers(not_modified, etag, last_modified)
+        return None
+
+    @staticmethod
+    def set_validator_headers(response, etag, last_modified):
+        response.headers["ETag"] = etag
+        if last_modified is not None:
+            response.headers["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def get_conditional_state(self):
+        """
+        Values that change whenever the response would change, or None to
+        skip conditional handling (e.g. the object does not exist).
+        """
+        queryset = self.filter_queryset(self.get_queryset()).order_by()
+        fields = self.conditional_timestamp_fields
+
+        lookup_value = self.kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        if lookup_value is not None:
+            return (
+                queryset.filter(**{self.lookup_field: lookup_value})
+                .values_list(*fields)
+                .first()
+            )
+
+        wants_keyset = getattr(self.paginator, "wants_keyset", None)
+        if wants_keyset is not None and wants_keyset(self.request):
+            rows = KeysetPagination().paginate_queryset(
+                queryset.values_list("pk", *fields), self.request, view=self
+            )
+            return tuple(chain.from_iterable(rows))
+
+        aggregates = {
+            f"max_{i}": self.latest_expression(queryset.model, field)
+            for i, field in enumerate(fields)
+        }
+        state = queryset.aggregate(count=Count("pk"), **aggregates)
+        return (state["count"],) + tuple(state[f"max_{i}"] for i in range(len(fields)))
+
+    @staticmethod
+    def latest_expression(model, field):
+        if "__" not in field:
+            return Max(field)
+        # a related table's own latest change, so the aggregate does not
+        # have to join every row (any related change busts the list ETag)
+        relation, related_field = field.split("__", 1)
+        related_model = model._meta.get_field(relation).related_model
+        latest = related_model.objects.order_by(f"-{related_field}").values(
+            related_field
+        )[:1]
+        return Max(Subquery(latest))
+
+    def get_conditional_validators(self):
+        state = self.get_conditional_state()
+        if state is None:
+            return None
+
+        timestamps = [value for value in state if hasattr(value, "utctimetuple")]
+        last_modified = timegm(max(timestamps).utctimetuple()) if timestamps else None
+        # the full path keys pages, filters and search terms apart
+        digest = hashlib.sha1(
+            "|".join(
+                [self.request.get_full_path()] + [str(value) for value in state]
+            ).encode()
+        ).hexdigest()
+        return quote_etag(digest), last_modified
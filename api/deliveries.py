@@ -0,0 +1,85 @@
+"""
+Delivery jobs follow their orders (api/order_states.py calls these in the
+same transaction as the status change):
+
+- confirmed: a pending job, with the farmer's and the buyer's coordinates
+  as pickup and drop-off
+- delivered: the job is delivered
+- cancelled: an open job is cancelled and its transporter freed
+
+Each helper is one statement per ID_CHUNK orders.
+"""
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import CharField, DateTimeField, Value
+from django.utils import timezone
+
+from .models import DeliveryJob, Order
+
+# ids per IN (...) list, under SQLite's old limit of 999 variables
+ID_CHUNK = 900
+
+OPEN_STATUSES = ("pending", "assigned")
+
+# a new job's columns, and where the order SELECT finds the first five
+JOB_FIELDS = (
+    "order",
+    "pickup_latitude",
+    "pickup_longitude",
+    "dropoff_latitude",
+    "dropoff_longitude",
+    "status",
+    "created_at",
+    "updated_at",
+)
+ORDER_FIELDS = (
+    "pk",
+    "product__farmer__latitude",
+    "product__farmer__longitude",
+    "buyer__latitude",
+    "buyer__longitude",
+)
+
+
+def chunks(items, size=ID_CHUNK):
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def create_jobs(order_ids):
+    """
+    A pending job for each order in `order_ids` that has none: one
+    INSERT ... SELECT per chunk, reading the coordinates in the database.
+    """
+    order_ids = list(order_ids)
+    connection = connections[DEFAULT_DB_ALIAS]
+    now = Value(timezone.now(), output_field=DateTimeField())
+    table = connection.ops.quote_name(DeliveryJob._meta.db_table)
+    columns = ", ".join(
+        connection.ops.quote_name(DeliveryJob._meta.get_field(name).column)
+        for name in JOB_FIELDS
+    )
+    with connection.cursor() as cursor:
+        for chunk in chunks(order_ids):
+            select, params = (
+                Order.objects.filter(pk__in=chunk, delivery_job__isnull=True)
+                .values_list(
+                    *ORDER_FIELDS,
+                    Value("pending", output_field=CharField()),
+                    now,
+                    now,
+                )
+                .query.get_compiler(connection=connection)
+                .as_sql()
+            )
+            cursor.execute(f"INSERT INTO {table} ({columns}) {select}", params)
+
+
+def close_jobs(order_ids, status):
+    """Move the open jobs of `order_ids` to "delivered" or "cancelled"."""
+    order_ids = list(order_ids)
+    now = timezone.now()
+    for chunk in chunks(order_ids):
+        DeliveryJob.objects.filter(order_id__in=chunk, status__in=OPEN_STATUSES).update(
+            status=status, updated_at=now
+        )
@@ -0,0 +1,242 @@
+"""
+Read-only fast path for list responses.
+
+A DRF ModelSerializer builds a model instance per row, then walks every
+field's get_attribute()/to_representation() for it. For a page of plain
+columns most of that is overhead. ValuesSerializer compiles a serializer
+class once into:
+
+- the `.values()` lookups its readable fields read (`category.name`
+  becomes `category__name`, a PrimaryKeyRelatedField reads the FK column)
+- a converter per field, or none where the database value is already what
+  the DRF field would return (ints, strings, string choices, FK ids)
+
+Each row is then one dict comprehension. The decimal and ISO 8601
+datetime converters are DRF's own logic with the per-call setup hoisted
+out; any other field calls its to_representation() on the column value.
+The rendered JSON is byte for byte DRF's. Fields that do not read a
+column (method fields, nested serializers, source="*", paths through
+nullable relations) make the serializer unsupported, and FastListMixin
+falls back to DRF for it.
+"""
+
+import decimal
+import threading
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from rest_framework import relations, serializers
+from rest_framework.response import Response
+from rest_framework.settings import ISO_8601, api_settings
+
+from .timing import phase
+
+# DRF fields that return these model columns' values unchanged
+PASSTHROUGH = {
+    serializers.CharField.to_representation: (models.CharField, models.TextField),
+    serializers.IntegerField.to_representation: (models.IntegerField, models.AutoField),
+    serializers.ReadOnlyField.to_representation: (models.Field,),
+}
+
+
+class Unsupported(Exception):
+    pass
+
+
+def model_lookup(model, source_attrs):
+    """
+    The `.values()` lookup for a dotted source, the model field it ends on
+    and whether that is a relation (whose value is then the related pk).
+    """
+    parts = []
+    for position, attr in enumerate(source_attrs):
+        try:
+            field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            raise Unsupported(f"{model.__name__}.{attr} is not a model field")
+        if not field.concrete:
+            raise Unsupported(f"{model.__name__}.{attr} is a reverse relation")
+        last = position == len(source_attrs) - 1
+        if field.is_relation and attr == field.name and not last:
+            # a null FK makes DRF skip the key instead of returning None
+            if field.null:
+                raise Unsupported(f"{model.__name__}.{attr} is nullable")
+            model = field.related_model
+        elif not last:
+            raise Unsupported(f"{model.__name__}.{attr} is not a relation")
+        parts.append(attr)
+    return "__".join(parts), field, field.is_relation and attr == field.name
+
+
+def decimal_converter(field):
+    coerce_to_string = getattr(
+        field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING
+    )
+    if (
+        not coerce_to_string
+        or field.localize
+        or field.normalize_output
+        or field.decimal_places is None
+    ):
+        return field.to_representation
+    # DecimalField.quantize() builds these on every call
+    exponent = decimal.Decimal(".1") ** field.decimal_places
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+    rounding = field.rounding
+
+    def convert(value):
+        return format(value.quantize(exponent, rounding=rounding, context=context), "f")
+
+    return convert
+
+
+def datetime_converter(field):
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601:
+        return field.to_representation
+    # the current timezone can change between requests, not within a page
+    tz = field.timezone if hasattr(field, "timezone") else field.default_timezone()
+    if tz is None:
+        return field.to_representation
+
+    def convert(value):
+        if value.tzinfo is None:
+            return field.to_representation(value)
+        text = value.astimezone(tz).isoformat()
+        if text.endswith("+00:00"):
+            return text[:-6] + "Z"
+        return text
+
+    return convert
+
+
+def choice_converter(field):
+    if all(
+        str(value) == value and key == value
+        for key, value in field.choice_strings_to_values.items()
+    ):
+        return None
+    return field.to_representation
+
+
+def to_representation(field):
+    return field.to_representation
+
+
+def converter_for(field, model_field, is_relation):
+    """
+    None when the database value already is the representation, else a
+    function of the DRF field that returns the converter for one request.
+    """
+    if is_relation:
+        if isinstance(field, relations.PrimaryKeyRelatedField) and not field.pk_field:
+            return None
+        raise Unsupported(f"{field.field_name}: {type(field).__name__}")
+    method = type(field).to_representation
+    if isinstance(model_field, PASSTHROUGH.get(method, ())):
+        return None
+    return {
+        serializers.ChoiceField.to_representation: choice_converter,
+        serializers.DecimalField.to_representation: decimal_converter,
+        serializers.DateTimeField.to_representation: datetime_converter,
+    }.get(method, to_representation)
+
+
+class ValuesSerializer:
+    """The read side of a ModelSerializer class, compiled against .values() rows."""
+
+    def __init__(self, serializer_class):
+        serializer = serializer_class()
+        model = serializer.Meta.model
+        self.fields = []
+        for field in serializer._readable_fields:
+            if field.source == "*":
+                raise Unsupported(f"{field.field_name} reads the whole instance")
+            lookup, model_field, is_relation = model_lookup(model, field.source_attrs)
+            make = converter_for(field, model_field, is_relation)
+            self.fields.append((field.field_name, lookup, field, make))
+        self.lookups = tuple(dict.fromkeys(lookup for _, lookup, _, _ in self.fields))
+
+    def values(self, queryset):
+        # extra(select=...) columns (the search rank) may be in the ordering
+        return queryset.values(*self.lookups, *queryset.query.extra_select)
+
+    def accessors(self):
+        """(name, lookup, converter or None) per field, for the current request."""
+        return [
+            (name, lookup, make(field) if make else None)
+            for name, lookup, field, make in self.fields
+        ]
+
+    def serialize(self, rows):
+        accessors = self.accessors()
+        plain = [(name, lookup) for name, lookup, convert in accessors if not convert]
+        with phase("serialize"):
+            if len(plain) == len(accessors):
+                return [{name: row[lookup] for name, lookup in plain} for row in rows]
+            return [
+                {
+                    name: (
+                        row[lookup]
+                        if convert is None or row[lookup] is None
+                        else convert(row[lookup])
+                    )
+                    for name, lookup, convert in accessors
+                }
+                for row in rows
+            ]
+
+
+_compiled = {}
+_compiled_lock = threading.Lock()
+
+
+def get_values_serializer(serializer_class):
+    """The compiled ValuesSerializer for a class, or None if it is unsupported."""
+    try:
+        return _compiled[serializer_class]
+    except KeyError:
+        pass
+    with _compiled_lock:
+        if serializer_class not in _compiled:
+            try:
+                compiled = ValuesSerializer(serializer_class)
+            except Unsupported:
+                compiled = None
+            _compiled[serializer_class] = compiled
+        return _compiled[serializer_class]
+
+
+class FastListMixin:
+    """
+    list()/alist() that page over `.values()` rows and serialize them with
+    the view's compiled serializer class; views whose serializer cannot be
+    compiled keep DRF's path.
+    """
+
+    def get_values_serializer(self):
+        return get_values_serializer(self.get_serializer_class())
+
+    def list(self, request, *args, **kwargs):
+        fast = self.get_values_serializer()
+        if fast is None:
+            return super().list(request, *args, **kwargs)
+        queryset = fast.values(self.filter_queryset(self.get_queryset()))
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(fast.serialize(page))
+        return Response(fast.serialize(queryset))
+
+    async def alist(self, request, *args, **kwargs):
+        fast = self.get_values_serializer()
+        if fast is None:
+            return await super().alist(request, *args, **kwargs)
+        queryset = fast.values(await self.aget_filtered_queryset())
+
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(fast.serialize(page))
+        return Response(fast.serialize([row async for row in queryset.aiterator()]))
@@ -0,0 +1,200 @@
+from datetime import datetime, time, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Case, Count, IntegerField, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Product
+
+# upper bounds of the price facet buckets; the last bucket is open-ended
+PRICE_BUCKETS = (Decimal("10"), Decimal("50"), Decimal("100"), Decimal("500"))
+
+
+class ProductFilterBackend(BaseFilterBackend):
+    """
+    Query params for GET /api/products/:
+    - category=<id>[,<id>...]
+    - min_price=<n> / max_price=<n>
+    - unit=<unit>
+    - status=available|sold|inactive
+    - ordering=price|-price|newest (page-number mode; keyset pages are
+      newest first and reject the others)
+    """
+
+    orderings = {
+        "price": ("price", "id"),
+        "-price": ("-price", "-id"),
+        "newest": ("-created_at", "-id"),
+    }
+    statuses = {value for value, _ in Product.STATUS_CHOICES}
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+
+        if params.get("category"):
+            try:
+                ids = [int(value) for value in params["category"].split(",")]
+            except ValueError:
+                raise serializers.ValidationError(
+                    {"category": "Expected a comma-separated list of ids."}
+                )
+            queryset = queryset.filter(category_id__in=ids)
+
+        for param, lookup in (("min_price", "price__gte"), ("max_price", "price__lte")):
+            if params.get(param):
+                queryset = queryset.filter(**{lookup: self.parse_price(params, param)})
+
+        if params.get("unit"):
+            queryset = queryset.filter(unit=params["unit"])
+
+        if params.get("status"):
+            if params["status"] not in self.statuses:
+                raise serializers.ValidationError(
+                    {"status": f"Expected one of {', '.join(sorted(self.statuses))}."}
+                )
+            queryset = queryset.filter(status=params["status"])
+
+        ordering = params.get("ordering")
+        if ordering:
+            if ordering not in self.orderings:
+                raise serializers.ValidationError(
+                    {"ordering": f"Expected one of {', '.join(self.orderings)}."}
+                )
+            queryset = queryset.order_by(*self.orderings[ordering])
+        return queryset
+
+    @staticmethod
+    def parse_price(params, param):
+        try:
+            return Decimal(params[param])
+        except InvalidOperation:
+            raise serializers.ValidationError({param: "Expected a number."})
+
+
+def price_bucket_label(index):
+    lower = PRICE_BUCKETS[index - 1] if index else Decimal("0")
+    if index == len(PRICE_BUCKETS):
+        return f"{lower}+"
+    return f"{lower}-{PRICE_BUCKETS[index]}"
+
+
+def product_facets(queryset):
+    """
+    Counts per category, status and price bucket for a filtered queryset.
+
+    All three come from one GROUP BY (category, status, bucket) query that
+    is rolled up here; the number of groups is bounded by
+    categories x statuses x buckets, not by the number of products.
+    """
+    bucket = Case(
+        *[
+            When(price__lt=upper, then=Value(index))
+            for index, upper in enumerate(PRICE_BUCKETS)
+        ],
+        default=Value(len(PRICE_BUCKETS)),
+        output_field=IntegerField(),
+    )
+    rows = (
+        queryset.order_by()
+        .annotate(price_bucket=bucket)
+        .values("category_id", "category__name", "status", "price_bucket")
+        .annotate(count=Count("id"))
+    )
+
+    categories, statuses, buckets = {}, {}, {}
+    for row in rows:
+        category = categories.setdefault(
+            row["category_id"],
+            {"id": row["category_id"], "name": row["category__name"], "count": 0},
+        )
+        category["count"] += row["count"]
+        statuses[row["status"]] = statuses.get(row["status"], 0) + row["count"]
+        buckets[row["price_bucket"]] = (
+            buckets.get(row["price_bucket"], 0) + row["count"]
+        )
+
+    return {
+        "category": sorted(categories.values(), key=lambda c: c["name"]),
+        "status": [
+            {"value": value, "count": statuses[value]}
+            for value, _ in Product.STATUS_CHOICES
+            if value in statuses
+        ],
+        "price": [
+            {"range": price_bucket_label(index), "count": buckets.get(index, 0)}
+            for index in range(len(PRICE_BUCKETS) + 1)
+        ],
+    }
+
+
+def parse_moment(params, param):
+    """An ISO date (midnight in the current timezone) or datetime, or None."""
+    value = params.get(param)
+    if not value:
+        return None
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            moment = datetime.combine(day, time.min) if day else None
+    except ValueError:
+        moment = None
+    if moment is None:
+        raise serializers.ValidationError(
+            {param: "Expected an ISO 8601 date or datetime."}
+        )
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def order_date_range(params):
+    """
+    (created_after, created_before) for GET /api/orders/: created_after is
+    inclusive, created_before exclusive.
+    """
+    return parse_moment(params, "created_after"), parse_moment(params, "created_before")
+
+
+def parse_id(params, param, required=False):
+    value = params.get(param)
+    if not value:
+        if required:
+            raise serializers.ValidationError({param: "This parameter is required."})
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise serializers.ValidationError({param: "Expected an id."})
+
+
+def parse_day(params, param):
+    value = params.get(param)
+    if not value:
+        return None
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is None:
+        raise serializers.ValidationError({param: "Expected a date (YYYY-MM-DD)."})
+    return day
+
+
+def sales_date_range(params, default_days=30, max_days=366):
+    """
+    (start, end) days, both inclusive, for the sales dashboard: the last
+    `default_days` days unless ?start=/?end= say otherwise.
+    """
+    end = parse_day(params, "end") or timezone.localdate()
+    start = parse_day(params, "start") or end - timedelta(days=default_days - 1)
+    if start > end:
+        raise serializers.ValidationError({"start": "Must not be after end."})
+    if (end - start).days >= max_days:
+        raise serializers.ValidationError(
+            {"start": f"The range can span at most {max_days} days."}
+        )
+    return start, end
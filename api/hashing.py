@@ -0,0 +1,111 @@
+"""
+Bounded pool for password hashing, used by the async auth views.
+
+PBKDF2 costs ~100ms of CPU per login or registration. Run inline, a burst
+of logins holds every request worker (or, under ASGI, the single thread
+that sync views share) and starves cheap catalog reads. The async views in
+api/async_views.py await the hash in this pool instead.
+
+hashlib.pbkdf2_hmac releases the GIL, so a thread pool hashes in parallel
+without the pickling and startup cost of a process pool. Admission is
+bounded: once MAX_PENDING hashes are queued or running, run() raises
+PoolFull and the view answers 429 with Retry-After rather than letting the
+queue (and every client's latency) grow without limit. MAX_PENDING=None
+turns the bound off; values below 1 are rejected, since they would answer
+every login with 429.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    check_password,
+    get_hasher,
+    identify_hasher,
+    make_password,
+)
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+DEFAULTS = {
+    "WORKERS": os.cpu_count() or 2,
+    # None for no bound
+    "MAX_PENDING": 64,
+    "RETRY_AFTER": 1,
+}
+
+
+def get_setting(name):
+    return getattr(settings, "PASSWORD_HASHING_POOL", {}).get(name, DEFAULTS[name])
+
+
+class PoolFull(Exception):
+    pass
+
+
+class HashingPool:
+    def __init__(self, workers, max_pending):
+        if max_pending is not None and max_pending < 1:
+            raise ImproperlyConfigured(
+                "PASSWORD_HASHING_POOL['MAX_PENDING'] must be at least 1, or "
+                f"None for no bound; got {max_pending!r}."
+            )
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="password-hashing"
+        )
+        # a threading semaphore, not an asyncio one: under WSGI every
+        # request runs its own event loop
+        self.slots = (
+            None if max_pending is None else threading.BoundedSemaphore(max_pending)
+        )
+
+    async def run(self, fn, *args):
+        if self.slots is not None and not self.slots.acquire(blocking=False):
+            raise PoolFull
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, fn, *args)
+        finally:
+            if self.slots is not None:
+                self.slots.release()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = HashingPool(get_setting("WORKERS"), get_setting("MAX_PENDING"))
+        return _pool
+
+
+@receiver(setting_changed)
+def reset_pool(setting, **kwargs):
+    global _pool
+    if setting == "PASSWORD_HASHING_POOL":
+        with _pool_lock:
+            if _pool is not None:
+                _pool.executor.shutdown(wait=False)
+            _pool = None
+
+
+def verify_password(password, encoded):
+    """
+    check_password() without the database: returns (is_correct, new_hash),
+    where new_hash is set when Django would upgrade the stored hash.
+    """
+    if not check_password(password, encoded):
+        return False, None
+    preferred = get_hasher("default")
+    if identify_hasher(encoded).algorithm != preferred.algorithm or (
+        preferred.must_update(encoded)
+    ):
+        return True, make_password(password)
+    return True, None
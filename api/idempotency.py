@@ -0,0 +1,138 @@
+"""
+Idempotency-Key support for create endpoints.
+
+A client that retries a POST with the same Idempotency-Key header gets the
+stored response of the first attempt instead of a second order/product:
+
+- the first request claims the key by inserting an in-progress row (the
+  primary key makes the claim atomic), runs the view and stores the
+  response; 5xx responses and exceptions release the key so the client
+  can retry
+- a concurrent request with the same key gets 409 with Retry-After while
+  the first one is still running, and its response once it has finished.
+  It does not wait: a sleeping sync view would hold a worker, or under
+  ASGI the one thread every sync view shares
+- reusing a key with a different body is a 422
+
+Rows expire after IDEMPOTENCY_KEY_TTL seconds; `python manage.py
+sweep_idempotency_keys` deletes expired rows in small batches.
+"""
+
+import hashlib
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+DEFAULTS = {
+    "IDEMPOTENCY_KEY_TTL": 24 * 60 * 60,
+    # how long an in-progress claim blocks retries if its worker died
+    "IDEMPOTENCY_LOCK_TTL": 60,
+    # seconds a request that finds its key in progress is told to wait
+    "IDEMPOTENCY_RETRY_AFTER": 1,
+}
+
+
+def get_setting(name):
+    return getattr(settings, name, DEFAULTS[name])
+
+
+def hash_request_data(data):
+    if hasattr(data, "lists"):
+        data = dict(data.lists())
+    encoded = json.dumps(data, sort_keys=True, cls=JSONEncoder, default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def claim(key, request_hash):
+    """
+    Insert an in-progress row for key. Returns None if we now own the key,
+    else the existing row.
+    """
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=get_setting("IDEMPOTENCY_LOCK_TTL"))
+    # an expired row (finished or abandoned) no longer holds the key
+    IdempotencyKey.objects.filter(key=key, expires_at__lte=now).delete()
+    try:
+        with transaction.atomic():
+            IdempotencyKey.objects.create(
+                key=key, request_hash=request_hash, expires_at=expires_at
+            )
+        return None
+    except IntegrityError:
+        return IdempotencyKey.objects.filter(key=key).first()
+
+
+def replay(record):
+    response = Response(json.loads(record.response_body), status=record.status_code)
+    response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+
+class IdempotentPostMixin:
+    """Honour an Idempotency-Key header on POST (see module docstring)."""
+
+    def post(self, request, *args, **kwargs):
+        header = request.headers.get(HEADER)
+        if not header or not request.user.is_authenticated:
+            return super().post(request, *args, **kwargs)
+        if len(header) > MAX_KEY_LENGTH:
+            return Response(
+                {"detail": f"{HEADER} must be at most {MAX_KEY_LENGTH} characters."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        key = hashlib.sha256(
+            f"{request.user.pk}:{request.path}:{header}".encode()
+        ).hexdigest()
+        request_hash = hash_request_data(request.data)
+
+        record = claim(key, request_hash)
+        if record is not None:
+            if record.request_hash != request_hash:
+                return Response(
+                    {"detail": f"{HEADER} was already used with a different body."},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                )
+            if record.status_code is None:
+                return Response(
+                    {"detail": "A request with this key is still in progress."},
+                    status=status.HTTP_409_CONFLICT,
+                    headers={
+                        "Retry-After": str(get_setting("IDEMPOTENCY_RETRY_AFTER"))
+                    },
+                )
+            return replay(record)
+
+        try:
+            try:
+                response = super().post(request, *args, **kwargs)
+            except Exception as exc:
+                # DRF turns API errors into responses after we return; do it
+                # here so 4xx outcomes are stored and replayed too
+                response = self.handle_exception(exc)
+        except Exception:
+            IdempotencyKey.objects.filter(key=key).delete()
+            raise
+
+        if response.status_code >= 500:
+            IdempotencyKey.objects.filter(key=key).delete()
+            return response
+
+        IdempotencyKey.objects.filter(key=key).update(
+            status_code=response.status_code,
+            response_body=json.dumps(response.data, cls=JSONEncoder),
+            expires_at=timezone.now()
+            + timedelta(seconds=get_setting("IDEMPOTENCY_KEY_TTL")),
+        )
+        return response
@@ -0,0 +1,75 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+from django.utils import timezone
+
+from api import archive
+
+
+class Command(BaseCommand):
+    help = (
+        "Move delivered and cancelled orders older than --older-than-days "
+        "from api_order to api_archivedorder, in short batches. Archived "
+        "rows leave the hot table, so an interrupted run resumes where it "
+        "stopped when started again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than-days", type=int, default=180)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.0,
+            help="seconds to sleep between batches, to leave room for other writers",
+        )
+        parser.add_argument(
+            "--limit", type=int, default=None, help="stop after this many orders"
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="count the orders, move nothing"
+        )
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        if options["older_than_days"] < 0:
+            raise CommandError("--older-than-days cannot be negative.")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+        using = options["database"]
+        now = timezone.now()
+        cutoff = now - timedelta(days=options["older_than_days"])
+
+        if options["dry_run"]:
+            count = archive.archivable(cutoff, using).count()
+            self.stdout.write(
+                f"{count} orders created before {cutoff:%Y-%m-%d %H:%M} "
+                "would be archived."
+            )
+            return
+
+        limit = options["limit"]
+        moved = batches = 0
+        last_id = 0
+        while limit is None or moved < limit:
+            size = options["batch_size"]
+            if limit is not None:
+                size = min(size, limit - moved)
+            # read outside the write transaction: each batch only holds the
+            # lock for its INSERT and DELETE
+            ids = archive.candidate_ids(cutoff, last_id, size, using)
+            if not ids:
+                break
+            moved += archive.archive_batch(ids, cutoff, now, using)
+            batches += 1
+            last_id = ids[-1]
+            if options["verbosity"] > 1:
+                self.stdout.write(f"batch {batches}: {moved} orders, up to #{last_id}")
+            if options["pause"]:
+                time.sleep(options["pause"])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Archived {moved} orders in {batches} batches.")
+        )
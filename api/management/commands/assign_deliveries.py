@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api import assignment
+
+
+class Command(BaseCommand):
+    help = (
+        "Match pending delivery jobs to nearby available transporters, "
+        "batching neighbouring pickups onto one transporter. Meant to run "
+        "every few minutes; settings.DELIVERY_ASSIGNMENT tunes the distances "
+        "and capacity."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit", type=int, help="pending jobs to consider, oldest first"
+        )
+
+    def handle(self, *args, **options):
+        if options["limit"] is not None and options["limit"] < 1:
+            raise CommandError("--limit must be at least 1.")
+        result = assignment.assign(options["limit"])
+        if options["verbosity"] > 1:
+            self.stdout.write(
+                ", ".join(f"{step} {s:.2f}s" for step, s in result.timings.items())
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Assigned {result.assigned} jobs to {result.transporters} "
+                f"transporters; {result.unmatched} left unmatched."
+            )
+        )
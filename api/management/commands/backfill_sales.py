@@ -0,0 +1,65 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from api import sales
+from api.models import OrderHistory
+
+
+def parse_day(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"{value!r} is not a date (YYYY-MM-DD).")
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the daily sales rollups from the orders, archived ones "
+        "included. Each run of --days-per-batch days is replaced in its own "
+        "transaction, so a rebuild of years of history never holds the "
+        "write lock for long."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since", type=parse_day, help="first day (default: the first order's)"
+        )
+        parser.add_argument(
+            "--until", type=parse_day, help="last day (default: the last order's)"
+        )
+        parser.add_argument("--days-per-batch", type=int, default=30)
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        if options["days_per_batch"] < 1:
+            raise CommandError("--days-per-batch must be at least 1.")
+        using = options["database"]
+        start, end = options["since"], options["until"]
+        if start is None or end is None:
+            bounds = OrderHistory.objects.using(using).aggregate(
+                first=Min("created_at"), last=Max("created_at")
+            )
+            if bounds["first"] is None:
+                self.stdout.write("No orders to roll up.")
+                return
+            start = start or timezone.localdate(bounds["first"])
+            end = end or timezone.localdate(bounds["last"])
+        if end < start:
+            raise CommandError("--until is before --since.")
+
+        step = timedelta(days=options["days_per_batch"])
+        rows = 0
+        day = start
+        while day <= end:
+            upto = min(day + step, end + timedelta(days=1))
+            rows += sales.rebuild(day, upto, using)
+            if options["verbosity"] > 1:
+                self.stdout.write(f"{day} - {upto - timedelta(days=1)}: {rows} rows")
+            day = upto
+        self.stdout.write(
+            self.style.SUCCESS(f"Wrote {rows} daily rollups for {start} to {end}.")
+        )
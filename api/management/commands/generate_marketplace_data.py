@@ -0,0 +1,362 @@
+import random
+import time
+from array import array
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from itertools import accumulate, islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from api import cache, sales, search
+from api.models import Category, Order, Product, User
+
+PRODUCE = {
+    "Fruits": ["banana", "plantain", "mango", "pineapple", "orange", "avocado"],
+    "Grains": ["maize", "sorghum", "millet", "rice", "wheat"],
+    "Tubers": ["cassava", "yam", "sweet potato", "cocoyam", "potato"],
+    "Vegetables": ["tomato", "onion", "pepper", "okra", "cabbage", "spinach"],
+    "Legumes": ["cowpea", "soybean", "groundnut", "bambara nut"],
+    "Cash crops": ["cocoa", "cashew", "coffee", "shea", "sesame"],
+}
+# fmt: off
+ADJECTIVES = [
+    "fresh", "dried", "organic", "ripe", "green", "red", "sweet", "large",
+    "small", "premium", "local", "smoked", "white", "yellow",
+]
+UNITS = ["kg", "kg", "kg", "bag", "crate", "tonne", "bunch", "litre"]
+NAMES = [
+    "Ama", "Kofi", "Adwoa", "Kwame", "Efua", "Yaw", "Abena", "Kojo", "Akosua",
+    "Kwesi", "Chidi", "Ngozi", "Tunde", "Bisi", "Wanjiru", "Otieno", "Amina",
+    "Musa", "Fatima", "Ibrahim",
+]
+# fmt: on
+
+
+def parse_mix(text, choices):
+    """'a=70,b=30' -> cumulative weights over `choices` (missing ones are 0)."""
+    weights = dict.fromkeys(choices, 0.0)
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in weights:
+            raise CommandError(f"Unknown value {name!r}; expected one of {choices}.")
+        try:
+            weights[name] = float(weight)
+        except ValueError:
+            raise CommandError(f"Weight of {name!r} must be a number.")
+    if sum(weights.values()) <= 0:
+        raise CommandError(f"{text!r} gives every value a weight of 0.")
+    return list(accumulate(weights[name] for name in choices))
+
+
+def chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let bulk_create store the generated created_at/updated_at values."""
+    fields = [
+        field
+        for model in models
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with synthetic users, categories, products and "
+        "orders for load testing. Rows are generated lazily and inserted in "
+        "bulk_create chunks, so memory stays flat whatever the row counts; "
+        "only the ids (and product prices) are kept, in compact arrays."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10_000)
+        parser.add_argument(
+            "--roles",
+            default="farmer=20,buyer=75,transporter=5",
+            help="relative share of each role",
+        )
+        parser.add_argument(
+            "--categories",
+            type=int,
+            default=len(PRODUCE),
+            help="categories to create; past the built-in ones they are numbered",
+        )
+        parser.add_argument(
+            "--category-skew",
+            type=float,
+            default=1.0,
+            help=(
+                "Zipf exponent of farmers per category: 0 spreads farmers "
+                "evenly, higher values crowd them into the first categories"
+            ),
+        )
+        parser.add_argument(
+            "--products-per-farmer",
+            type=float,
+            default=5,
+            help="mean of an exponential distribution",
+        )
+        parser.add_argument(
+            "--product-status-mix", default="available=85,sold=10,inactive=5"
+        )
+        parser.add_argument(
+            "--orders-per-buyer",
+            type=float,
+            default=4,
+            help="mean of an exponential distribution (a few buyers order a lot)",
+        )
+        parser.add_argument(
+            "--order-status-mix",
+            default="pending=15,confirmed=15,delivered=60,cancelled=10",
+        )
+        parser.add_argument(
+            "--product-skew",
+            type=float,
+            default=2.0,
+            help="1 orders products uniformly; higher values favour a few best sellers",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=365,
+            help="spread created_at over this many days",
+        )
+        parser.add_argument(
+            "--password",
+            default="loadtest123",
+            help="every generated user's password; hashed once",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+        parser.add_argument(
+            "--skip-search-index",
+            action="store_true",
+            help="leave `rebuild_search_index` for later",
+        )
+
+    def handle(self, *args, **options):
+        self.using = options["database"]
+        if not connections[self.using].features.can_return_rows_from_bulk_insert:
+            raise CommandError(
+                "The database must return ids from bulk inserts (SQLite 3.35+, "
+                "PostgreSQL, MariaDB 10.5+)."
+            )
+        self.options = options
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.now = timezone.now()
+        self.role_weights = parse_mix(
+            options["roles"], [c for c, _ in User.ROLE_CHOICES]
+        )
+        self.product_status_weights = parse_mix(
+            options["product_status_mix"], [c for c, _ in Product.STATUS_CHOICES]
+        )
+        self.order_status_weights = parse_mix(
+            options["order_status_mix"], [c for c, _ in Order.STATUS_CHOICES]
+        )
+
+        with explicit_timestamps(User, Category, Product, Order):
+            categories = self.generate_categories()
+            farmers, buyers = self.generate_users()
+            product_ids, product_cents = self.generate_products(farmers, categories)
+            self.generate_orders(buyers, product_ids, product_cents)
+
+        # bulk_create skips the signals that keep these up to date
+        cache.invalidate(Category)
+        cache.invalidate(Product)
+        if not options["skip_search_index"] and search.is_enabled(self.using):
+            self.step("Rebuilding the search index", search.rebuild_index, self.using)
+        self.step(
+            "Rolling up daily sales",
+            sales.rebuild,
+            timezone.localdate(self.now - timedelta(days=options["days"])),
+            timezone.localdate(self.now) + timedelta(days=1),
+            self.using,
+        )
+
+    def step(self, label, fn, *args):
+        started = time.monotonic()
+        result = fn(*args)
+        self.stdout.write(f"{label}: done in {time.monotonic() - started:.1f}s")
+        return result
+
+    def created_at(self):
+        return self.now - timedelta(
+            seconds=self.rng.uniform(0, self.options["days"] * 86400)
+        )
+
+    def insert(self, label, model, rows, on_chunk):
+        """bulk_create `rows` chunk by chunk; on_chunk sees each saved chunk."""
+        started, total = time.monotonic(), 0
+        for chunk in chunks(rows, self.batch_size):
+            with transaction.atomic(using=self.using):
+                model.objects.using(self.using).bulk_create(chunk)
+            on_chunk(chunk)
+            total += len(chunk)
+            if self.stdout.isatty():
+                self.stdout.write(f"\r{label}: {total}", ending="")
+                self.stdout.flush()
+        self.stdout.write(f"\r{label}: {total} in {time.monotonic() - started:.1f}s")
+
+    def generate_categories(self):
+        names = list(PRODUCE)[: self.options["categories"]]
+        names += [
+            f"Category {n}"
+            for n in range(len(names) + 1, self.options["categories"] + 1)
+        ]
+        # re-runs reuse the categories of earlier ones
+        existing = dict(
+            Category.objects.using(self.using)
+            .filter(name__in=names)
+            .values_list("name", "pk")
+        )
+        new = [
+            Category(name=name, created_at=self.now, updated_at=self.now)
+            for name in names
+            if name not in existing
+        ]
+        Category.objects.using(self.using).bulk_create(new)
+        existing.update((category.name, category.pk) for category in new)
+        return [(existing[name], name) for name in names]
+
+    def generate_users(self):
+        password = make_password(self.options["password"])
+        # emails continue after earlier runs' users
+        first_id = (
+            User.objects.using(self.using).aggregate(Max("pk"))["pk__max"] or 0
+        ) + 1
+        roles = [c for c, _ in User.ROLE_CHOICES]
+        farmers, buyers = array("q"), array("q")
+
+        def rows():
+            for n in range(first_id, first_id + self.options["users"]):
+                role = self.rng.choices(roles, cum_weights=self.role_weights)[0]
+                created_at = self.created_at()
+                yield User(
+                    email=f"{role}{n}@loadtest.example",
+                    name=f"{self.rng.choice(NAMES)} {self.rng.choice(NAMES)}son",
+                    phone_number=f"+233{self.rng.randrange(10**8, 10**9)}",
+                    role=role,
+                    password=password,
+                    created_at=created_at,
+                    updated_at=created_at,
+                )
+
+        def keep_ids(chunk):
+            for user in chunk:
+                if user.role == User.ROLE_FARMER:
+                    farmers.append(user.pk)
+                elif user.role == User.ROLE_BUYER:
+                    buyers.append(user.pk)
+
+        self.insert("Users", User, rows(), keep_ids)
+        return farmers, buyers
+
+    def generate_products(self, farmers, categories):
+        statuses = [c for c, _ in Product.STATUS_CHOICES]
+        # Zipf weights: category k gets 1 / k**skew of the farmers
+        category_weights = list(
+            accumulate(
+                1 / (rank ** self.options["category_skew"])
+                for rank in range(1, len(categories) + 1)
+            )
+        )
+        product_ids, product_cents = array("q"), array("q")
+
+        def rows():
+            for farmer_id in farmers:
+                home = self.rng.choices(categories, cum_weights=category_weights)[0]
+                count = round(
+                    self.rng.expovariate(1 / self.options["products_per_farmer"])
+                )
+                for _ in range(count):
+                    # most farmers sell within one category
+                    category_id, category_name = (
+                        home if self.rng.random() < 0.8 else self.rng.choice(categories)
+                    )
+                    produce = self.rng.choice(PRODUCE.get(category_name) or ["produce"])
+                    created_at = self.created_at()
+                    yield Product(
+                        farmer_id=farmer_id,
+                        category_id=category_id,
+                        name=f"{self.rng.choice(ADJECTIVES)} {produce}",
+                        description=" ".join(self.rng.choices(ADJECTIVES, k=6)),
+                        price=Decimal(
+                            f"{max(self.rng.lognormvariate(2, 0.8), 0.5):.2f}"
+                        ),
+                        quantity=self.rng.randrange(0, 500),
+                        unit=self.rng.choice(UNITS),
+                        status=self.rng.choices(
+                            statuses, cum_weights=self.product_status_weights
+                        )[0],
+                        created_at=created_at,
+                        updated_at=created_at,
+                    )
+
+        def keep_ids(chunk):
+            for product in chunk:
+                product_ids.append(product.pk)
+                product_cents.append(int(product.price * 100))
+
+        self.insert("Products", Product, rows(), keep_ids)
+        return product_ids, product_cents
+
+    def generate_orders(self, buyers, product_ids, product_cents):
+        if not product_ids:
+            return
+        statuses = [c for c, _ in Order.STATUS_CHOICES]
+        skew, products = self.options["product_skew"], len(product_ids)
+
+        def rows():
+            for buyer_id in buyers:
+                count = round(
+                    self.rng.expovariate(1 / self.options["orders_per_buyer"])
+                )
+                for _ in range(count):
+                    # u**skew crowds picks towards the first products
+                    index = int(products * self.rng.random() ** skew)
+                    quantity = self.rng.randint(1, 20)
+                    status = self.rng.choices(
+                        statuses, cum_weights=self.order_status_weights
+                    )[0]
+                    created_at = self.created_at()
+                    delivery_date = (
+                        min(
+                            created_at + timedelta(days=self.rng.randint(1, 7)),
+                            self.now,
+                        )
+                        if status == "delivered"
+                        else None
+                    )
+                    yield Order(
+                        buyer_id=buyer_id,
+                        product_id=product_ids[index],
+                        quantity=quantity,
+                        total_price=Decimal(product_cents[index] * quantity) / 100,
+                        status=status,
+                        delivery_date=delivery_date,
+                        created_at=created_at,
+                        updated_at=delivery_date or created_at,
+                    )
+
+        self.insert("Orders", Order, rows(), lambda chunk: None)
@@ -0,0 +1,50 @@
+from collections import Counter
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import profiling
+
+
+class Command(BaseCommand):
+    help = (
+        "Merge the request profiles written by the profiling middleware into "
+        "a ranked report of hot functions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--directory", default=None, help="defaults to PROFILING['DIRECTORY']"
+        )
+        parser.add_argument("--route", help="only profiles of this URL name")
+        parser.add_argument("--limit", type=int, default=25)
+        parser.add_argument(
+            "--collapsed",
+            metavar="PATH",
+            help="also write the merged collapsed stacks, e.g. for flamegraph.pl",
+        )
+
+    def handle(self, *args, **options):
+        directory = Path(options["directory"] or profiling.get_directory())
+        stacks, profiles = Counter(), 0
+        for path in sorted(directory.glob("*.txt")):
+            meta, profile = profiling.read_profile(path)
+            if options["route"] and meta.get("route") != options["route"]:
+                continue
+            stacks.update(profile)
+            profiles += 1
+        if not profiles:
+            raise CommandError(f"No profiles in {directory}.")
+
+        samples = sum(stacks.values())
+        self.stdout.write(f"{profiles} profiles, {samples} samples")
+        self.stdout.write(f"{'self %':>7} {'total %':>8}  function")
+        for function, own, total in profiling.hot_functions(stacks)[: options["limit"]]:
+            self.stdout.write(
+                f"{own / samples:>7.1%} {total / samples:>8.1%}  {function}"
+            )
+
+        if options["collapsed"]:
+            Path(options["collapsed"]).write_text(
+                "".join(f"{stack} {count}\n" for stack, count in stacks.items())
+            )
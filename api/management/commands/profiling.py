@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api import profiling
+
+
+class Command(BaseCommand):
+    help = (
+        "Switch request profiling on or off in every running worker "
+        "(needs PROFILING['ENABLED']), or show its state."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=["on", "off", "status"])
+        parser.add_argument(
+            "--every", type=int, default=0, help="keep every Nth request"
+        )
+        parser.add_argument(
+            "--slower-than-ms",
+            type=float,
+            default=None,
+            help="keep every request slower than this",
+        )
+        parser.add_argument(
+            "--interval-ms", type=float, default=None, help="sampling interval"
+        )
+
+    def handle(self, *args, **options):
+        directory = profiling.get_directory()
+        action = options["action"]
+        if action == "on":
+            if not options["every"] and options["slower_than_ms"] is None:
+                raise CommandError("Give --every and/or --slower-than-ms.")
+            profiling.write_control(
+                directory,
+                every=options["every"],
+                slower_than_ms=options["slower_than_ms"],
+                interval_ms=options["interval_ms"],
+            )
+        elif action == "off":
+            profiling.write_control(directory)
+
+        control = profiling.read_control(directory)
+        if not profiling.get_setting("ENABLED"):
+            self.stderr.write(
+                "PROFILING['ENABLED'] is off, so the middleware is not installed."
+            )
+        triggers = []
+        if control["every"]:
+            triggers.append(f"every {control['every']}th request")
+        if control["slower_than_ms"] is not None:
+            triggers.append(f"requests slower than {control['slower_than_ms']}ms")
+        if triggers:
+            self.stdout.write(
+                f"Profiling {' and '.join(triggers)}, sampling every "
+                f"{control['interval_ms']}ms, into {directory}."
+            )
+        else:
+            self.stdout.write("Profiling is off.")
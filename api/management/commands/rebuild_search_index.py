@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from api import cache, search
+from api.models import Product
+
+
+class Command(BaseCommand):
+    help = "Drop and rebuild the product full-text search index."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        using = options["database"]
+        if not search.is_enabled(using):
+            raise CommandError("Full-text search is only available on SQLite.")
+
+        with transaction.atomic(using=using):
+            search.rebuild_index(using)
+        # cached ?q= responses were built from the old index
+        cache.invalidate(Product)
+        count = Product.objects.using(using).count()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} products."))
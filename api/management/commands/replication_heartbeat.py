@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError
+
+from api import replicas
+
+
+class Command(BaseCommand):
+    help = (
+        "Rewrite the primary's replication heartbeat every HEARTBEAT_INTERVAL "
+        "seconds, so requests can measure replica lag without writing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once", action="store_true", help="Write one heartbeat and exit."
+        )
+
+    def handle(self, *args, **options):
+        interval = replicas.get_setting("HEARTBEAT_INTERVAL")
+        while True:
+            try:
+                replicas.write_heartbeat()
+            except DatabaseError as exc:
+                if options["once"]:
+                    raise
+                # a busy primary must not stop the heartbeat for good
+                self.stderr.write(f"Heartbeat failed: {exc}")
+            if options["once"]:
+                break
+            time.sleep(interval)
+        self.stdout.write(self.style.SUCCESS("Heartbeat written."))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from api import slow_queries
+
+
+class Command(BaseCommand):
+    help = "Show the slow-query log, newest first."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=20)
+        parser.add_argument(
+            "--clear", action="store_true", help="empty the log after showing it"
+        )
+
+    def handle(self, *args, **options):
+        threshold = slow_queries.get_setting("THRESHOLD_MS")
+        if threshold is None:
+            self.stderr.write("SLOW_QUERY_LOG['THRESHOLD_MS'] is not set.")
+        entries = slow_queries.read(limit=options["limit"])
+        for entry in entries:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{entry['time']}  {entry['duration_ms']}ms  "
+                    f"{entry['call_site'] or '?'}"
+                )
+            )
+            self.stdout.write(f"  {entry['sql']}")
+            self.stdout.write(f"  params: {entry['params']}")
+            for step in entry["plan"] or ():
+                self.stdout.write(f"  plan: {step}")
+        if not entries:
+            self.stdout.write("No slow queries logged.")
+        if options["clear"]:
+            slow_queries.clear()
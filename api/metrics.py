@@ -0,0 +1,264 @@
+"""
+Request metrics in the Prometheus text format, served at /api/metrics/.
+
+api.middleware.metrics_middleware records every request against its URL
+name (`product-list`, `order-detail`, ... or `unmatched`, so unknown paths
+cannot blow up the label set):
+
+- api_requests_total{route, method, status}
+- api_request_duration_seconds{route}        histogram
+- api_db_queries_per_request{route}          histogram
+- api_db_duration_seconds{route}             histogram
+
+Each process counts in memory. With METRICS["DIRECTORY"] set, every
+process also writes its counts to its own file there (at most every
+FLUSH_INTERVAL seconds: on the next request, or from a timer when the
+process goes quiet; and at exit), and a scrape adds up all the files,
+so whichever worker answers reports totals for the whole deployment. The
+directory should be emptied when the deployment restarts, as with
+prometheus_client's multiprocess mode; files of exited workers are kept so
+the totals never go backwards.
+
+The endpoint is for admins, unless METRICS["PUBLIC"] opens it to
+scrapers without a token (for deployments where only the monitoring
+network reaches it).
+"""
+
+import atexit
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from rest_framework.renderers import BaseRenderer
+
+DEFAULTS = {
+    "ENABLED": True,
+    # shared by all workers of a deployment; None counts per process only
+    "DIRECTORY": None,
+    "FLUSH_INTERVAL": 1.0,
+    # serve /api/metrics/ without authentication
+    "PUBLIC": False,
+}
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# name -> (help, upper bounds of the buckets)
+HISTOGRAMS = {
+    "api_request_duration_seconds": (
+        "Time to answer a request, by route.",
+        (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+    ),
+    "api_db_queries_per_request": (
+        "Database queries run by a request, by route.",
+        (0, 1, 2, 3, 5, 10, 20, 50, 100),
+    ),
+    "api_db_duration_seconds": (
+        "Time a request spent in the database, by route.",
+        (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+    ),
+}
+REQUESTS_TOTAL = "api_requests_total"
+REQUESTS_HELP = "Requests answered, by route, method and status."
+
+
+def get_setting(name):
+    return getattr(settings, "METRICS", {}).get(name, DEFAULTS[name])
+
+
+def bucket_index(bounds, value):
+    for i, bound in enumerate(bounds):
+        if value <= bound:
+            return i
+    return len(bounds)  # +Inf
+
+
+class MetricsRegistry:
+    def __init__(self, directory=None, flush_interval=1.0):
+        self.directory = Path(directory) if directory else None
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        # also run in a forked worker, which must not report its parent's
+        # counts (or write to its parent's file)
+        self.pid = os.getpid()
+        self.filename = f"{self.pid}-{uuid.uuid4().hex[:8]}.json"
+        self.last_flush = time.monotonic()
+        # flushes counts left over when no request comes to flush them
+        self.timer = None
+        self.requests = {}
+        # name -> route -> [per-bucket counts (last one is +Inf), sum]
+        self.histograms = {name: {} for name in HISTOGRAMS}
+
+    def observe(self, route, method, status, duration, queries, db_duration):
+        with self.lock:
+            if self.pid != os.getpid():
+                self.reset()
+            key = (route, method, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            for name, value in (
+                ("api_request_duration_seconds", duration),
+                ("api_db_queries_per_request", queries),
+                ("api_db_duration_seconds", db_duration),
+            ):
+                bounds = HISTOGRAMS[name][1]
+                histogram = self.histograms[name].setdefault(
+                    route, [[0] * (len(bounds) + 1), 0.0]
+                )
+                histogram[0][bucket_index(bounds, value)] += 1
+                histogram[1] += value
+            due = time.monotonic() - self.last_flush >= self.flush_interval
+            if due:
+                self.last_flush = time.monotonic()
+            elif self.directory is not None and self.timer is None:
+                self.timer = threading.Timer(self.flush_interval, self.flush_pending)
+                self.timer.daemon = True
+                self.timer.start()
+        if due and self.directory is not None:
+            self.flush()
+
+    def flush_pending(self):
+        with self.lock:
+            self.timer = None
+            self.last_flush = time.monotonic()
+        self.flush()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "requests": [[*key, n] for key, n in self.requests.items()],
+                "histograms": {
+                    name: [
+                        [route, list(counts), total]
+                        for route, (counts, total) in routes.items()
+                    ]
+                    for name, routes in self.histograms.items()
+                },
+            }
+
+    def flush(self):
+        """Write this process's counts to its file in the shared directory."""
+        if self.directory is None:
+            return
+        data = self.snapshot()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # write then rename, so a scrape never reads half a file
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.directory / self.filename)
+
+    def collect(self):
+        """Counts of every process, this one's fresh from memory."""
+        snapshots = [self.snapshot()]
+        if self.directory is not None and self.directory.is_dir():
+            for path in self.directory.glob("*.json"):
+                if path.name == self.filename:
+                    continue
+                try:
+                    snapshots.append(json.loads(path.read_text()))
+                except (OSError, ValueError):
+                    # removed or replaced since the glob
+                    continue
+
+        requests = {}
+        histograms = {name: {} for name in HISTOGRAMS}
+        for snapshot in snapshots:
+            for *key, n in snapshot["requests"]:
+                key = tuple(key)
+                requests[key] = requests.get(key, 0) + n
+            for name, routes in snapshot["histograms"].items():
+                if name not in histograms:
+                    continue
+                size = len(HISTOGRAMS[name][1]) + 1
+                for route, counts, total in routes:
+                    if len(counts) != size:
+                        # written with other buckets, before a deploy
+                        continue
+                    merged = histograms[name].setdefault(route, [[0] * size, 0.0])
+                    merged[0] = [a + b for a, b in zip(merged[0], counts)]
+                    merged[1] += total
+        return requests, histograms
+
+    def render(self):
+        requests, histograms = self.collect()
+        lines = [
+            f"# HELP {REQUESTS_TOTAL} {REQUESTS_HELP}",
+            f"# TYPE {REQUESTS_TOTAL} counter",
+        ]
+        for (route, method, status), n in sorted(requests.items()):
+            labels = format_labels(route=route, method=method, status=status)
+            lines.append(f"{REQUESTS_TOTAL}{labels} {n}")
+
+        for name, (help_text, bounds) in HISTOGRAMS.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for route, (counts, total) in sorted(histograms[name].items()):
+                cumulative = 0
+                for bound, count in zip((*bounds, math.inf), counts):
+                    cumulative += count
+                    labels = format_labels(route=route, le=format_value(bound))
+                    lines.append(f"{name}_bucket{labels} {cumulative}")
+                labels = format_labels(route=route)
+                lines.append(f"{name}_sum{labels} {format_value(total)}")
+                lines.append(f"{name}_count{labels} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+class PrometheusRenderer(BaseRenderer):
+    media_type = "text/plain"
+    format = "prometheus"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            # an error, e.g. {"detail": "Authentication credentials were ..."}
+            data = f"{data.get('detail', data)}\n"
+        return data.encode(self.charset)
+
+
+def format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+def format_labels(**labels):
+    escaped = (
+        (name, str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n"))
+        for name, value in labels.items()
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = MetricsRegistry(
+                get_setting("DIRECTORY"), get_setting("FLUSH_INTERVAL")
+            )
+            atexit.register(_registry.flush)
+        return _registry
+
+
+@receiver(setting_changed)
+def reset_registry(setting, **kwargs):
+    global _registry
+    if setting == "METRICS":
+        with _registry_lock:
+            if _registry is not None:
+                atexit.unregister(_registry.flush)
+            _registry = None
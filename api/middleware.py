@@ -0,0 +1,236 @@
+import json
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.handlers.asgi import ASGIRequest
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.decorators import sync_and_async_middleware
+from asgiref.sync import iscoroutinefunction, sync_to_async
+
+from . import metrics, profiling, replicas, timing
+
+
+@sync_and_async_middleware
+def asgi_urlconf_middleware(get_response):
+    """
+    Route ASGI requests through settings.ASGI_ROOT_URLCONF, which serves
+    the hot reads from their async views. WSGI requests are untouched.
+    """
+    urlconf = getattr(settings, "ASGI_ROOT_URLCONF", None)
+
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            if urlconf and isinstance(request, ASGIRequest):
+                request.urlconf = urlconf
+            return await get_response(request)
+
+    else:
+
+        def middleware(request):
+            if urlconf and isinstance(request, ASGIRequest):
+                request.urlconf = urlconf
+            return get_response(request)
+
+    return middleware
+
+
+@sync_and_async_middleware
+def server_timing_middleware(get_response):
+    """
+    Time a sample of requests (SERVER_TIMING["SAMPLE_RATE"]) and report the
+    breakdown from api/timing.py as a Server-Timing header plus one JSON log
+    line tagged with the route name. With a rate of 0 Django drops this
+    middleware and no query wrapper is installed.
+    """
+    rate = timing.get_setting("SAMPLE_RATE")
+    if not rate:
+        raise MiddlewareNotUsed
+    logger = logging.getLogger(timing.get_setting("LOGGER"))
+    connection_created.connect(timing.install_query_recorder)
+    for connection in connections.all(initialized_only=True):
+        timing.install_query_recorder(connection)
+
+    def report(request, response, timings):
+        timings.finish()
+        response.headers["Server-Timing"] = timings.header()
+        match = request.resolver_match
+        line = {
+            "route": match.url_name if match else None,
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            **timings.as_dict(),
+        }
+        logger.info(json.dumps(line))
+
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            if random.random() >= rate:
+                return await get_response(request)
+            timings = timing.RequestTimings()
+            token = timing.current.set(timings)
+            try:
+                response = await get_response(request)
+            finally:
+                timing.current.reset(token)
+            report(request, response, timings)
+            return response
+
+    else:
+
+        def middleware(request):
+            if random.random() >= rate:
+                return get_response(request)
+            timings = timing.RequestTimings()
+            token = timing.current.set(timings)
+            try:
+                response = get_response(request)
+            finally:
+                timing.current.reset(token)
+            report(request, response, timings)
+            return response
+
+    return middleware
+
+
+@sync_and_async_middleware
+def metrics_middleware(get_response):
+    """
+    Count every request, with its latency and database work, per route for
+    the /api/metrics/ endpoint (see api/metrics.py). Disabled with
+    METRICS["ENABLED"] = False.
+    """
+    if not metrics.get_setting("ENABLED"):
+        raise MiddlewareNotUsed
+    registry = metrics.get_registry()
+    # the query count comes from the same wrapper as Server-Timing
+    connection_created.connect(timing.install_query_recorder)
+    for connection in connections.all(initialized_only=True):
+        timing.install_query_recorder(connection)
+
+    def start():
+        # a request sampled for Server-Timing already has its timings
+        timings = timing.current.get()
+        if timings is not None:
+            return timings, None
+        timings = timing.RequestTimings()
+        return timings, timing.current.set(timings)
+
+    def record(request, response, timings, started):
+        match = request.resolver_match
+        registry.observe(
+            route=match.url_name if match and match.url_name else "unmatched",
+            method=request.method,
+            status=response.status_code,
+            duration=time.perf_counter() - started,
+            queries=timings.queries,
+            db_duration=timings.durations["db"],
+        )
+
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            started = time.perf_counter()
+            timings, token = start()
+            try:
+                response = await get_response(request)
+            finally:
+                if token is not None:
+                    timing.current.reset(token)
+            record(request, response, timings, started)
+            return response
+
+    else:
+
+        def middleware(request):
+            started = time.perf_counter()
+            timings, token = start()
+            try:
+                response = get_response(request)
+            finally:
+                if token is not None:
+                    timing.current.reset(token)
+            record(request, response, timings, started)
+            return response
+
+    return middleware
+
+
+@sync_and_async_middleware
+def profiling_middleware(get_response):
+    """
+    Keep stack-sampled profiles of every Nth request and/or of requests
+    slower than a threshold, as switched by `manage.py profiling` (see
+    api/profiling.py). Installed only with PROFILING["ENABLED"]; idle until
+    switched on.
+    """
+    if not profiling.get_setting("ENABLED"):
+        raise MiddlewareNotUsed
+    profiler = profiling.Profiler(
+        profiling.get_directory(), profiling.get_setting("MAX_FILES")
+    )
+
+    if iscoroutinefunction(get_response):
+        # the event loop thread runs other requests too, so a profile of
+        # it would not be this request's
+        return get_response
+
+    def middleware(request):
+        handle = profiler.begin()
+        if handle is None:
+            return get_response(request)
+        response = get_response(request)
+        profiler.end(handle, request, response)
+        return response
+
+    return middleware
+
+
+@sync_and_async_middleware
+def replica_routing_middleware(get_response):
+    """
+    Give each request the state api.replicas.ReplicaRouter routes its reads
+    on, and keep a user who wrote on the primary for the next
+    DATABASE_REPLICAS["STICKY_SECONDS"]. Not installed without replicas.
+    """
+    if not replicas.get_setting("ALIASES"):
+        raise MiddlewareNotUsed
+
+    def stick(request):
+        # DRF's authentication sets request.user; elsewhere it may be the
+        # lazy session user, which queries (hence the thread under ASGI)
+        replicas.stick(getattr(request, "user", None))
+
+    if iscoroutinefunction(get_response):
+
+        async def middleware(request):
+            state = replicas.ReadRouting()
+            token = replicas.routing.set(state)
+            try:
+                response = await get_response(request)
+            finally:
+                replicas.routing.reset(token)
+            if state.wrote:
+                await sync_to_async(stick)(request)
+            return response
+
+    else:
+
+        def middleware(request):
+            state = replicas.ReadRouting()
+            token = replicas.routing.set(state)
+            try:
+                response = get_response(request)
+            finally:
+                replicas.routing.reset(token)
+            if state.wrote:
+                stick(request)
+            return response
+
+    return middleware
@@ -0,0 +1,37 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE api_product_fts USING fts5("
+        "name, description, category_name, "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    schema_editor.execute(
+        "INSERT INTO api_product_fts(api_product_fts, rank) "
+        "VALUES ('rank', 'bm25(10.0, 1.0, 5.0)')"
+    )
+    schema_editor.execute(
+        "INSERT INTO api_product_fts(rowid, name, description, category_name) "
+        "SELECT p.id, p.name, p.description, c.name "
+        "FROM api_product p INNER JOIN api_category c ON c.id = p.category_id"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS api_product_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
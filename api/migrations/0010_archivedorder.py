@@ -0,0 +1,63 @@
+# Generated by Django 4.2.23 on 2026-10-18 01:11
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+COLUMNS = (
+    'id, buyer_id, product_id, quantity, total_price, status, '
+    'delivery_date, created_at, updated_at'
+)
+
+CREATE_HISTORY_VIEW = (
+    f'CREATE VIEW api_order_history AS '
+    f'SELECT {COLUMNS} FROM api_order '
+    f'UNION ALL SELECT {COLUMNS} FROM api_archivedorder'
+)
+
+DROP_HISTORY_VIEW = 'DROP VIEW IF EXISTS api_order_history'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_replicationheartbeat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderHistory',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('quantity', models.PositiveIntegerField()),
+                ('total_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('delivered', 'Delivered'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('delivery_date', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'api_order_history',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('quantity', models.PositiveIntegerField()),
+                ('total_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('delivered', 'Delivered'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('delivery_date', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField()),
+                ('buyer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_orders', to=settings.AUTH_USER_MODEL)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_orders', to='api.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-created_at', '-id'], name='archived_created_idx'), models.Index(fields=['buyer', '-created_at', '-id'], name='archived_buyer_created_idx')],
+            },
+        ),
+        migrations.RunSQL(CREATE_HISTORY_VIEW, DROP_HISTORY_VIEW),
+    ]
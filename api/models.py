@@ -1,3 +1,4 @@
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.utils import timezone
 from django.contrib.auth.base_user import AbstractBaseUser, BaseUserManager
@@ -5,12 +6,16 @@ from django.contrib.auth.models import PermissionsMixin
 
 
 class UserManager(BaseUserManager):
-    def create_user(self, email, password=None, **extra_fields):
+    def create_user(self, email, password=None, password_hash=None, **extra_fields):
         if not email:
             raise ValueError("The Email field must be set")
         email = self.normalize_email(email)
         user = self.model(email=email, **extra_fields)
-        user.set_password(password)
+        if password_hash is not None:
+            # hashed ahead of time, off the request thread (api/hashing.py)
+            user.password = password_hash
+        else:
+            user.set_password(password)
         user.save(using=self._db)
         return user
 
@@ -48,6 +53,20 @@ class User(AbstractBaseUser, PermissionsMixin):
     address = models.TextField(blank=True)
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, null=True, blank=True)
 
+    # farmers' pickup point, buyers' drop-off point, transporters' position
+    latitude = models.FloatField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(-90), MaxValueValidator(90)],
+    )
+    longitude = models.FloatField(
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(-180), MaxValueValidator(180)],
+    )
+    # transporters only: whether they take new delivery jobs
+    is_available = models.BooleanField(default=True)
+
     # permissions
     is_staff = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
@@ -103,6 +122,25 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # keyset pagination walks (-created_at, -id)
+            models.Index(fields=["-created_at", "-id"], name="product_created_idx"),
+            # list filters: covers status/category/price filters and the
+            # facet GROUP BY without touching the table
+            models.Index(
+                fields=["status", "category", "price"],
+                name="product_status_cat_price_idx",
+            ),
+            # category browsing, newest first
+            models.Index(
+                fields=["category", "-created_at", "-id"],
+                name="product_cat_created_idx",
+            ),
+            # ?ordering=price|-price
+            models.Index(fields=["price", "id"], name="product_price_idx"),
+        ]
+
     def __str__(self):
         return f"{self.name} ({self.farmer.email})"
 
@@ -129,6 +167,15 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # keyset pagination walks (-created_at, -id), per buyer or globally
+            models.Index(fields=["-created_at", "-id"], name="order_created_idx"),
+            models.Index(
+                fields=["buyer", "-created_at", "-id"], name="order_buyer_created_idx"
+            ),
+        ]
+
     def save(self, *args, **kwargs):
         # auto-calc total_price if not provided
         if not self.total_price:
@@ -137,3 +184,198 @@ class Order(models.Model):
 
     def __str__(self):
         return f"Order #{self.id} by {self.buyer.email}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    Outcome of a POST sent with an Idempotency-Key header (api/idempotency.py).
+
+    `key` is a sha256 of (user, path, header value), so rows are fixed-size
+    whatever clients send. A row with no status_code is still in progress.
+    """
+
+    key = models.CharField(max_length=64, primary_key=True)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.key
+
+
+class ReplicationHeartbeat(models.Model):
+    """
+    One row the primary database keeps rewriting (api/replicas.py). A
+    replica's copy of it is as old as the replica's replication lag.
+    """
+
+    beat_at = models.DateTimeField()
+
+    def __str__(self):
+        return self.beat_at.isoformat()
+
+
+class ArchivedOrder(models.Model):
+    """
+    A delivered or cancelled order moved out of api_order by
+    `manage.py archive_orders`, under its original id.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    buyer = models.ForeignKey(
+        "User", on_delete=models.CASCADE, related_name="archived_orders"
+    )
+    product = models.ForeignKey(
+        "Product", on_delete=models.CASCADE, related_name="archived_orders"
+    )
+
+    quantity = models.PositiveIntegerField()
+    total_price = models.DecimalField(max_digits=10, decimal_places=2)
+
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    delivery_date = models.DateTimeField(null=True, blank=True)
+
+    # copied from the order, not set on insert
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="archived_created_idx"),
+            models.Index(
+                fields=["buyer", "-created_at", "-id"],
+                name="archived_buyer_created_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Archived order #{self.id}"
+
+
+class OrderHistory(models.Model):
+    """
+    Read-only view over live and archived orders (api_order UNION ALL
+    api_archivedorder), for order listings whose date filter reaches past
+    the archive cutoff. Filters on created_at reach each table's index.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    buyer = models.ForeignKey(
+        "User", on_delete=models.DO_NOTHING, related_name="+", db_constraint=False
+    )
+    product = models.ForeignKey(
+        "Product", on_delete=models.DO_NOTHING, related_name="+", db_constraint=False
+    )
+
+    quantity = models.PositiveIntegerField()
+    total_price = models.DecimalField(max_digits=10, decimal_places=2)
+
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    delivery_date = models.DateTimeField(null=True, blank=True)
+
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = "api_order_history"
+
+    def __str__(self):
+        return f"Order #{self.id}"
+
+
+class DailyProductSales(models.Model):
+    """
+    Confirmed and delivered orders per product and day (of the order's
+    created_at, in TIME_ZONE), kept up to date by api.sales.
+    """
+
+    product = models.ForeignKey(
+        "Product", on_delete=models.CASCADE, related_name="daily_sales"
+    )
+    # the product's farmer, so a dashboard reads one index range
+    farmer = models.ForeignKey(
+        "User", on_delete=models.CASCADE, related_name="daily_sales"
+    )
+    day = models.DateField()
+
+    orders = models.IntegerField(default=0)
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product", "day"], name="daily_sales_product_day_uniq"
+            )
+        ]
+        indexes = [
+            models.Index(fields=["farmer", "day"], name="daily_sales_farmer_day_idx")
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} on {self.day}"
+
+
+class DeliveryJob(models.Model):
+    """
+    Moving a confirmed order from its farmer to its buyer; created when the
+    order is confirmed, matched to a transporter by api.assignment.
+    """
+
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("assigned", "Assigned"),
+        ("delivered", "Delivered"),
+        ("cancelled", "Cancelled"),
+    ]
+
+    # deleting an order deletes its job, but archiving one keeps it under
+    # the order's id, now in ArchivedOrder; hence no database constraint
+    order = models.OneToOneField(
+        "Order",
+        on_delete=models.CASCADE,
+        related_name="delivery_job",
+        db_constraint=False,
+    )
+    transporter = models.ForeignKey(
+        "User",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="delivery_jobs",
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+
+    # copied from the farmer and the buyer when the job is created
+    pickup_latitude = models.FloatField(null=True, blank=True)
+    pickup_longitude = models.FloatField(null=True, blank=True)
+    dropoff_latitude = models.FloatField(null=True, blank=True)
+    dropoff_longitude = models.FloatField(null=True, blank=True)
+
+    assigned_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # the assignment engine reads the pending jobs oldest first. A
+            # partial index, as one leading with status looks selective to
+            # SQLite and would be picked over the primary key for updates
+            # like `id IN (...) AND status = 'pending'`
+            models.Index(
+                fields=["created_at"],
+                condition=models.Q(status="pending"),
+                name="delivery_pending_idx",
+            ),
+            models.Index(
+                fields=["transporter", "status"], name="delivery_transporter_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"Delivery of order #{self.order_id}"
@@ -0,0 +1,150 @@
+"""
+The order state machine.
+
+    pending -> confirmed -> delivered
+       |           |
+       +-----------+--> cancelled
+
+delivered and cancelled are final. transition() moves any number of orders
+to one status inside a single transaction:
+
+- one SELECT per ID_CHUNK ids reads every order's status, then orders that
+  cannot make the move are reported one by one
+- the rest move with one conditional UPDATE per (current status, chunk);
+  the `status = <current>` guard means a concurrent change is never
+  overwritten, and if one slipped in, that group is retried row by row
+- the side effects are set-based too: one stock UPDATE for everything
+  cancelled, one sales rollup upsert (api/sales.py) and one statement for
+  the orders' delivery jobs (api/deliveries.py)
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import deliveries, sales
+from .models import Order
+from .stock import release_stock_many
+
+TRANSITIONS = {
+    "pending": ("confirmed", "cancelled"),
+    "confirmed": ("delivered", "cancelled"),
+    "delivered": (),
+    "cancelled": (),
+}
+
+# ids per IN (...) list, under SQLite's old limit of 999 variables
+ID_CHUNK = 900
+
+
+def can_transition(current, target):
+    return target in TRANSITIONS[current]
+
+
+def transition_error(current, target):
+    if not TRANSITIONS[current]:
+        return f"Order is {current}; {current} orders cannot change status."
+    return f"Cannot go from {current} to {target}."
+
+
+@dataclass
+class TransitionResult:
+    updated: list = field(default_factory=list)
+    # already in the target status
+    unchanged: list = field(default_factory=list)
+    # {id: reason}
+    failed: dict = field(default_factory=dict)
+
+
+def chunks(items, size=ID_CHUNK):
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+class Raced(Exception):
+    pass
+
+
+def claim(rows, current, target, now):
+    """UPDATE the orders in `rows` that are still `current`; returns those rows."""
+    pks = [row[0] for row in rows]
+    try:
+        with transaction.atomic():
+            updated = sum(
+                Order.objects.filter(pk__in=chunk, status=current).update(
+                    status=target, updated_at=now
+                )
+                for chunk in chunks(pks)
+            )
+            if updated != len(pks):
+                raise Raced
+        return rows
+    except Raced:
+        # some order changed after it was read: claim them one at a time
+        return [
+            row
+            for row in rows
+            if Order.objects.filter(pk=row[0], status=current).update(
+                status=target, updated_at=now
+            )
+        ]
+
+
+def transition(ids, target):
+    """Move the orders in `ids` to `target`; returns a TransitionResult."""
+    if target not in TRANSITIONS:
+        raise ValueError(f"Unknown order status: {target!r}")
+    ids = list(dict.fromkeys(ids))
+    result = TransitionResult()
+    now = timezone.now()
+
+    with transaction.atomic():
+        rows = {}
+        for chunk in chunks(ids):
+            for row in Order.objects.filter(pk__in=chunk).values_list(
+                "pk", "status", *sales.ROW_FIELDS
+            ):
+                rows[row[0]] = row
+
+        groups = defaultdict(list)
+        for pk in ids:
+            row = rows.get(pk)
+            if row is None:
+                result.failed[pk] = "Order not found."
+            elif row[1] == target:
+                result.unchanged.append(pk)
+            elif not can_transition(row[1], target):
+                result.failed[pk] = transition_error(row[1], target)
+            else:
+                groups[row[1]].append(row)
+
+        released = defaultdict(int)
+        for current, group in groups.items():
+            moved = claim(group, current, target, now)
+            claimed = {row[0] for row in moved}
+            for row in group:
+                if row[0] not in claimed:
+                    result.failed[row[0]] = "Order changed meanwhile; try again."
+            result.updated.extend(claimed)
+
+            if target == "cancelled":
+                for row in moved:
+                    released[row[2]] += row[5]
+            if sales.counts(current) != sales.counts(target):
+                sales.record(
+                    [row[2:] for row in moved],
+                    sign=1 if sales.counts(target) else -1,
+                )
+        release_stock_many(released)
+
+        if target == "confirmed":
+            deliveries.create_jobs(result.updated)
+        elif target in ("delivered", "cancelled"):
+            deliveries.close_jobs(result.updated, target)
+
+    # report in request order
+    position = {pk: index for index, pk in enumerate(ids)}
+    result.updated.sort(key=position.__getitem__)
+    return result
@@ -0,0 +1,223 @@
+from base64 import b64decode, b64encode
+from urllib import parse
+
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class PageNumberPagination(pagination.PageNumberPagination):
+    """DRF's page-number pagination, plus apaginate_queryset() for async views."""
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        # counted up front, so the paginator never queries by itself
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)
+            )
+            raise NotFound(msg)
+        self.page.object_list = [obj async for obj in self.page.object_list]
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+
+        return list(self.page)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination ordered on (-created_at, -id).
+
+    - each page is a single indexed range scan: no COUNT(*) and no OFFSET,
+      so page 10,000 costs the same as page 1
+    - next/previous links carry an opaque cursor holding the boundary row's
+      (created_at, id); `id` breaks ties between rows created together
+
+    Querysets in any other order (a search's relevance, ?ordering=price)
+    are rejected with a 400 rather than silently re-sorted.
+    """
+
+    cursor_query_param = "cursor"
+    page_size = api_settings.PAGE_SIZE
+    invalid_cursor_message = "Invalid cursor"
+    # the orders the keyset reproduces (unordered querysets get it too)
+    keyset_orderings = {(), ("-created_at",), ("-created_at", "-id")}
+    unsupported_order_message = (
+        "Cursor pages are newest first; use page numbers to search or to "
+        "order by anything else."
+    )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.finish(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        return self.finish([row async for row in self.page_queryset(queryset, request)])
+
+    def page_queryset(self, queryset, request):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.reverse, self.position = self.decode_cursor(request)
+        query = queryset.query
+        if query.extra_order_by or tuple(query.order_by) not in self.keyset_orderings:
+            raise ValidationError({"pagination": self.unsupported_order_message})
+
+        if self.position is not None:
+            # the bare range on created_at lets the planner seek into the
+            # index; the OR only settles ties at the boundary timestamp
+            created_at, pk = self.position
+            if self.reverse:
+                queryset = queryset.filter(
+                    Q(created_at__gte=created_at),
+                    Q(created_at__gt=created_at) | Q(id__gt=pk),
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(created_at__lte=created_at),
+                    Q(created_at__lt=created_at) | Q(id__lt=pk),
+                )
+
+        if self.reverse:
+            queryset = queryset.order_by("created_at", "id")
+        else:
+            queryset = queryset.order_by("-created_at", "-id")
+
+        # fetch one extra row to find out whether there is another page
+        return queryset[: self.page_size + 1]
+
+    def finish(self, results):
+        has_more = len(results) > self.page_size
+        self.page = results[: self.page_size]
+
+        if self.reverse:
+            self.page.reverse()
+            self.has_next = self.position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.position is not None
+
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            # reversed past the end of the list: restart from the top
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return False, None
+
+        try:
+            querystring = b64decode(encoded.encode("ascii")).decode("ascii")
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            created_at, pk = tokens["p"][0].rsplit("|", 1)
+            created_at = parse_datetime(created_at)
+            pk = int(pk)
+            reverse = bool(int(tokens.get("r", ["0"])[0]))
+        except (TypeError, ValueError, KeyError, IndexError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return reverse, (created_at, pk)
+
+    @staticmethod
+    def cursor_for(instance, reverse=False):
+        """Opaque cursor token pointing just past `instance` (or a .values() row)."""
+        if isinstance(instance, dict):
+            created_at, pk = instance["created_at"], instance["id"]
+        else:
+            created_at, pk = instance.created_at, instance.pk
+        tokens = {"p": f"{created_at.isoformat()}|{pk}"}
+        if reverse:
+            tokens["r"] = "1"
+        querystring = parse.urlencode(tokens)
+        return b64encode(querystring.encode("ascii")).decode("ascii")
+
+    def encode_cursor(self, instance, reverse):
+        encoded = self.cursor_for(instance, reverse)
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class OptInKeysetPagination(PageNumberPagination):
+    """
+    Page-number pagination by default; switches to KeysetPagination when the
+    client asks for it with `?pagination=cursor` (first page) or sends a
+    `?cursor=` token (every later page).
+    """
+
+    mode_query_param = "pagination"
+
+    def __init__(self):
+        self.keyset = None
+
+    def wants_keyset(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == "cursor"
+            or KeysetPagination.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.wants_keyset(request):
+            self.keyset = KeysetPagination()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        if self.wants_keyset(request):
+            self.keyset = KeysetPagination()
+            return await self.keyset.apaginate_queryset(queryset, request, view)
+        return await super().apaginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -43,7 +43,7 @@ class IsFarmerOrAdminOwner(BasePermission):
         if request.method in SAFE_METHODS:
             return True
         return request.user.is_authenticated and (
-            obj.farmer == request.user or request.user.is_staff
+            obj.farmer_id == request.user.pk or request.user.is_staff
         )
 
 
@@ -62,4 +62,28 @@ class IsBuyerOrAdmin(BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.user.is_staff:
             return True
-        return obj.buyer == request.user
+        return obj.buyer_id == request.user.pk
+
+
+class IsFarmerOrAdmin(BasePermission):
+    """
+    - Farmers: only their own data (the view scopes it)
+    - Admins: anyone's
+    """
+
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and (
+            request.user.role == "farmer" or request.user.is_staff
+        )
+
+
+class IsTransporterOrAdmin(BasePermission):
+    """
+    - Transporters: only their own delivery jobs (the view scopes them)
+    - Admins: all of them
+    """
+
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and (
+            request.user.role == "transporter" or request.user.is_staff
+        )
@@ -0,0 +1,263 @@
+"""
+Stack-sampling profiles of live requests.
+
+With PROFILING["ENABLED"], api.middleware.profiling_middleware is installed
+but idle. It starts profiling when a control file in PROFILING["DIRECTORY"]
+switches it on, which `python manage.py profiling on ...` writes and every
+worker re-reads within a second. No restart is needed. It can keep:
+
+- every Nth request (--every N), and/or
+- every request slower than a threshold (--slower-than-ms MS).
+
+A sampler thread reads the stacks of the threads that are serving a
+profiled request every INTERVAL_MS. This is cheap enough to sample every
+request when a slowness threshold is set; cProfile would roughly double the
+cost of every one. Each kept profile is a file of collapsed stacks
+("outer;inner;leaf count", flamegraph.pl's input format). The oldest files
+are deleted beyond MAX_FILES. `python manage.py merge_profiles` ranks the
+hot functions across them.
+
+Only requests served through WSGI are profiled: under ASGI a request
+hops between the event loop and worker threads that also serve other
+requests, so no single thread's stack is its profile.
+"""
+
+import itertools
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+
+DEFAULTS = {
+    "ENABLED": False,
+    "DIRECTORY": "profiles",
+    "MAX_FILES": 200,
+    "INTERVAL_MS": 5,
+    # used until `manage.py profiling` writes a control file
+    "EVERY": 0,
+    "SLOWER_THAN_MS": None,
+}
+
+CONTROL_FILE = "control.json"
+# seconds a worker trusts its last read of the control file
+CONTROL_TTL = 1.0
+
+
+def get_setting(name):
+    return getattr(settings, "PROFILING", {}).get(name, DEFAULTS[name])
+
+
+def get_directory():
+    return Path(get_setting("DIRECTORY"))
+
+
+def write_control(directory, every=0, slower_than_ms=None, interval_ms=None):
+    directory.mkdir(parents=True, exist_ok=True)
+    control = {
+        "every": every,
+        "slower_than_ms": slower_than_ms,
+        "interval_ms": interval_ms or get_setting("INTERVAL_MS"),
+    }
+    tmp = directory / f"{CONTROL_FILE}.tmp"
+    tmp.write_text(json.dumps(control))
+    os.replace(tmp, directory / CONTROL_FILE)
+    return control
+
+
+def read_control(directory):
+    try:
+        return json.loads((directory / CONTROL_FILE).read_text())
+    except FileNotFoundError:
+        return {
+            "every": get_setting("EVERY"),
+            "slower_than_ms": get_setting("SLOWER_THAN_MS"),
+            "interval_ms": get_setting("INTERVAL_MS"),
+        }
+
+
+def frame_label(frame):
+    code = frame.f_code
+    # co_qualname is new in Python 3.11
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{frame.f_globals.get('__name__', '?')}.{name}"
+
+
+class Sampler:
+    """One thread sampling the stacks of the threads registered with it."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.active = {}
+        self.wakeup = threading.Event()
+        self.thread = None
+        self.closed = False
+
+    def start(self, thread_id):
+        with self.lock:
+            self.active[thread_id] = Counter()
+            if self.thread is None:
+                self.thread = threading.Thread(
+                    target=self.run, name="request-profiler", daemon=True
+                )
+                self.thread.start()
+        self.wakeup.set()
+
+    def stop(self, thread_id):
+        with self.lock:
+            return self.active.pop(thread_id)
+
+    def close(self):
+        """Let the thread exit once the requests it is sampling end."""
+        self.closed = True
+        self.wakeup.set()
+
+    def run(self):
+        own_id = threading.get_ident()
+        while True:
+            if not self.active:
+                with self.lock:
+                    if self.closed and not self.active:
+                        self.thread = None
+                        return
+                self.wakeup.wait()
+                self.wakeup.clear()
+                continue
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self.lock:
+                targets = [
+                    (thread_id, stacks, frames.get(thread_id))
+                    for thread_id, stacks in self.active.items()
+                    if thread_id != own_id
+                ]
+            del frames
+            # walking the stacks is the slow part; requests starting and
+            # ending meanwhile only wait for the counts below
+            sampled = []
+            for thread_id, stacks, frame in targets:
+                stack = []
+                while frame is not None:
+                    stack.append(frame_label(frame))
+                    frame = frame.f_back
+                if stack:
+                    sampled.append((thread_id, stacks, ";".join(reversed(stack))))
+            del targets
+            with self.lock:
+                for thread_id, stacks, stack in sampled:
+                    # not if stop() already handed the counts over
+                    if self.active.get(thread_id) is stacks:
+                        stacks[stack] += 1
+
+
+class Profiler:
+    """The middleware's state: the live control settings and the sampler."""
+
+    def __init__(self, directory, max_files):
+        self.directory = directory
+        self.max_files = max_files
+        self.counter = itertools.count(1)
+        self.saved = itertools.count(1)
+        self.checked_at = None
+        self.control = None
+        self.sampler = None
+
+    def refresh(self):
+        now = time.monotonic()
+        if self.checked_at is None or now - self.checked_at >= CONTROL_TTL:
+            self.checked_at = now
+            self.control = read_control(self.directory)
+            interval = self.control["interval_ms"] / 1000
+            if self.sampler is None or self.sampler.interval != interval:
+                if self.sampler is not None:
+                    self.sampler.close()
+                self.sampler = Sampler(interval)
+        return self.control
+
+    def begin(self):
+        """Start sampling this request if it may be kept; returns a handle."""
+        control = self.refresh()
+        every, slower_than = control["every"], control["slower_than_ms"]
+        nth = bool(every) and next(self.counter) % every == 0
+        if not nth and slower_than is None:
+            return None
+        sampler, thread_id = self.sampler, threading.get_ident()
+        sampler.start(thread_id)
+        return sampler, thread_id, nth, slower_than, time.perf_counter()
+
+    def end(self, handle, request, response):
+        sampler, thread_id, nth, slower_than, started = handle
+        duration_ms = (time.perf_counter() - started) * 1000
+        stacks = sampler.stop(thread_id)
+        if not nth and duration_ms < slower_than:
+            return None
+        match = request.resolver_match
+        route = match.url_name if match and match.url_name else "unmatched"
+        return self.save(
+            stacks,
+            route=route,
+            method=request.method,
+            path=request.path,
+            status=response.status_code,
+            duration_ms=round(duration_ms, 1),
+            trigger="every" if nth else "slow",
+        )
+
+    def save(self, stacks, **meta):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        name = "{stamp}-{pid}-{seq:06d}-{route}-{ms}ms.txt".format(
+            stamp=time.strftime("%Y%m%dT%H%M%S"),
+            pid=os.getpid(),
+            seq=next(self.saved),
+            route=re.sub(r"[^\w-]", "_", meta["route"]),
+            ms=int(meta["duration_ms"]),
+        )
+        path = self.directory / name
+        lines = [f"# {key}: {value}" for key, value in meta.items()]
+        lines += [f"{stack} {count}" for stack, count in stacks.most_common()]
+        path.write_text("\n".join(lines) + "\n")
+        self.rotate()
+        return path
+
+    def rotate(self):
+        # names start with a timestamp, so they sort oldest first
+        profiles = sorted(self.directory.glob("*.txt"))
+        for path in profiles[: max(len(profiles) - self.max_files, 0)]:
+            path.unlink(missing_ok=True)
+
+
+def read_profile(path):
+    """(metadata, Counter of collapsed stack -> samples) of a profile file."""
+    meta, stacks = {}, Counter()
+    for line in Path(path).read_text().splitlines():
+        if line.startswith("# "):
+            key, _, value = line[2:].partition(": ")
+            meta[key] = value
+        elif line:
+            stack, _, count = line.rpartition(" ")
+            stacks[stack] += int(count)
+    return meta, stacks
+
+
+def hot_functions(stacks):
+    """
+    Rank the functions in collapsed stacks: (function, self samples,
+    total samples), most self samples first. Self samples are those with
+    the function on top of the stack; total counts it anywhere in the stack
+    (once per sample, even if it recursed).
+    """
+    own, total = Counter(), Counter()
+    for stack, count in stacks.items():
+        frames = stack.split(";")
+        own[frames[-1]] += count
+        for function in set(frames):
+            total[function] += count
+    ranked = [(function, own[function], total[function]) for function in total]
+    ranked.sort(key=lambda row: (-row[1], -row[2], row[0]))
+    return ranked
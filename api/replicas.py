@@ -0,0 +1,241 @@
+"""
+Read replicas with read-your-writes stickiness.
+
+ReplicaRouter (settings.DATABASE_ROUTERS) sends reads to one of
+DATABASE_REPLICAS["ALIASES"] only when the request allows it:
+
+- api.middleware.replica_routing_middleware gives every request a
+  ReadRouting state; anything outside a request (commands, the shell, the
+  admin) has none and reads the primary
+- ReplicaReadMixin opens the state for replica reads once DRF has
+  authenticated a GET/HEAD/OPTIONS request, so the token lookup itself
+  always reads the primary (a token created a moment ago may not have
+  reached the replica yet)
+- a user who wrote within STICKY_SECONDS keeps reading the primary, and so
+  does the rest of a request once it has written anything
+
+Writes always go to the primary, also for instances read from a replica.
+
+The primary's ReplicationHeartbeat row is rewritten every
+HEARTBEAT_INTERVAL seconds by `manage.py replication_heartbeat`, never by
+a request. ReplicaMonitor decides which replicas are usable: every
+CHECK_INTERVAL seconds one request per process reads each replica's copy
+of the row and compares it to the clock. A replica that fails to answer,
+has no heartbeat yet, or whose copy is more than MAX_LAG_SECONDS old
+(beyond the HEARTBEAT_INTERVAL the copy may legitimately be behind) gets
+no reads until a later check finds it healthy again. Lag is accurate to
+within one HEARTBEAT_INTERVAL; keep STICKY_SECONDS above MAX_LAG_SECONDS.
+If the heartbeat command stops, every replica soon looks lagging and all
+reads go to the primary.
+"""
+
+import contextvars
+import random
+import threading
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db import DEFAULT_DB_ALIAS, DatabaseError
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework.permissions import SAFE_METHODS
+
+DEFAULTS = {
+    # database aliases holding copies of the primary ("default")
+    "ALIASES": [],
+    "STICKY_SECONDS": 10,
+    "MAX_LAG_SECONDS": 5,
+    "CHECK_INTERVAL": 1,
+    # how often `manage.py replication_heartbeat` rewrites the primary's row
+    "HEARTBEAT_INTERVAL": 1,
+    # where the recent writers are remembered; shared by all workers if
+    # the cache is
+    "CACHE_ALIAS": "default",
+}
+
+routing = contextvars.ContextVar("replica_routing", default=None)
+
+
+def get_setting(name):
+    return getattr(settings, "DATABASE_REPLICAS", {}).get(name, DEFAULTS[name])
+
+
+class ReadRouting:
+    """Per-request routing state, see replica_routing_middleware."""
+
+    def __init__(self):
+        self.allowed = False
+        self.wrote = False
+        # the replica picked for this request; all its reads go there
+        self.alias = None
+
+
+def sticky_key(user_id):
+    return f"api:replicas:wrote:{user_id}"
+
+
+def stick(user):
+    """Keep `user` on the primary for the next STICKY_SECONDS."""
+    if user is not None and user.is_authenticated:
+        caches[get_setting("CACHE_ALIAS")].set(
+            sticky_key(user.pk), True, get_setting("STICKY_SECONDS")
+        )
+
+
+def is_sticky(user):
+    return user.is_authenticated and bool(
+        caches[get_setting("CACHE_ALIAS")].get(sticky_key(user.pk))
+    )
+
+
+def allow_replica_reads(request):
+    state = routing.get()
+    if state is None or state.wrote or request.method not in SAFE_METHODS:
+        return
+    if not is_sticky(request.user):
+        state.allowed = True
+
+
+class ReplicaReadMixin:
+    """Let a safe-method request read from a replica once it is authenticated."""
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        allow_replica_reads(request)
+
+
+@dataclass
+class ReplicaStatus:
+    healthy: bool = False
+    lag: float = None
+    error: str = None
+
+
+def read_heartbeat(alias):
+    from .models import ReplicationHeartbeat
+
+    return (
+        ReplicationHeartbeat.objects.using(alias)
+        .filter(pk=1)
+        .values_list("beat_at", flat=True)
+        .first()
+    )
+
+
+def write_heartbeat():
+    from .models import ReplicationHeartbeat
+
+    # using() keeps the router, and the request's stickiness, out of it
+    ReplicationHeartbeat.objects.using(DEFAULT_DB_ALIAS).update_or_create(
+        pk=1, defaults={"beat_at": timezone.now()}
+    )
+
+
+class ReplicaMonitor:
+    def __init__(self, aliases, check_interval, max_lag, heartbeat_interval):
+        self.aliases = list(aliases)
+        self.check_interval = check_interval
+        self.max_lag = max_lag
+        self.heartbeat_interval = heartbeat_interval
+        self.status = {alias: ReplicaStatus() for alias in self.aliases}
+        self.checked_at = None
+        self.lock = threading.Lock()
+
+    def usable(self):
+        self.refresh()
+        return [
+            alias
+            for alias, status in self.status.items()
+            if status.healthy and status.lag is not None and status.lag <= self.max_lag
+        ]
+
+    def pick(self):
+        """A usable replica, or None for the primary."""
+        usable = self.usable()
+        return random.choice(usable) if usable else None
+
+    def refresh(self):
+        now = time.monotonic()
+        if self.checked_at is not None and now - self.checked_at < self.check_interval:
+            return
+        # one thread checks; the others route on the last results meanwhile
+        if not self.lock.acquire(blocking=False):
+            return
+        try:
+            self.checked_at = now
+            self.check()
+        finally:
+            self.lock.release()
+
+    def check(self):
+        # read-only: the heartbeat itself is written by a separate process
+        status = {}
+        for alias in self.aliases:
+            try:
+                beat = read_heartbeat(alias)
+            except DatabaseError as exc:
+                status[alias] = ReplicaStatus(healthy=False, error=str(exc))
+                continue
+            if beat is None:
+                # no heartbeat has reached the replica yet
+                lag = None
+            else:
+                age = (timezone.now() - beat).total_seconds()
+                lag = max(age - self.heartbeat_interval, 0.0)
+            status[alias] = ReplicaStatus(healthy=True, lag=lag)
+        self.status = status
+
+
+_monitor = None
+_monitor_lock = threading.Lock()
+
+
+def get_monitor():
+    global _monitor
+    with _monitor_lock:
+        if _monitor is None:
+            _monitor = ReplicaMonitor(
+                get_setting("ALIASES"),
+                get_setting("CHECK_INTERVAL"),
+                get_setting("MAX_LAG_SECONDS"),
+                get_setting("HEARTBEAT_INTERVAL"),
+            )
+        return _monitor
+
+
+@receiver(setting_changed)
+def reset_monitor(setting, **kwargs):
+    global _monitor
+    if setting == "DATABASE_REPLICAS":
+        with _monitor_lock:
+            _monitor = None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = routing.get()
+        if state is None or not state.allowed:
+            return None
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            # related rows come from where their instance came from
+            return instance._state.db
+        if state.alias is None:
+            state.alias = get_monitor().pick() or DEFAULT_DB_ALIAS
+        return state.alias
+
+    def db_for_write(self, model, **hints):
+        state = routing.get()
+        if state is not None:
+            state.wrote = True
+            state.allowed = False
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_setting("ALIASES")}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
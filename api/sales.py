@@ -0,0 +1,223 @@
+"""
+Daily sales rollups: orders, units and revenue per product and day.
+
+An order counts once it is confirmed or delivered. Whatever moves orders
+in or out of those statuses calls record() in the same transaction, which
+folds them into per-(product, day) deltas and applies them with one
+INSERT ... ON CONFLICT DO UPDATE per chunk, so a rollup row is never read
+and rewritten and concurrent updates cannot lose each other's counts.
+
+rebuild() recomputes whole days from the orders themselves, archived ones
+included (`manage.py backfill_sales`).
+"""
+
+from datetime import datetime, time
+from decimal import Decimal
+from itertools import islice
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailyProductSales, OrderHistory
+
+COUNTED_STATUSES = ("confirmed", "delivered")
+
+ROW_FIELDS = (
+    "product_id",
+    "product__farmer_id",
+    "created_at",
+    "quantity",
+    "total_price",
+)
+
+UPSERT_CHUNK = 500
+
+
+def counts(status):
+    return status in COUNTED_STATUSES
+
+
+def order_row(order):
+    return (
+        order.product_id,
+        order.product.farmer_id,
+        order.created_at,
+        order.quantity,
+        order.total_price,
+    )
+
+
+def sales_day(moment):
+    return timezone.localdate(moment)
+
+
+def record(rows, sign=1, using=DEFAULT_DB_ALIAS):
+    """
+    Add the orders in `rows` (ROW_FIELDS tuples) to the rollups, or take
+    them back out with sign=-1.
+    """
+    deltas = {}
+    for product_id, farmer_id, created_at, quantity, total_price in rows:
+        key = (product_id, sales_day(created_at))
+        delta = deltas.setdefault(key, [farmer_id, 0, 0, Decimal(0)])
+        delta[1] += sign
+        delta[2] += sign * quantity
+        delta[3] += sign * total_price
+    upsert(
+        [(product_id, day, *delta) for (product_id, day), delta in deltas.items()],
+        using,
+    )
+
+
+def delete_orders(queryset):
+    """
+    Delete the orders in `queryset`, taking the counted ones back out of
+    the rollups first (archiving keeps them counted, so it does not come
+    through here).
+    """
+    using = queryset.db
+    with transaction.atomic(using=using):
+        record(
+            queryset.filter(status__in=COUNTED_STATUSES).values_list(*ROW_FIELDS),
+            sign=-1,
+            using=using,
+        )
+        return queryset.delete()
+
+
+def upsert(deltas, using=DEFAULT_DB_ALIAS):
+    """Add (product_id, day, farmer_id, orders, units, revenue) deltas."""
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    opts = DailyProductSales._meta
+    fields = [
+        opts.get_field(name)
+        for name in ("product", "day", "farmer", "orders", "units", "revenue")
+    ]
+    table = quote(opts.db_table)
+    columns = ", ".join(quote(field.column) for field in fields)
+    placeholder = "(" + ", ".join(["%s"] * len(fields)) + ")"
+    increments = ", ".join(
+        f"{quote(name)} = {table}.{quote(name)} + excluded.{quote(name)}"
+        for name in ("orders", "units", "revenue")
+    )
+    iterator = iter(deltas)
+    with connection.cursor() as cursor:
+        while chunk := list(islice(iterator, UPSERT_CHUNK)):
+            params = [
+                field.get_db_prep_save(value, connection)
+                for row in chunk
+                for field, value in zip(fields, row)
+            ]
+            cursor.execute(
+                f"INSERT INTO {table} ({columns}) "
+                f"VALUES {', '.join([placeholder] * len(chunk))} "
+                f"ON CONFLICT ({quote('product_id')}, {quote('day')}) "
+                f"DO UPDATE SET {increments}",
+                params,
+            )
+
+
+def day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def rebuild(start, end, using=DEFAULT_DB_ALIAS, batch_size=1000):
+    """
+    Recompute the rollups of the days in [start, end) from the orders;
+    returns the number of rollup rows written.
+    """
+    grouped = (
+        OrderHistory.objects.using(using)
+        .filter(
+            status__in=COUNTED_STATUSES,
+            created_at__gte=day_start(start),
+            created_at__lt=day_start(end),
+        )
+        .annotate(day=TruncDate("created_at"))
+        .values("product_id", "product__farmer_id", "day")
+        .annotate(orders=Count("id"), units=Sum("quantity"), revenue=Sum("total_price"))
+        .order_by()
+    )
+    written = 0
+    with transaction.atomic(using=using):
+        DailyProductSales.objects.using(using).filter(
+            day__gte=start, day__lt=end
+        ).delete()
+        iterator = grouped.iterator(chunk_size=batch_size)
+        while chunk := list(islice(iterator, batch_size)):
+            DailyProductSales.objects.using(using).bulk_create(
+                DailyProductSales(
+                    product_id=row["product_id"],
+                    farmer_id=row["product__farmer_id"],
+                    day=row["day"],
+                    orders=row["orders"],
+                    units=row["units"],
+                    revenue=row["revenue"],
+                )
+                for row in chunk
+            )
+            written += len(chunk)
+    return written
+
+
+def money(value):
+    return format(Decimal(value).quantize(Decimal("0.01")), "f")
+
+
+def dashboard(farmer_id, start, end, product_id=None):
+    """
+    Per-product daily sales of a farmer for the days in [start, end], with
+    per-product and overall totals: one indexed range read of the rollups.
+    """
+    rows = (
+        DailyProductSales.objects.filter(
+            farmer_id=farmer_id, day__gte=start, day__lte=end, orders__gt=0
+        )
+        .values("product_id", "product__name", "day", "orders", "units", "revenue")
+        .order_by("product_id", "day")
+    )
+    if product_id is not None:
+        rows = rows.filter(product_id=product_id)
+
+    totals = {"orders": 0, "units": 0, "revenue": Decimal(0)}
+    products = {}
+    for row in rows:
+        product = products.setdefault(
+            row["product_id"],
+            {
+                "product": row["product_id"],
+                "product_name": row["product__name"],
+                "orders": 0,
+                "units": 0,
+                "revenue": Decimal(0),
+                "days": [],
+            },
+        )
+        for summary in (product, totals):
+            summary["orders"] += row["orders"]
+            summary["units"] += row["units"]
+            summary["revenue"] += row["revenue"]
+        product["days"].append(
+            {
+                "day": row["day"].isoformat(),
+                "orders": row["orders"],
+                "units": row["units"],
+                "revenue": money(row["revenue"]),
+            }
+        )
+
+    for product in products.values():
+        product["revenue"] = money(product["revenue"])
+    return {
+        "farmer": farmer_id,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "totals": {**totals, "revenue": money(totals["revenue"])},
+        # best sellers first
+        "products": sorted(
+            products.values(), key=lambda p: (-Decimal(p["revenue"]), p["product"])
+        ),
+    }
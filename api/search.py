@@ -0,0 +1,155 @@
+"""
+Full-text product search.
+
+On SQLite, products are indexed in the FTS5 table `api_product_fts`
+(rowid = product id) over name, description and category name. The index is
+kept in sync by the signal handlers in api/signals.py; writes that bypass
+signals (bulk_create, queryset.update, raw SQL) need a
+`python manage.py rebuild_search_index` afterwards.
+
+Ranking is bm25 over a bounded candidate set: when a query matches more
+than MAX_CANDIDATES products, only the newest MAX_CANDIDATES matches are
+ranked and the older ones follow them, newest first. Scoring every match
+of a common word costs ~5us per row, which is far too slow at 1M products;
+picking the newest candidates is a cheap walk down the rowid-ordered
+posting list. The bound only orders results: every match stays in them,
+whatever other filters the queryset has.
+
+Other database backends fall back to a plain icontains filter.
+"""
+
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Q
+
+FTS_TABLE = "api_product_fts"
+
+MAX_CANDIDATES = 200
+
+# column weights for bm25: name, description, category_name
+RANK_FUNCTION = "bm25(10.0, 1.0, 5.0)"
+
+CREATE_SQL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "name, description, category_name, "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+)
+CONFIGURE_SQL = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('rank', %s)"
+DROP_SQL = f"DROP TABLE IF EXISTS {FTS_TABLE}"
+
+_INDEX_SQL = (
+    f"INSERT INTO {FTS_TABLE}(rowid, name, description, category_name) "
+    "SELECT p.id, p.name, p.description, c.name "
+    "FROM api_product p INNER JOIN api_category c ON c.id = p.category_id"
+)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def is_enabled(using=DEFAULT_DB_ALIAS):
+    return connections[using].vendor == "sqlite"
+
+
+def build_match_query(text):
+    """
+    Turn free user input into a safe FTS5 MATCH expression: every word must
+    match, and a trailing `*` makes the last word a prefix (search-as-you-type).
+    Returns None when the input has no searchable words.
+    """
+    tokens = _TOKEN_RE.findall(text.lower())
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    if text.rstrip().endswith("*"):
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search_products(queryset, text):
+    """Filter a Product queryset to matches for `text`, best matches first."""
+    if not is_enabled(queryset.db):
+        return queryset.filter(
+            Q(name__icontains=text)
+            | Q(description__icontains=text)
+            | Q(category__name__icontains=text)
+        )
+
+    match = build_match_query(text)
+    if match is None:
+        return queryset.none()
+
+    select = {"search_rank": f"{FTS_TABLE}.rank"}
+    select_params = []
+    order_by = ["search_rank", "-id"]
+    floor = _candidate_floor(match, queryset.db)
+    if floor is not None:
+        # CASE only scores the candidates; the rest sort after them
+        select = {
+            "search_unranked": f"{FTS_TABLE}.rowid < %s",
+            "search_rank": f"CASE WHEN {FTS_TABLE}.rowid >= %s "
+            f"THEN {FTS_TABLE}.rank END",
+        }
+        select_params = [floor, floor]
+        order_by = ["search_unranked", *order_by]
+    return queryset.extra(
+        select=select,
+        select_params=select_params,
+        tables=[FTS_TABLE],
+        where=[f"{FTS_TABLE}.rowid = api_product.id", f"{FTS_TABLE} MATCH %s"],
+        params=[match],
+        order_by=order_by,
+    )
+
+
+def _candidate_floor(match, using):
+    """Lowest rowid among the newest MAX_CANDIDATES matches, or None if fewer."""
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+            "ORDER BY rowid DESC LIMIT 1 OFFSET %s",
+            [match, MAX_CANDIDATES - 1],
+        )
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def create_index(using=DEFAULT_DB_ALIAS):
+    with connections[using].cursor() as cursor:
+        cursor.execute(CREATE_SQL)
+        cursor.execute(CONFIGURE_SQL, [RANK_FUNCTION])
+
+
+def rebuild_index(using=DEFAULT_DB_ALIAS):
+    """Drop and repopulate the whole index from the product table."""
+    with connections[using].cursor() as cursor:
+        cursor.execute(DROP_SQL)
+    create_index(using)
+    with connections[using].cursor() as cursor:
+        cursor.execute(_INDEX_SQL)
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+
+
+def index_products(product_ids=None, category_id=None, using=DEFAULT_DB_ALIAS):
+    """(Re)index the given products, or every product in a category."""
+    if product_ids is not None:
+        product_ids = list(product_ids)
+        if not product_ids:
+            return
+        placeholders = ", ".join(["%s"] * len(product_ids))
+        scope, params = f"id IN ({placeholders})", product_ids
+    else:
+        scope, params = "category_id = %s", [category_id]
+
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid IN "
+            f"(SELECT id FROM api_product WHERE {scope})",
+            params,
+        )
+        cursor.execute(f"{_INDEX_SQL} WHERE p.{scope}", params)
+
+
+def unindex_product(product_id, using=DEFAULT_DB_ALIAS):
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [product_id])
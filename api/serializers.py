@@ -1,5 +1,8 @@
+from django.db import transaction
 from rest_framework import serializers
-from .models import User, Category, Product, Order
+from .models import User, Category, Product, Order, DeliveryJob
+from . import order_states
+from .stock import reserve_stock, reserve_stock_many
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -14,6 +17,9 @@ class UserSerializer(serializers.ModelSerializer):
             "phone_number",
             "address",
             "role",
+            "latitude",
+            "longitude",
+            "is_available",
             "created_at",
             "updated_at",
         )
@@ -41,6 +47,13 @@ class LoginSerializer(serializers.Serializer):
     email = serializers.EmailField()
     password = serializers.CharField(write_only=True)
 
+    default_error_messages = {
+        "invalid_credentials": "Invalid credentials.",
+        "inactive": "User account is disabled.",
+    }
+    # the async login view checks the password itself, in the hashing pool
+    verify_password = True
+
     def validate(self, attrs):
         email = attrs.get("email")
         password = attrs.get("password")
@@ -51,17 +64,20 @@ class LoginSerializer(serializers.Serializer):
         try:
             user = User.objects.get(email=email)
         except User.DoesNotExist:
-            raise serializers.ValidationError("Invalid credentials.")
-
-        if not user.check_password(password):
-            raise serializers.ValidationError("Invalid credentials.")
+            self.fail("invalid_credentials")
 
-        if not user.is_active:
-            raise serializers.ValidationError("User account is disabled.")
+        if self.verify_password:
+            self.check_user(user, user.check_password(password))
 
         attrs["user"] = user
         return attrs
 
+    def check_user(self, user, password_ok):
+        if not password_ok:
+            self.fail("invalid_credentials")
+        if not user.is_active:
+            self.fail("inactive")
+
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
@@ -71,7 +87,8 @@ class CategorySerializer(serializers.ModelSerializer):
 
 
 class ProductSerializer(serializers.ModelSerializer):
-    farmer = serializers.ReadOnlyField(source="farmer.id")  # read-only, auto-assigned
+    # read the FK column directly; "farmer.id" would load the whole farmer row
+    farmer = serializers.ReadOnlyField(source="farmer_id")  # read-only, auto-assigned
     category_name = serializers.ReadOnlyField(
         source="category.name"
     )  # helpful for responses
@@ -96,7 +113,7 @@ class ProductSerializer(serializers.ModelSerializer):
 
 
 class OrderSerializer(serializers.ModelSerializer):
-    buyer = serializers.ReadOnlyField(source="buyer.id")
+    buyer = serializers.ReadOnlyField(source="buyer_id")
     product_name = serializers.ReadOnlyField(source="product.name")
 
     class Meta:
@@ -122,12 +139,199 @@ class OrderSerializer(serializers.ModelSerializer):
             "updated_at",
         )
 
+    def validate_quantity(self, value):
+        if value < 1:
+            raise serializers.ValidationError("Quantity must be at least 1.")
+        return value
+
     def create(self, validated_data):
         # auto-assign buyer
         user = self.context["request"].user
         validated_data["buyer"] = user
         # calculate total_price
-        validated_data["total_price"] = (
-            validated_data["product"].price * validated_data["quantity"]
+        product = validated_data["product"]
+        validated_data["total_price"] = product.price * validated_data["quantity"]
+
+        # take the stock and write the order together, or neither
+        with transaction.atomic():
+            if not reserve_stock(product.pk, validated_data["quantity"]):
+                raise serializers.ValidationError(
+                    {"quantity": "Not enough stock available."}
+                )
+            return super().create(validated_data)
+
+
+class CheckoutLineSerializer(serializers.Serializer):
+    # a plain id: a PrimaryKeyRelatedField would fetch each product separately
+    product = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class OutOfStock(Exception):
+    pass
+
+
+class CheckoutSerializer(serializers.Serializer):
+    """
+    Place one order per cart line, all or nothing.
+
+    Every product is fetched in one query, stock for all lines is taken with
+    one UPDATE and the orders are written with one bulk INSERT, so the cost
+    barely depends on the size of the cart.
+    """
+
+    MAX_ITEMS = 100
+
+    items = CheckoutLineSerializer(many=True, allow_empty=False)
+
+    def validate_items(self, items):
+        if len(items) > self.MAX_ITEMS:
+            raise serializers.ValidationError(
+                f"A cart can hold at most {self.MAX_ITEMS} items."
+            )
+        products = Product.objects.in_bulk({item["product"] for item in items})
+
+        errors = []
+        for item in items:
+            product = products.get(item["product"])
+            if product is None:
+                errors.append({"product": ["Product not found."]})
+            elif product.status != "available":
+                errors.append({"product": ["Product is not available."]})
+            else:
+                errors.append({})
+        if any(errors):
+            raise serializers.ValidationError(errors)
+
+        self.products = products
+        return items
+
+    def create(self, validated_data):
+        items = validated_data["items"]
+        buyer = self.context["request"].user
+
+        # the same product may appear on several lines
+        wanted = {}
+        for item in items:
+            wanted[item["product"]] = wanted.get(item["product"], 0) + item["quantity"]
+
+        with transaction.atomic():
+            try:
+                # a savepoint: the lines that did fit are put back before
+                # stock_errors() reads the levels
+                with transaction.atomic():
+                    if not reserve_stock_many(wanted):
+                        raise OutOfStock
+            except OutOfStock:
+                raise serializers.ValidationError(self.stock_errors(items, wanted))
+            orders = Order.objects.bulk_create(
+                Order(
+                    buyer=buyer,
+                    product=self.products[item["product"]],
+                    quantity=item["quantity"],
+                    total_price=self.products[item["product"]].price * item["quantity"],
+                )
+                for item in items
+            )
+        return orders
+
+    @staticmethod
+    def stock_errors(items, wanted):
+        """Per-line errors for a failed reservation, from the stock levels it left."""
+        stock = dict(
+            Product.objects.filter(pk__in=list(wanted), status="available").values_list(
+                "pk", "quantity"
+            )
         )
-        return super().create(validated_data)
+        return {
+            "items": [
+                (
+                    {"quantity": ["Not enough stock available."]}
+                    if stock.get(item["product"], 0) < wanted[item["product"]]
+                    else {}
+                )
+                for item in items
+            ]
+        }
+
+    def to_representation(self, orders):
+        return {"orders": OrderSerializer(orders, many=True).data}
+
+
+class OrderTransitionSerializer(serializers.Serializer):
+    """Body of POST /api/orders/transitions/."""
+
+    MAX_IDS = 10_000
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_IDS,
+    )
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES)
+
+
+class OrderUpdateSerializer(OrderSerializer):
+    """Admin updates: status and delivery_date. Cancelling restocks the product."""
+
+    class Meta(OrderSerializer.Meta):
+        read_only_fields = (
+            "id",
+            "buyer",
+            "product",
+            "quantity",
+            "total_price",
+            "created_at",
+            "updated_at",
+        )
+
+    def validate_status(self, value):
+        current = self.instance.status if self.instance else None
+        if (
+            current
+            and value != current
+            and not order_states.can_transition(current, value)
+        ):
+            raise serializers.ValidationError(
+                order_states.transition_error(current, value)
+            )
+        return value
+
+    def update(self, instance, validated_data):
+        status = validated_data.get("status")
+        with transaction.atomic():
+            if status is not None and status != instance.status:
+                # the same path as bulk transitions: stock and sales
+                # rollups change once, however many requests race
+                result = order_states.transition([instance.pk], status)
+                if result.failed:
+                    raise serializers.ValidationError(
+                        {"status": result.failed[instance.pk]}
+                    )
+            return super().update(instance, validated_data)
+
+
+class DeliveryJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DeliveryJob
+        fields = (
+            "id",
+            "order",
+            "transporter",
+            "status",
+            "pickup_latitude",
+            "pickup_longitude",
+            "dropoff_latitude",
+            "dropoff_longitude",
+            "assigned_at",
+            "created_at",
+            "updated_at",
+        )
+        read_only_fields = fields
+
+
+class DeliveryAssignSerializer(serializers.Serializer):
+    """Body of POST /api/deliveries/assign/."""
+
+    # pending jobs to consider, oldest first; all of them by default
+    limit = serializers.IntegerField(min_value=1, required=False)
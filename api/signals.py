@@ -0,0 +1,76 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from . import authentication, cache, search, slow_queries, sqlite
+from .models import Category, Product, User
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, using, **kwargs):
+    if search.is_enabled(using):
+        search.index_products([instance.pk], using=using)
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, using, **kwargs):
+    if search.is_enabled(using):
+        search.unindex_product(instance.pk, using=using)
+
+
+@receiver(pre_save, sender=Category)
+def remember_category_rename(sender, instance, using, **kwargs):
+    # products carry the category name in the index, so only a rename
+    # needs a reindex of the whole category
+    instance._search_renamed = False
+    if instance.pk is None or not search.is_enabled(using):
+        return
+    old_name = (
+        Category.objects.using(using)
+        .filter(pk=instance.pk)
+        .values_list("name", flat=True)
+        .first()
+    )
+    instance._search_renamed = old_name is not None and old_name != instance.name
+
+
+@receiver(post_save, sender=Category)
+def reindex_category(sender, instance, created, using, **kwargs):
+    if getattr(instance, "_search_renamed", False):
+        search.index_products(category_id=instance.pk, using=using)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_cached_responses(sender, **kwargs):
+    cache.invalidate(sender)
+
+
+@receiver(post_delete, sender=Token)
+def evict_deleted_token(sender, instance, **kwargs):
+    authentication.invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def evict_user_tokens(sender, instance, update_fields=None, **kwargs):
+    # saves that cannot have touched an auth field (e.g. last_login) keep
+    # the cached entry
+    if update_fields is not None and not authentication.AUTH_FIELDS.intersection(
+        update_fields
+    ):
+        return
+    authentication.invalidate_user(instance.pk)
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    sqlite.configure(connection)
+
+
+@receiver(connection_created)
+def install_slow_query_log(sender, connection, **kwargs):
+    slow_queries.install(connection)
@@ -0,0 +1,201 @@
+"""
+Slow-query log.
+
+With SLOW_QUERY_LOG["THRESHOLD_MS"] set, an execute wrapper is installed on
+every new database connection (see api/signals.py). Each query that takes
+at least that long is appended to a JSON-lines file with:
+
+- its SQL, parameters, duration and database alias; parameters that may
+  be credentials are masked (see masked_params())
+- the innermost api/ frame that ran it (view, serializer, command, ...)
+- the backend's plan for it (EXPLAIN QUERY PLAN on SQLite), so a full
+  table scan of api_product or api_order shows up as "SCAN ..." rather
+  than "SEARCH ... USING INDEX"
+
+The file is bounded: past MAX_BYTES it is rotated to FILE.1 (up to
+BACKUPS old files). GET /api/admin/slow-queries/ and
+`python manage.py slow_queries` read it back, newest first.
+"""
+
+import contextvars
+import json
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+from . import timing
+
+DEFAULTS = {
+    # None disables the log; the wrapper is not even installed
+    "THRESHOLD_MS": None,
+    "FILE": "slow_queries.log",
+    "MAX_BYTES": 1024 * 1024,
+    "BACKUPS": 1,
+    "EXPLAIN": True,
+}
+
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+# frames of the execute wrappers themselves are not call sites
+WRAPPER_FILES = {os.path.abspath(__file__), os.path.abspath(timing.__file__)}
+EXPLAINABLE = ("SELECT", "WITH", "UPDATE", "DELETE")
+
+MASK = "<masked>"
+# every parameter of a query on the token table is a key or next to one,
+# and user writes carry the password hash
+SECRET_QUERY = re.compile(
+    r"\bauthtoken_token\b|^\s*(INSERT|UPDATE)\b.*\bapi_user\b",
+    re.IGNORECASE | re.DOTALL,
+)
+# Django password hashes ("algorithm$...$...") and DRF token keys, wherever
+# they turn up
+SECRET_VALUE = re.compile(r"[a-z0-9_]+\$[^$\s]*\$\S+|[0-9a-f]{40}")
+
+# set while the wrapper runs its own EXPLAIN, which must not be logged
+explaining = contextvars.ContextVar("explaining_slow_query", default=False)
+_write_lock = threading.Lock()
+
+
+def get_setting(name):
+    return getattr(settings, "SLOW_QUERY_LOG", {}).get(name, DEFAULTS[name])
+
+
+def get_path():
+    return Path(get_setting("FILE"))
+
+
+def install(connection, **kwargs):
+    if get_setting("THRESHOLD_MS") is None:
+        return
+    if record_slow_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_slow_query)
+
+
+def record_slow_query(execute, sql, params, many, context):
+    threshold = get_setting("THRESHOLD_MS")
+    if threshold is None or explaining.get():
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    result = execute(sql, params, many, context)
+    duration_ms = (time.perf_counter() - start) * 1000
+    if duration_ms >= threshold:
+        connection = context["connection"]
+        write(
+            {
+                "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "duration_ms": round(duration_ms, 2),
+                "alias": connection.alias,
+                "sql": sql,
+                "params": (
+                    masked_params(sql, params) if not many else f"<{len(params)} sets>"
+                ),
+                "call_site": call_site(),
+                "plan": explain(connection, sql, params) if not many else None,
+            }
+        )
+    return result
+
+
+def masked_params(sql, params):
+    if params is None:
+        return None
+    if SECRET_QUERY.search(sql):
+        return [MASK] * len(params)
+    return [
+        MASK if isinstance(p, str) and SECRET_VALUE.fullmatch(p) else p for p in params
+    ]
+
+
+def call_site():
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if filename.startswith(API_DIR) and filename not in WRAPPER_FILES:
+            relative = os.path.relpath(filename, os.path.dirname(API_DIR))
+            return f"{relative}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+def explain(connection, sql, params):
+    if not get_setting("EXPLAIN") or not sql.lstrip().upper().startswith(EXPLAINABLE):
+        return None
+    token = explaining.set(True)
+    try:
+        # a savepoint, so a failed EXPLAIN cannot break the caller's
+        # transaction on backends that abort it on any error
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                prefix = connection.ops.explain_query_prefix()
+                cursor.execute(f"{prefix} {sql}", params)
+                rows = cursor.fetchall()
+    except DatabaseError as exc:
+        return [f"EXPLAIN failed: {exc}"]
+    finally:
+        explaining.reset(token)
+    if connection.vendor == "sqlite":
+        # (id, parent, notused, detail)
+        return [row[-1] for row in rows]
+    return [" ".join(str(col) for col in row) for row in rows]
+
+
+def write(entry):
+    path, max_bytes = get_path(), get_setting("MAX_BYTES")
+    line = json.dumps(entry, default=str) + "\n"
+    with _write_lock:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            size = 0
+        if size and size + len(line) > max_bytes:
+            rotate(path, get_setting("BACKUPS"))
+        with open(path, "a") as f:
+            f.write(line)
+
+
+def rotate(path, backups):
+    for n in range(backups, 0, -1):
+        older = path.with_name(f"{path.name}.{n}")
+        newer = path.with_name(f"{path.name}.{n - 1}") if n > 1 else path
+        if newer.exists():
+            os.replace(newer, older)
+    if not backups:
+        path.unlink(missing_ok=True)
+
+
+def read(limit=None):
+    """Logged queries, newest first."""
+    path = get_path()
+    files = [
+        path.with_name(f"{path.name}.{n}") for n in range(get_setting("BACKUPS"), 0, -1)
+    ]
+    entries = []
+    for file in [*files, path]:
+        try:
+            lines = file.read_text().splitlines()
+        except FileNotFoundError:
+            continue
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                # a line cut short by a concurrent rotation
+                continue
+    entries.reverse()
+    return entries[:limit] if limit else entries
+
+
+def clear():
+    path = get_path()
+    with _write_lock:
+        for n in range(get_setting("BACKUPS"), -1, -1):
+            path.with_name(f"{path.name}.{n}" if n else path.name).unlink(
+                missing_ok=True
+            )
@@ -0,0 +1,54 @@
+"""
+PRAGMAs for every new SQLite connection.
+
+SQLite keeps most settings per connection, so Django's stock backend runs
+with SQLite's defaults: a rollback journal (a writer's commit blocks every
+reader), a full fsync per commit and a 2 MB page cache. The receiver in
+api/signals.py runs the SQLITE_PRAGMAS setting on each connection as it
+is opened; config/settings.py picks them, together with CONN_MAX_AGE and
+CONN_HEALTH_CHECKS, from a DATABASE_PROFILE.
+
+busy_timeout always goes first, so a switch of journal_mode waits for
+other connections instead of failing with "database is locked".
+journal_mode is stored in the database file, so a profile that wants the
+rollback journal back has to ask for it.
+"""
+
+import re
+
+from django.conf import settings
+
+NAME = re.compile(r"^[a-z_]+$")
+VALUE = re.compile(r"^-?\w+$")
+
+
+def get_pragmas():
+    return getattr(settings, "SQLITE_PRAGMAS", {})
+
+
+def statements(pragmas):
+    ordered = sorted(pragmas.items(), key=lambda item: item[0] != "busy_timeout")
+    for name, value in ordered:
+        if not NAME.match(name) or not VALUE.match(str(value)):
+            raise ValueError(f"Invalid SQLite pragma: {name} = {value!r}")
+        yield f"PRAGMA {name} = {value}"
+
+
+def configure(connection, **kwargs):
+    if connection.vendor != "sqlite":
+        return
+    # the raw connection: these are not application queries to time or log
+    for statement in statements(get_pragmas()):
+        connection.connection.execute(statement)
+
+
+def current(connection, names):
+    """{pragma: value} as the connection reports them."""
+    with connection.cursor() as cursor:
+        values = {}
+        for name in names:
+            if not NAME.match(name):
+                raise ValueError(f"Invalid SQLite pragma: {name}")
+            cursor.execute(f"PRAGMA {name}")
+            values[name] = cursor.fetchone()[0]
+    return values
@@ -0,0 +1,84 @@
+"""
+Stock bookkeeping for orders.
+
+The helpers are single conditional UPDATEs, so concurrent buyers can never
+read the same quantity and both decrement it: the database serializes the
+writes and the `quantity >= n` guard rejects whoever comes second once the
+stock runs out. They bypass model signals, so they invalidate the cached
+responses of the products they touch (and the product lists) themselves.
+"""
+
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+
+from . import cache
+from .models import Product
+
+# three parameters per product keeps an UPDATE under SQLite's old limit of
+# 999 variables
+RELEASE_CHUNK = 300
+
+
+def reserve_stock(product_id, quantity):
+    """
+    Take `quantity` units of an available product. Flips the product to
+    "sold" when it hits zero. Returns False if there was not enough stock.
+    """
+    return reserve_stock_many({product_id: quantity})
+
+
+def reserve_stock_many(quantities):
+    """
+    Take stock for several products ({product_id: quantity}) in one UPDATE.
+
+    Returns False, leaving the caller to roll back, unless every product had
+    enough stock; call it inside transaction.atomic() so a partial
+    reservation is undone.
+    """
+    if not quantities:
+        return True
+
+    wanted = Case(
+        *[When(pk=pk, then=Value(qty)) for pk, qty in quantities.items()],
+        default=Value(0),
+    )
+    updated = Product.objects.filter(
+        pk__in=list(quantities), status="available", quantity__gte=wanted
+    ).update(
+        quantity=F("quantity") - wanted,
+        # SET expressions see the pre-update row, so this is "hits zero"
+        status=Case(When(quantity=wanted, then=Value("sold")), default=F("status")),
+        updated_at=timezone.now(),
+    )
+    if updated:
+        cache.invalidate_rows(Product, quantities)
+    return updated == len(quantities)
+
+
+def release_stock(product_id, quantity):
+    """Put `quantity` units back, making a sold-out product available again."""
+    release_stock_many({product_id: quantity})
+
+
+def release_stock_many(quantities):
+    """
+    Put stock back for several products ({product_id: quantity}), one
+    UPDATE per RELEASE_CHUNK products.
+    """
+    items = list(quantities.items())
+    now = timezone.now()
+    for start in range(0, len(items), RELEASE_CHUNK):
+        chunk = dict(items[start : start + RELEASE_CHUNK])
+        returned = Case(
+            *[When(pk=pk, then=Value(qty)) for pk, qty in chunk.items()],
+            default=Value(0),
+        )
+        Product.objects.filter(pk__in=list(chunk)).update(
+            quantity=F("quantity") + returned,
+            status=Case(
+                When(status="sold", then=Value("available")), default=F("status")
+            ),
+            updated_at=now,
+        )
+    if items:
+        cache.invalidate_rows(Product, quantities)
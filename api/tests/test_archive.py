@@ -0,0 +1,159 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api.models import (
+    ArchivedOrder,
+    Category,
+    DeliveryJob,
+    Order,
+    OrderHistory,
+    Product,
+    User,
+)
+
+
+class OrderArchiveTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.buyer = User.objects.create_user(
+            email="buyer@example.com", password="buyerpass123", role="buyer"
+        )
+        self.other = User.objects.create_user(
+            email="other@example.com", password="otherpass123", role="buyer"
+        )
+        self.admin = User.objects.create_superuser(
+            email="admin@example.com", password="adminpass123"
+        )
+        farmer = User.objects.create_user(
+            email="farmer@example.com", password="farmerpass123", role="farmer"
+        )
+        self.product = Product.objects.create(
+            name="Yam",
+            price=Decimal("4.00"),
+            quantity=100,
+            unit="kg",
+            category=Category.objects.create(name="Tubers"),
+            farmer=farmer,
+        )
+        self.now = timezone.now()
+
+    def order(self, days_ago, status="delivered", buyer=None):
+        order = Order.objects.create(
+            buyer=buyer or self.buyer,
+            product=self.product,
+            quantity=2,
+            total_price=Decimal("8.00"),
+            status=status,
+        )
+        created = self.now - timedelta(days=days_ago)
+        Order.objects.filter(pk=order.pk).update(created_at=created)
+        order.created_at = created
+        return order
+
+    def archive(self, **options):
+        out = StringIO()
+        call_command("archive_orders", stdout=out, **options)
+        return out.getvalue()
+
+    def list_ids(self, user, **params):
+        self.client.force_authenticate(user)
+        response = self.client.get(reverse("order-list"), params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [order["id"] for order in response.json()["results"]]
+
+    def test_moves_old_closed_orders_only(self):
+        old_delivered = self.order(400)
+        old_cancelled = self.order(300, status="cancelled")
+        old_pending = self.order(400, status="pending")
+        recent = self.order(10)
+
+        output = self.archive(older_than_days=180, batch_size=1)
+
+        self.assertIn("Archived 2 orders in 2 batches.", output)
+        self.assertEqual(
+            set(Order.objects.values_list("pk", flat=True)),
+            {old_pending.pk, recent.pk},
+        )
+        archived = ArchivedOrder.objects.get(pk=old_delivered.pk)
+        self.assertEqual(archived.buyer_id, self.buyer.pk)
+        self.assertEqual(archived.total_price, Decimal("8.00"))
+        self.assertEqual(archived.status, "delivered")
+        self.assertEqual(archived.created_at, old_delivered.created_at)
+        self.assertIsNotNone(archived.archived_at)
+        self.assertTrue(ArchivedOrder.objects.filter(pk=old_cancelled.pk).exists())
+
+    def test_delivery_jobs_stay(self):
+        order = self.order(400)
+        job = DeliveryJob.objects.create(order=order, status="delivered")
+
+        self.archive(older_than_days=180)
+
+        self.assertFalse(Order.objects.filter(pk=order.pk).exists())
+        self.assertEqual(DeliveryJob.objects.get(pk=job.pk).order_id, order.pk)
+        self.assertTrue(OrderHistory.objects.filter(pk=order.pk).exists())
+
+    def test_resumes_and_limits(self):
+        orders = [self.order(400 + i) for i in range(5)]
+
+        self.assertIn("Archived 2 orders", self.archive(limit=2, batch_size=10))
+        # the lowest ids went first
+        self.assertEqual(
+            set(ArchivedOrder.objects.values_list("pk", flat=True)),
+            {orders[0].pk, orders[1].pk},
+        )
+        self.assertIn("Archived 3 orders", self.archive())
+        self.assertIn("Archived 0 orders", self.archive())
+        self.assertEqual(Order.objects.count(), 0)
+        self.assertEqual(OrderHistory.objects.count(), 5)
+
+    def test_dry_run_moves_nothing(self):
+        self.order(400)
+        self.assertIn("1 orders", self.archive(dry_run=True))
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(ArchivedOrder.objects.count(), 0)
+
+    def test_listing_reads_the_archive_only_for_old_date_ranges(self):
+        archived = self.order(400)
+        self.order(400, buyer=self.other)
+        recent = self.order(10)
+        self.archive()
+
+        self.assertEqual(self.list_ids(self.buyer), [recent.pk])
+        after = (self.now - timedelta(days=500)).date().isoformat()
+        self.assertEqual(
+            self.list_ids(self.buyer, created_after=after), [recent.pk, archived.pk]
+        )
+        before = (self.now - timedelta(days=30)).isoformat()
+        self.assertEqual(
+            self.list_ids(self.buyer, created_before=before), [archived.pk]
+        )
+        self.assertEqual(len(self.list_ids(self.admin, created_before=before)), 2)
+
+        # a range that starts after the newest archived order skips the view
+        after = (self.now - timedelta(days=20)).isoformat()
+        with self.assertNumQueries(3):
+            # archive high-water mark, count, page
+            self.assertEqual(
+                self.list_ids(self.buyer, created_after=after), [recent.pk]
+            )
+
+    def test_listing_archived_orders_with_keyset_pagination(self):
+        orders = [self.order(400 + i) for i in range(3)]
+        self.archive()
+        ids = self.list_ids(
+            self.buyer, created_before=self.now.isoformat(), pagination="cursor"
+        )
+        self.assertEqual(ids, [order.pk for order in orders])
+
+    def test_invalid_dates_are_rejected(self):
+        self.client.force_authenticate(self.buyer)
+        response = self.client.get(reverse("order-list"), {"created_after": "soon"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("created_after", response.json())
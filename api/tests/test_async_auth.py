@@ -0,0 +1,122 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ImproperlyConfigured
+from django.test import AsyncClient, Client, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from api.async_views import AsyncLoginView
+from api.hashing import HashingPool, get_pool
+from api.models import User
+from api.serializers import LoginSerializer
+from api.views import LoginAPIView
+
+
+class AsyncAuthViewTests(TestCase):
+    """Login/register through the ASGI request path."""
+
+    def setUp(self):
+        self.client = AsyncClient()
+        self.buyer = User.objects.create_user(
+            email="buyer@example.com", password="buyerpass123", role="buyer"
+        )
+
+    async def login(self, password="buyerpass123"):
+        return await self.client.post(
+            reverse("auth-login"),
+            {"email": "buyer@example.com", "password": password},
+            content_type="application/json",
+        )
+
+    async def test_login_returns_token(self):
+        res = await self.login()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn("token", res.json())
+        self.assertEqual(res.json()["user"]["email"], "buyer@example.com")
+
+    async def test_wrong_password(self):
+        res = await self.login("wrongpass")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.json(), {"non_field_errors": ["Invalid credentials."]})
+
+    async def test_inactive_user_only_told_with_the_right_password(self):
+        self.buyer.is_active = False
+        await self.buyer.asave()
+        res = await self.login("wrongpass")
+        self.assertEqual(res.json(), {"non_field_errors": ["Invalid credentials."]})
+        res = await self.login()
+        self.assertEqual(
+            res.json(), {"non_field_errors": ["User account is disabled."]}
+        )
+
+    async def test_only_asgi_routes_to_the_async_views(self):
+        res = await self.login()
+        self.assertIs(res.resolver_match.func.view_class, AsyncLoginView)
+        res = await sync_to_async(Client().post)(
+            reverse("auth-login"),
+            {"email": "buyer@example.com", "password": "buyerpass123"},
+            content_type="application/json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIs(res.resolver_match.func.view_class, LoginAPIView)
+
+    def test_non_object_body_keeps_drf_message(self):
+        serializer = LoginSerializer(data=["buyer@example.com"])
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(
+            serializer.errors["non_field_errors"],
+            ["Invalid data. Expected a dictionary, but got list."],
+        )
+
+    async def test_register_hashes_the_password(self):
+        res = await self.client.post(
+            reverse("auth-register"),
+            {"email": "new@example.com", "password": "strongpass123", "role": "farmer"},
+            content_type="application/json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        user = await User.objects.aget(email="new@example.com")
+        self.assertTrue(user.check_password("strongpass123"))
+
+    async def test_malformed_json(self):
+        res = await self.client.post(
+            reverse("auth-login"), "{", content_type="application/json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(PASSWORD_HASHING_POOL={"MAX_PENDING": 1, "RETRY_AFTER": 3})
+    async def test_full_pool_returns_429(self):
+        slots = get_pool().slots
+        slots.acquire()  # another login is hashing
+        try:
+            res = await self.login()
+        finally:
+            slots.release()
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res["Retry-After"], "3")
+        res = await self.login()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(PASSWORD_HASHING_POOL={"MAX_PENDING": None})
+    async def test_unbounded_pool(self):
+        self.assertIsNone(get_pool().slots)
+        res = await self.login()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_max_pending_below_one_is_rejected(self):
+        for max_pending in (0, -1):
+            with self.assertRaises(ImproperlyConfigured):
+                HashingPool(1, max_pending)
+
+    @override_settings(
+        PASSWORD_HASHERS=[
+            "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+            "django.contrib.auth.hashers.MD5PasswordHasher",
+        ]
+    )
+    async def test_login_upgrades_old_hashes(self):
+        self.buyer.password = make_password("buyerpass123", hasher="md5")
+        await self.buyer.asave()
+        res = await self.login()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        await self.buyer.arefresh_from_db()
+        self.assertTrue(self.buyer.password.startswith("pbkdf2_sha256$"))
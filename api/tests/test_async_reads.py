@@ -0,0 +1,142 @@
+from asgiref.sync import async_to_sync
+from django.test import TestCase, override_settings
+from django.urls import resolve, reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from rest_framework import status
+from api.async_generics import AsyncReadView
+from api.models import User, Category, Product, Order
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+)
+class AsyncReadParityTests(TestCase):
+    """GET through ASGI (async views) answers exactly like WSGI (DRF views)."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.farmer = User.objects.create_user(
+            email="farmer@example.com", password="farmerpass123", role="farmer"
+        )
+        self.buyer = User.objects.create_user(
+            email="buyer@example.com", password="buyerpass123", role="buyer"
+        )
+        fruits = Category.objects.create(name="Fruits")
+        grains = Category.objects.create(name="Grains")
+        self.products = [
+            Product.objects.create(
+                name=f"{'Banana' if i % 2 else 'Maize'} {i}",
+                price=i + 1,
+                quantity=10,
+                unit="kg",
+                farmer=self.farmer,
+                category=fruits if i % 2 else grains,
+            )
+            for i in range(15)
+        ]
+        for product in self.products[:3]:
+            Order.objects.create(
+                buyer=self.buyer, product=product, quantity=1, total_price=1
+            )
+        self.token = Token.objects.create(user=self.buyer)
+
+    def both(self, url, headers=None):
+        sync = self.client.get(url, headers=headers)
+        asgi = async_to_sync(self.async_client.get)(url, headers=headers)
+        self.assertEqual(asgi.status_code, sync.status_code)
+        self.assertEqual(asgi.json(), sync.json())
+        return sync, asgi
+
+    def test_routes_are_async_under_asgi(self):
+        match = resolve(reverse("product-list"), urlconf="config.asgi_urls")
+        self.assertIs(match.func.view_class, AsyncReadView)
+
+    def test_product_list(self):
+        for query in (
+            "",
+            "?page=2",
+            "?page=99",
+            "?pagination=cursor",
+            "?category=%d&ordering=price" % self.products[1].category_id,
+            "?min_price=3&max_price=9&ordering=-price",
+            "?q=banana",
+            "?facets=true",
+            "?status=bogus",
+        ):
+            with self.subTest(query=query):
+                self.both(reverse("product-list") + query)
+
+    def test_keyset_next_page(self):
+        _, asgi = self.both(reverse("product-list") + "?pagination=cursor")
+        self.both(asgi.json()["next"])
+
+    def test_product_detail(self):
+        self.both(reverse("product-detail", args=[self.products[0].pk]))
+        self.both(reverse("product-detail", args=[999999]))
+
+    def test_category_list(self):
+        self.both(reverse("category-list"))
+
+    def test_order_list(self):
+        self.both(reverse("order-list"))
+        self.both(
+            reverse("order-list"), headers={"Authorization": f"Token {self.token.key}"}
+        )
+
+
+class AsyncReadBehaviourTests(TestCase):
+    def setUp(self):
+        self.farmer = User.objects.create_user(
+            email="farmer@example.com", password="farmerpass123", role="farmer"
+        )
+        self.category = Category.objects.create(name="Fruits")
+        self.product = Product.objects.create(
+            name="Bananas",
+            price=2,
+            quantity=5,
+            unit="kg",
+            farmer=self.farmer,
+            category=self.category,
+        )
+
+    async def test_revalidation_returns_304(self):
+        url = reverse("product-detail", args=[self.product.pk])
+        first = await self.async_client.get(url)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        again = await self.async_client.get(
+            url, headers={"If-None-Match": first["ETag"]}
+        )
+        self.assertEqual(again.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_cached_list_sees_new_products(self):
+        url = reverse("product-list")
+        first = await self.async_client.get(url)
+        self.assertEqual(first.json()["count"], 1)
+        await Product.objects.acreate(
+            name="Mangoes",
+            price=3,
+            quantity=5,
+            unit="kg",
+            farmer=self.farmer,
+            category=self.category,
+        )
+        second = await self.async_client.get(url)
+        self.assertEqual(second.json()["count"], 2)
+
+    def test_writes_fall_through_to_the_drf_view(self):
+        token = Token.objects.create(user=self.farmer)
+        res = async_to_sync(self.async_client.post)(
+            reverse("product-list"),
+            {
+                "name": "Mangoes",
+                "price": "3.00",
+                "quantity": 5,
+                "unit": "kg",
+                "category": self.category.pk,
+            },
+            content_type="application/json",
+            headers={"Authorization": f"Token {token.key}"},
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Product.objects.filter(name="Mangoes").exists())
@@ -0,0 +1,85 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from rest_framework import status
+from api.authentication import token_cache
+from api.models import User, Category, Product
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        token_cache.clear()
+        self.buyer = User.objects.create_user(
+            email="buyer@example.com", password="buyerpass123", role="buyer"
+        )
+        self.token = Token.objects.create(user=self.buyer)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def get_orders(self):
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(reverse("order-list"))
+        return res, len(ctx.captured_queries)
+
+    def test_second_request_skips_the_token_lookup(self):
+        first, cold = self.get_orders()
+        second, warm = self.get_orders()
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(warm, cold - 1)
+
+    def test_deleted_token_is_rejected(self):
+        self.get_orders()
+        self.token.delete()
+        res, _ = self.get_orders()
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deactivated_user_is_rejected(self):
+        self.get_orders()
+        self.buyer.is_active = False
+        self.buyer.save()
+        res, _ = self.get_orders()
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_role_change_is_seen_by_the_next_request(self):
+        self.get_orders()
+        self.buyer.role = "farmer"
+        self.buyer.save(update_fields=["role"])
+        product = Product.objects.create(
+            name="Bananas",
+            price=2,
+            quantity=5,
+            unit="kg",
+            farmer=self.buyer,
+            category=Category.objects.create(name="Fruits"),
+        )
+        res = self.client.post(
+            reverse("order-list"), {"product": product.id, "quantity": 1}
+        )
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_unrelated_save_keeps_the_entry(self):
+        self.get_orders()
+        self.buyer.save(update_fields=["last_login"])
+        _, queries = self.get_orders()
+        self.buyer.save()
+        _, after_full_save = self.get_orders()
+        self.assertEqual(after_full_save, queries + 1)
+
+    @override_settings(TOKEN_AUTH_CACHE={"MAX_SIZE": 2})
+    def test_cache_is_bounded(self):
+        for i in range(4):
+            user = User.objects.create_user(email=f"user{i}@example.com")
+            token = Token.objects.create(user=user)
+            self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+            self.get_orders()
+        self.assertEqual(len(token_cache.entries), 2)
+
+    @override_settings(TOKEN_AUTH_CACHE={"TTL": 0})
+    def test_entries_expire(self):
+        _, cold = self.get_orders()
+        _, again = self.get_orders()
+        self.assertEqual(again, cold)
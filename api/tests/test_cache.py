@@ -0,0 +1,166 @@
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from api.cache import get_or_build
+from api.models import User, Category, Product
+from api.stock import release_stock, reserve_stock
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.farmer = User.objects.create_user(
+            email="farmer@example.com", password="farmerpass123", role="farmer"
+        )
+        self.category = Category.objects.create(name="Fruits")
+        self.product = Product.objects.create(
+            name="Bananas",
+            price=10,
+            quantity=5,
+            unit="kg",
+            farmer=self.farmer,
+            category=self.category,
+        )
+
+    def get_without_queries(self, url, **extra):
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(url, **extra)
+        self.assertEqual(len(ctx.captured_queries), 0)
+        return res
+
+    def test_repeat_reads_skip_the_database(self):
+        for url in (
+            reverse("product-list"),
+            reverse("product-detail", args=[self.product.pk]),
+            reverse("category-list"),
+        ):
+            first = self.client.get(url)
+            second = self.get_without_queries(url)
+            self.assertEqual(second.status_code, status.HTTP_200_OK)
+            self.assertEqual(second.data, first.data)
+            self.assertEqual(second.headers["ETag"], first.headers["ETag"])
+
+            res = self.get_without_queries(
+                url, HTTP_IF_NONE_MATCH=first.headers["ETag"]
+            )
+            self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_query_string_is_part_of_the_key(self):
+        url = reverse("product-list")
+        self.client.get(url)
+        res = self.client.get(url, {"q": "mango"})
+        self.assertEqual(res.data["count"], 0)
+
+    def test_saves_invalidate_dependent_responses(self):
+        list_url = reverse("product-list")
+        detail_url = reverse("product-detail", args=[self.product.pk])
+        self.client.get(list_url)
+        self.client.get(detail_url)
+
+        self.product.name = "Plantain"
+        self.product.save()
+        self.assertEqual(self.client.get(detail_url).data["name"], "Plantain")
+
+        self.category.name = "Staples"
+        self.category.save()
+        res = self.client.get(list_url)
+        self.assertEqual(res.data["results"][0]["category_name"], "Staples")
+
+        self.product.delete()
+        self.assertEqual(self.client.get(list_url).data["count"], 0)
+        res = self.client.get(detail_url)
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_stock_changes_keep_other_products_cached(self):
+        other = Product.objects.create(
+            name="Mangoes",
+            price=4,
+            quantity=5,
+            unit="kg",
+            farmer=self.farmer,
+            category=self.category,
+        )
+        list_url = reverse("product-list")
+        detail_url = reverse("product-detail", args=[self.product.pk])
+        other_url = reverse("product-detail", args=[other.pk])
+        for url in (list_url, detail_url, other_url):
+            self.client.get(url)
+
+        reserve_stock(self.product.pk, 2)
+
+        self.get_without_queries(other_url)
+        self.assertEqual(self.client.get(detail_url).data["quantity"], 3)
+        self.assertEqual(
+            {p["id"]: p["quantity"] for p in self.client.get(list_url).data["results"]},
+            {self.product.pk: 3, other.pk: 5},
+        )
+
+        release_stock(self.product.pk, 2)
+        self.get_without_queries(other_url)
+        self.assertEqual(self.client.get(detail_url).data["quantity"], 5)
+
+    def test_only_one_concurrent_rebuild(self):
+        calls = []
+        results = []
+
+        def build():
+            calls.append(1)
+            time.sleep(0.2)
+            return "value", True
+
+        def worker():
+            results.append(get_or_build("stampede-test", build))
+
+        threads = [threading.Thread(target=worker) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ["value"] * 10)
+
+    def test_waiters_stop_when_nothing_is_stored(self):
+        building = threading.Event()
+        waited = []
+
+        def not_modified():
+            building.set()
+            time.sleep(0.2)
+            return status.HTTP_304_NOT_MODIFIED, False
+
+        def waiter():
+            building.wait()
+            start = time.perf_counter()
+            get_or_build("uncacheable-test", lambda: ("own", False))
+            waited.append(time.perf_counter() - start)
+
+        threads = [
+            threading.Thread(
+                target=get_or_build, args=("uncacheable-test", not_modified)
+            ),
+            threading.Thread(target=waiter),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # the holder's 0.2s, not the 5s lock timeout
+        self.assertLess(waited[0], 1)
+
+    def test_stale_entry_served_while_refreshing(self):
+        cache.set("stale-test", ("old", time.time() - 1), 60)
+        cache.add("stale-test:lock", 1, 5)  # someone is already refreshing
+        self.assertEqual(get_or_build("stale-test", lambda: ("new", True)), "old")
+
+        cache.delete("stale-test:lock")
+        self.assertEqual(get_or_build("stale-test", lambda: ("new", True)), "new")
@@ -0,0 +1,93 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from api.models import User, Category, Product
+
+
+# the response cache would answer before the conditional layer runs
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+)
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.farmer = User.objects.create_user(
+            email="farmer@example.com", password="farmerpass123", role="farmer"
+        )
+        self.category = Category.objects.create(name="Fruits")
+        self.products = [
+            Product.objects.create(
+                name=name,
+                price=10,
+                quantity=5,
+                unit="kg",
+                farmer=self.farmer,
+                category=self.category,
+            )
+            for name in ("Bananas", "Mangoes")
+        ]
+
+    def assertRevalidates(self, url):
+        """Fetch url, then replay its ETag; returns the ETag."""
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        etag = res.headers["ETag"]
+        self.assertFalse(etag.startswith("W/"))
+        self.assertIn("Last-Modified", res.headers)
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.headers["ETag"], etag)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        return etag
+
+    def test_product_list_not_modified(self):
+        self.assertRevalidates(reverse("product-list"))
+
+    def test_product_detail_not_modified(self):
+        self.assertRevalidates(reverse("product-detail", args=[self.products[0].pk]))
+
+    def test_category_list_not_modified(self):
+        self.assertRevalidates(reverse("category-list"))
+
+    def test_keyset_page_not_modified_without_count(self):
+        url = reverse("product-list") + "?pagination=cursor"
+        etag = self.assertRevalidates(url)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertNotIn("COUNT(", ctx.captured_queries[0]["sql"].upper())
+
+    def test_update_delete_and_category_rename_change_etag(self):
+        url = reverse("product-list")
+        etag = self.assertRevalidates(url)
+
+        self.products[0].price = 12
+        self.products[0].save()
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        etag = res.headers["ETag"]
+
+        self.products[1].delete()
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        etag = res.headers["ETag"]
+
+        self.category.name = "Fresh fruits"
+        self.category.save()
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["results"][0]["category_name"], "Fresh fruits")
+
+    def test_if_modified_since(self):
+        url = reverse("product-detail", args=[self.products[0].pk])
+        last_modified = self.client.get(url).headers["Last-Modified"]
+        res = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_missing_product_still_404(self):
+        res = self.client.get(reverse("product-detail", args=[999]))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
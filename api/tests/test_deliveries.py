@@ -0,0 +1,280 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api import assignment, order_states
+from api.models import Category, DeliveryJob, Order, Product, User
+
+# about 1.1 km per 0.01 degree here
+LAGOS = (6.5, 3.4)
+
+
+def near(lat, lon, north=0.0, east=0.0):
+    return lat + north, lon + east
+
+
+class DeliveryTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser(
+            email="admin@example.com", password="adminpass123"
+        )
+        self.buyer = User.objects.create_user(
+            email="buyer@example.com",
+            password="buyerpass123",
+            role="buyer",
+            latitude=6.6,
+            longitude=3.35,
+        )
+        self.farmer = User.objects.create_user(
+            email="farmer@example.com",
+            password="farmerpass123",
+            role="farmer",
+            latitude=LAGOS[0],
+            longitude=LAGOS[1],
+        )
+        category = Category.objects.create(name="Fruit")
+        self.product = Product.objects.create(
+            name="Mango",
+            price=Decimal("1.00"),
+            quantity=1000,
+            unit="kg",
+            category=category,
+            farmer=self.farmer,
+        )
+
+    def transporter(self, lat, lon, **fields):
+        return User.objects.create_user(
+            email=f"t{User.objects.count()}@example.com",
+            role="transporter",
+            latitude=lat,
+            longitude=lon,
+            **fields,
+        )
+
+    def orders(self, count):
+        return Order.objects.bulk_create(
+            Order(
+                buyer=self.buyer,
+                product=self.product,
+                quantity=1,
+                total_price=Decimal("1.00"),
+            )
+            for _ in range(count)
+        )
+
+    def jobs(self, *pickups):
+        """A pending job per (lat, lon) pickup, oldest first."""
+        return DeliveryJob.objects.bulk_create(
+            DeliveryJob(order=order, pickup_latitude=lat, pickup_longitude=lon)
+            for order, (lat, lon) in zip(self.orders(len(pickups)), pickups)
+        )
+
+    def holder(self, job):
+        return DeliveryJob.objects.get(pk=job.pk).transporter_id
+
+    def test_jobs_follow_the_order(self):
+        orders = self.orders(3)
+        ids = [o.pk for o in orders]
+        order_states.transition(ids, "confirmed")
+
+        jobs = DeliveryJob.objects.order_by("order_id")
+        self.assertEqual(
+            list(
+                jobs.values_list(
+                    "order_id",
+                    "status",
+                    "pickup_latitude",
+                    "pickup_longitude",
+                    "dropoff_latitude",
+                    "dropoff_longitude",
+                )
+            ),
+            [(pk, "pending", 6.5, 3.4, 6.6, 3.35) for pk in ids],
+        )
+
+        order_states.transition(ids[:1], "delivered")
+        order_states.transition(ids[1:], "cancelled")
+        self.assertEqual(
+            list(jobs.values_list("status", flat=True)),
+            ["delivered", "cancelled", "cancelled"],
+        )
+
+    def test_deleting_the_order_deletes_its_job(self):
+        (job,) = self.jobs(LAGOS)
+        Order.objects.filter(pk=job.order_id).delete()
+        self.assertFalse(DeliveryJob.objects.exists())
+
+    def test_cancelling_frees_the_transporter(self):
+        order = self.orders(1)[0]
+        order_states.transition([order.pk], "confirmed")
+        transporter = self.transporter(*LAGOS)
+        self.assertEqual(assignment.assign().assigned, 1)
+        self.assertEqual(transporter.delivery_jobs.get().status, "assigned")
+
+        order_states.transition([order.pk], "cancelled")
+        self.assertEqual(transporter.delivery_jobs.get().status, "cancelled")
+        self.assertEqual(assignment.load_transporters(5)[0][3], 5)
+
+    def test_nearby_pickups_go_to_one_transporter(self):
+        here = self.transporter(*LAGOS)
+        far = self.transporter(*near(*LAGOS, north=0.15))
+        jobs = self.jobs(
+            near(*LAGOS, east=0.01),
+            near(*LAGOS, east=0.02),
+            near(*LAGOS, north=0.01),
+            near(*LAGOS, north=0.16),
+        )
+
+        result = assignment.assign()
+
+        self.assertEqual(result.assigned, 4)
+        self.assertEqual(result.transporters, 2)
+        self.assertEqual(
+            [self.holder(job) for job in jobs], [here.pk, here.pk, here.pk, far.pk]
+        )
+
+    @override_settings(DELIVERY_ASSIGNMENT={"CAPACITY": 2})
+    def test_capacity_counts_held_jobs(self):
+        transporter = self.transporter(*LAGOS)
+        held, first, second = self.jobs(*[LAGOS] * 3)
+        DeliveryJob.objects.filter(pk=held.pk).update(
+            transporter=transporter, status="assigned"
+        )
+
+        result = assignment.assign()
+
+        self.assertEqual((result.assigned, result.unmatched), (1, 1))
+        self.assertEqual(self.holder(first), transporter.pk)
+        self.assertIsNone(self.holder(second))
+
+    def test_out_of_reach_and_unavailable(self):
+        self.transporter(*near(*LAGOS, north=0.5))
+        self.transporter(*LAGOS, is_available=False)
+        self.transporter(None, None)
+        (job,) = self.jobs(LAGOS)
+
+        result = assignment.assign()
+
+        self.assertEqual((result.assigned, result.unmatched), (0, 1))
+        self.assertIsNone(self.holder(job))
+
+    def test_batches_stay_within_the_radius(self):
+        transporter = self.transporter(*LAGOS)
+        close, beyond = self.jobs(LAGOS, near(*LAGOS, east=0.06))
+
+        assignment.assign()
+
+        self.assertEqual(self.holder(close), transporter.pk)
+        # 6.6 km from the first pickup: not in the batch, but still in
+        # reach of the transporter on its own
+        self.assertEqual(self.holder(beyond), transporter.pk)
+        self.assertEqual(
+            assignment.match(
+                [(1, *LAGOS), (2, *near(*LAGOS, east=0.06))],
+                [(10, *LAGOS, 5), (11, *near(*LAGOS, east=0.06), 5)],
+                max_pickup_km=25,
+                batch_radius_km=5,
+            ),
+            {1: 10, 2: 11},
+        )
+
+    def test_match_agrees_with_a_scan(self):
+        # a lattice of jobs and transporters around one point
+        jobs = [
+            (i, *near(*LAGOS, north=(i % 20) * 0.013, east=(i // 20) * 0.017))
+            for i in range(400)
+        ]
+        transporters = [
+            (
+                1000 + i,
+                *near(*LAGOS, north=(i % 7) * 0.04, east=(i // 7) * 0.05),
+                3,
+            )
+            for i in range(49)
+        ]
+
+        assignments = assignment.match(jobs, transporters, 25, 5)
+
+        located = {pk: (lat, lon) for pk, lat, lon, _ in transporters}
+        loads = {}
+        for job_id, transporter_id in assignments.items():
+            loads[transporter_id] = loads.get(transporter_id, 0) + 1
+            _, lat, lon = jobs[job_id]
+            self.assertLessEqual(
+                assignment.distance_km(lat, lon, *located[transporter_id]), 25 + 5
+            )
+        self.assertEqual(len(assignments), 49 * 3)
+        self.assertEqual(max(loads.values()), 3)
+        # the oldest job always finds its nearest transporter
+        nearest = min(
+            transporters,
+            key=lambda t: assignment.distance_km(*jobs[0][1:], t[1], t[2]),
+        )
+        self.assertEqual(assignments[0], nearest[0])
+
+    def test_grid_lookup(self):
+        grid = assignment.Grid(5)
+        grid.add("here", *LAGOS)
+        grid.add("next door", *near(*LAGOS, east=0.04))
+        grid.add("far", *near(*LAGOS, north=1))
+        found = {item for cell in grid.near(*LAGOS, 5) for item in cell}
+        self.assertEqual(found, {"here", "next door"})
+
+    def test_list_access(self):
+        mine = self.transporter(*LAGOS)
+        other = self.transporter(*LAGOS)
+        first, second, _ = self.jobs(LAGOS, LAGOS, LAGOS)
+        DeliveryJob.objects.filter(pk=first.pk).update(
+            transporter=mine, status="assigned"
+        )
+        DeliveryJob.objects.filter(pk=second.pk).update(
+            transporter=other, status="assigned"
+        )
+        url = reverse("delivery-list")
+
+        self.client.force_authenticate(mine)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([job["id"] for job in response.data["results"]], [first.pk])
+
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.client.get(url).data["count"], 3)
+        response = self.client.get(url, {"status": "pending"})
+        self.assertEqual(response.data["count"], 1)
+        self.assertEqual(self.client.get(url, {"status": "lost"}).status_code, 400)
+
+        self.client.force_authenticate(self.buyer)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_assign_endpoint(self):
+        transporter = self.transporter(*LAGOS)
+        self.jobs(LAGOS, LAGOS, LAGOS)
+        url = reverse("delivery-assign")
+
+        self.client.force_authenticate(transporter)
+        self.assertEqual(self.client.post(url).status_code, 403)
+
+        self.client.force_authenticate(self.admin)
+        for limit in (0, True, "all"):
+            response = self.client.post(url, {"limit": limit}, format="json")
+            self.assertEqual(response.status_code, 400)
+        response = self.client.post(url, {"limit": 2}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data, {"assigned": 2, "transporters": 1, "unmatched": 0}
+        )
+        self.assertEqual(transporter.delivery_jobs.count(), 2)
+
+    def test_command(self):
+        self.transporter(*LAGOS)
+        self.jobs(LAGOS, near(*LAGOS, north=1))
+        output = StringIO()
+        call_command("assign_deliveries", stdout=output)
+        self.assertIn(
+            "Assigned 1 jobs to 1 transporters; 1 left unmatched.", output.getvalue()
+        )
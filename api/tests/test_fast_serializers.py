@@ -0,0 +1,171 @@
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from api.fast_serializers import FastListMixin, get_values_serializer
+from api.models import User, Category, Product, Order
+from api.serializers import (
+    CategorySerializer,
+    OrderSerializer,
+    ProductSerializer,
+    UserSerializer,
+)
+
+
+def render(data):
+    return JSONRenderer().render(data)
+
+
+class MarketplaceData:
+    def setUp(self):
+        self.farmer = User.objects.create_user(
+            email="farmer@example.com", password="farmerpass123", role="farmer"
+        )
+        self.buyer = User.objects.create_user(
+            email="buyer@example.com", password="buyerpass123", role="buyer"
+        )
+        # no role, and a name that JSON has to escape
+        User.objects.create_user(
+            email="nobody@example.com", password="nobodypass123", name='Ama "Q" é'
+        )
+        self.admin = User.objects.create_superuser(
+            email="admin@example.com", password="adminpass123"
+        )
+        fruits = Category.objects.create(name="Fruits", description="Sweet\nthings")
+        grains = Category.objects.create(name="Grains")
+        prices = ["0.10", "1234.50", "3", "99999.99", "7.05"]
+        self.products = [
+            Product.objects.create(
+                name=f"{'Banana' if i % 2 else 'Maize'} {i}",
+                price=Decimal(prices[i % len(prices)]),
+                quantity=i,
+                unit="kg",
+                farmer=self.farmer,
+                category=fruits if i % 2 else grains,
+                status="sold" if i % 5 == 0 else "available",
+            )
+            for i in range(15)
+        ]
+        for i, product in enumerate(self.products[:4]):
+            Order.objects.create(
+                buyer=self.buyer,
+                product=product,
+                quantity=i + 1,
+                total_price=product.price * (i + 1),
+                delivery_date=(
+                    datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc)
+                    if i % 2
+                    else None
+                ),
+            )
+
+
+class ValuesSerializerTests(MarketplaceData, TestCase):
+    """The compiled serializers render the same bytes as DRF's."""
+
+    def assertSameJSON(self, serializer_class, queryset):
+        fast = get_values_serializer(serializer_class)
+        self.assertIsNotNone(fast)
+        expected = render(serializer_class(queryset, many=True).data)
+        self.assertEqual(render(fast.serialize(fast.values(queryset))), expected)
+
+    def test_serializers(self):
+        for serializer_class, queryset in (
+            (ProductSerializer, Product.objects.select_related("category")),
+            (OrderSerializer, Order.objects.select_related("product")),
+            (UserSerializer, User.objects.all()),
+            (CategorySerializer, Category.objects.all()),
+        ):
+            with self.subTest(serializer=serializer_class.__name__):
+                self.assertSameJSON(serializer_class, queryset.order_by("pk"))
+
+    def test_non_utc_timezone(self):
+        with timezone.override("America/New_York"):
+            self.assertSameJSON(OrderSerializer, Order.objects.order_by("pk"))
+
+    def test_lookups(self):
+        fast = get_values_serializer(ProductSerializer)
+        self.assertIn("category__name", fast.lookups)
+        self.assertIn("farmer_id", fast.lookups)
+
+    def test_unsupported_serializers_fall_back(self):
+        class WithMethodField(serializers.ModelSerializer):
+            label = serializers.SerializerMethodField()
+
+            class Meta:
+                model = Category
+                fields = ("id", "label")
+
+            def get_label(self, obj):
+                return obj.name.upper()
+
+        class WithNestedSerializer(serializers.ModelSerializer):
+            category = CategorySerializer()
+
+            class Meta:
+                model = Product
+                fields = ("id", "category")
+
+        self.assertIsNone(get_values_serializer(WithMethodField))
+        self.assertIsNone(get_values_serializer(WithNestedSerializer))
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+)
+class FastListResponseTests(MarketplaceData, TestCase):
+    """List endpoints answer byte for byte as they do through DRF's serializers."""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.buyer_token = {
+            "Authorization": f"Token {Token.objects.create(user=self.buyer).key}"
+        }
+        self.admin_token = {
+            "Authorization": f"Token {Token.objects.create(user=self.admin).key}"
+        }
+
+    def assertSameResponse(self, url, headers=None):
+        for get in (self.client.get, async_to_sync(self.async_client.get)):
+            fast = get(url, headers=headers)
+            with mock.patch.object(
+                FastListMixin, "get_values_serializer", return_value=None
+            ):
+                slow = get(url, headers=headers)
+            self.assertEqual(fast.status_code, 200)
+            self.assertEqual(fast.content, slow.content)
+        return fast
+
+    def test_product_list(self):
+        for query in (
+            "",
+            "?page=2",
+            "?pagination=cursor",
+            "?q=banana",
+            "?ordering=price",
+            "?facets=true",
+        ):
+            with self.subTest(query=query):
+                self.assertSameResponse(reverse("product-list") + query)
+
+    def test_keyset_next_page(self):
+        response = self.assertSameResponse(
+            reverse("product-list") + "?pagination=cursor"
+        )
+        self.assertSameResponse(response.json()["next"])
+
+    def test_other_lists(self):
+        self.assertSameResponse(reverse("order-list"), self.buyer_token)
+        self.assertSameResponse(reverse("order-list"), self.admin_token)
+        self.assertSameResponse(reverse("category-list"))
+        self.assertSameResponse(reverse("user-list"), self.admin_token)
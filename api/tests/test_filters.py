@@ -0,0 +1,101 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from api.models import User, Category, Product
+
+
+class ProductFilterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.farmer = User.objects.create_user(
+            email="farmer@example.com", password="farmerpass123", role="farmer"
+        )
+        self.fruits = Category.objects.create(name="Fruits")
+        self.grains = Category.objects.create(name="Grains")
+
+        def make(name, price, unit, category, status="available"):
+            return Product.objects.create(
+                name=name,
+                price=price,
+                quantity=5,
+                unit=unit,
+                status=status,
+                farmer=self.farmer,
+                category=category,
+            )
+
+        self.bananas = make("Bananas", 8, "kg", self.fruits)
+        self.mangoes = make("Mangoes", 45, "crate", self.fruits)
+        self.maize = make("Maize", 120, "bag", self.grains)
+        self.rice = make("Rice", 700, "bag", self.grains, status="sold")
+
+    def ids(self, **params):
+        res = self.client.get(reverse("product-list"), params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [p["id"] for p in res.data["results"]]
+
+    def test_filters(self):
+        self.assertCountEqual(
+            self.ids(category=self.fruits.id), [self.bananas.id, self.mangoes.id]
+        )
+        self.assertCountEqual(
+            self.ids(min_price=40, max_price=200), [self.mangoes.id, self.maize.id]
+        )
+        self.assertCountEqual(self.ids(unit="bag"), [self.maize.id, self.rice.id])
+        self.assertEqual(self.ids(status="sold"), [self.rice.id])
+        self.assertEqual(
+            self.ids(category=f"{self.fruits.id},{self.grains.id}", unit="crate"),
+            [self.mangoes.id],
+        )
+
+    def test_ordering(self):
+        by_price = [self.bananas.id, self.mangoes.id, self.maize.id, self.rice.id]
+        self.assertEqual(self.ids(ordering="price"), by_price)
+        self.assertEqual(self.ids(ordering="-price"), by_price[::-1])
+        self.assertEqual(self.ids(ordering="newest"), by_price[::-1])
+
+    def test_invalid_params_are_400(self):
+        for params in (
+            {"min_price": "cheap"},
+            {"status": "gone"},
+            {"category": "fruits"},
+            {"ordering": "name"},
+        ):
+            res = self.client.get(reverse("product-list"), params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def test_facets_follow_filters_in_one_query(self):
+        url = reverse("product-list")
+        res = self.client.get(url, {"facets": "true", "status": "available"})
+        facets = res.data["facets"]
+        self.assertEqual(
+            facets["category"],
+            [
+                {"id": self.fruits.id, "name": "Fruits", "count": 2},
+                {"id": self.grains.id, "name": "Grains", "count": 1},
+            ],
+        )
+        self.assertEqual(facets["status"], [{"value": "available", "count": 3}])
+        self.assertEqual(
+            [bucket["count"] for bucket in facets["price"]], [1, 1, 0, 1, 0]
+        )
+        self.assertEqual(facets["price"][0]["range"], "0-10")
+        self.assertEqual(facets["price"][-1]["range"], "500+")
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(url, {"facets": "true", "unit": "bag"})
+        grouped = [q for q in ctx.captured_queries if "GROUP BY" in q["sql"]]
+        self.assertEqual(len(grouped), 1)
+
+    def test_facets_with_search(self):
+        res = self.client.get(reverse("product-list"), {"facets": "1", "q": "maize"})
+        self.assertEqual(res.data["facets"]["category"][0]["count"], 1)
+
+    def test_no_facets_by_default(self):
+        res = self.client.get(reverse("product-list"))
+        self.assertNotIn("facets", res.data)
@@ -0,0 +1,88 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count, Sum
+from django.test import TestCase
+from api.models import User, Category, Product, Order, DailyProductSales
+from api.search import search_products
+
+
+class GenerateMarketplaceDataTests(TestCase):
+    def generate(self, **options):
+        options = {"users": 400, "seed": 7, "batch_size": 50, **options}
+        call_command("generate_marketplace_data", stdout=StringIO(), **options)
+
+    def test_generates_related_rows(self):
+        self.generate()
+        roles = dict(User.objects.values_list("role").annotate(n=Count("id")))
+        self.assertEqual(sum(roles.values()), 400)
+        self.assertGreater(roles["buyer"], roles["farmer"])
+        self.assertGreater(roles["farmer"], roles["transporter"])
+        self.assertEqual(Category.objects.count(), 6)
+        self.assertTrue(Product.objects.exists())
+        self.assertTrue(Order.objects.exists())
+
+        self.assertFalse(Product.objects.exclude(farmer__role="farmer").exists())
+        self.assertFalse(Order.objects.exclude(buyer__role="buyer").exists())
+        for order in Order.objects.select_related("product"):
+            self.assertEqual(order.total_price, order.product.price * order.quantity)
+
+    def test_password_is_hashed_once(self):
+        self.generate(users=50, password="s3cret-pass")
+        self.assertEqual(User.objects.values("password").distinct().count(), 1)
+        self.assertTrue(User.objects.first().check_password("s3cret-pass"))
+
+    def test_distributions(self):
+        self.generate(
+            roles="farmer=1,buyer=1",
+            order_status_mix="delivered=1",
+            product_status_mix="sold=1",
+            days=30,
+        )
+        self.assertFalse(User.objects.filter(role="transporter").exists())
+        self.assertEqual(
+            set(Order.objects.values_list("status", flat=True)), {"delivered"}
+        )
+        self.assertFalse(Order.objects.filter(delivery_date__isnull=True).exists())
+        self.assertEqual(
+            set(Product.objects.values_list("status", flat=True)), {"sold"}
+        )
+
+        # timestamps are spread out, not all "now"
+        newest = Order.objects.order_by("-created_at").first().created_at
+        oldest = Order.objects.order_by("created_at").first().created_at
+        self.assertGreater((newest - oldest).days, 20)
+        self.assertLessEqual((newest - oldest).days, 30)
+
+        # bulk inserts skip the incremental rollups; they are rebuilt after
+        self.assertEqual(
+            DailyProductSales.objects.aggregate(n=Sum("orders"))["n"],
+            Order.objects.count(),
+        )
+
+    def test_category_skew(self):
+        self.generate(users=600, roles="farmer=1", category_skew=3)
+        per_category = list(
+            Product.objects.values("category")
+            .annotate(n=Count("id"))
+            .order_by("-n")
+            .values_list("category__name", "n")
+        )
+        self.assertEqual(per_category[0][0], "Fruits")
+        self.assertGreater(per_category[0][1], sum(n for _, n in per_category[1:]))
+
+    def test_runs_again_on_top(self):
+        self.generate(users=30)
+        self.generate(users=30)
+        self.assertEqual(User.objects.count(), 60)
+        self.assertEqual(Category.objects.count(), 6)
+
+    def test_products_are_searchable(self):
+        self.generate(roles="farmer=1", users=50)
+        name = Product.objects.first().name.split()[-1]
+        self.assertTrue(search_products(Product.objects.all(), name).exists())
+
+    def test_rejects_unknown_mix_values(self):
+        with self.assertRaisesMessage(CommandError, "Unknown value 'shipped'"):
+            self.generate(order_status_mix="shipped=1")
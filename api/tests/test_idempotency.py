@@ -0,0 +1,182 @@
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from api.models import User, Category, Product, Order, IdempotencyKey
+
+
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.buyer = User.objects.create_user(
+            email="buyer@example.com", password="buyerpass123", role="buyer"
+        )
+        farmer = User.objects.create_user(
+            email="farmer@example.com", password="farmerpass123", role="farmer"
+        )
+        self.product = Product.objects.create(
+            name="Bananas",
+            price=2,
+            quantity=5,
+            unit="kg",
+            farmer=farmer,
+            category=Category.objects.create(name="Fruits"),
+        )
+        self.client.force_authenticate(user=self.buyer)
+
+    def order(self, quantity, key="key-1"):
+        return self.client.post(
+            reverse("order-list"),
+            {"product": self.product.id, "quantity": quantity},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def checkout(self, quantity, key="key-1"):
+        return self.client.post(
+            reverse("order-checkout"),
+            {"items": [{"product": self.product.id, "quantity": quantity}]},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retry_replays_the_first_response(self):
+        first = self.order(2)
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        retry = self.order(2)
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry.headers["Idempotent-Replayed"], "true")
+        self.assertEqual(Order.objects.count(), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 3)
+
+    def test_retry_during_the_first_attempt_is_told_to_come_back(self):
+        self.order(2)
+        # as if the first attempt were still running
+        IdempotencyKey.objects.update(status_code=None, response_body="")
+        retry = self.order(2)
+        self.assertEqual(retry.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(retry.headers["Retry-After"], "1")
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_different_body_with_same_key_is_rejected(self):
+        self.order(1)
+        res = self.order(2)
+        self.assertEqual(res.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_client_errors_are_replayed(self):
+        first = self.order(6)
+        self.assertEqual(first.status_code, status.HTTP_400_BAD_REQUEST)
+        self.product.quantity = 10
+        self.product.save()
+        retry = self.order(6)
+        self.assertEqual(retry.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(retry.data, first.data)
+        self.assertFalse(Order.objects.exists())
+
+    def test_keys_are_scoped_per_user_and_endpoint(self):
+        self.order(1)
+        other = User.objects.create_user(email="other@example.com", role="buyer")
+        self.client.force_authenticate(user=other)
+        self.assertNotIn("Idempotent-Replayed", self.order(1).headers)
+        res = self.checkout(1)
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn("Idempotent-Replayed", res.headers)
+        self.assertEqual(Order.objects.count(), 3)
+
+    def test_checkout_retry_replays_the_first_response(self):
+        first = self.checkout(2)
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        retry = self.checkout(2)
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry.headers["Idempotent-Replayed"], "true")
+        self.assertEqual(Order.objects.count(), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 3)
+
+    def test_without_header_nothing_is_stored(self):
+        self.client.post(
+            reverse("order-list"),
+            {"product": self.product.id, "quantity": 1},
+            format="json",
+        )
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_expired_key_can_be_reused(self):
+        self.order(1)
+        IdempotencyKey.objects.update(expires_at=timezone.now())
+        self.assertEqual(self.order(1).status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_sweep_deletes_expired_keys(self):
+        self.order(1, key="old")
+        self.order(1, key="new")
+        IdempotencyKey.objects.filter(status_code=201).update(
+            expires_at=timezone.now() + timedelta(hours=1)
+        )
+        old = IdempotencyKey.objects.order_by("created_at").first()
+        old.expires_at = timezone.now() - timedelta(seconds=1)
+        old.save()
+        call_command("sweep_idempotency_keys", batch_size=1, stdout=StringIO())
+        self.assertEqual(IdempotencyKey.objects.count(), 1)
+
+
+class ConcurrentIdempotencyTests(TransactionTestCase):
+    """Many copies of the same request in flight at once create one order."""
+
+    COPIES = 20
+
+    def setUp(self):
+        farmer = User.objects.create_user(email="farmer@example.com", role="farmer")
+        self.buyer = User.objects.create_user(email="buyer@example.com", role="buyer")
+        self.product = Product.objects.create(
+            name="Bananas",
+            price=2,
+            quantity=50,
+            unit="kg",
+            farmer=farmer,
+            category=Category.objects.create(name="Fruits"),
+        )
+
+    def place_order(self, _):
+        client = APIClient()
+        client.force_authenticate(user=self.buyer)
+        try:
+            res = client.post(
+                reverse("order-list"),
+                {"product": self.product.id, "quantity": 1},
+                format="json",
+                HTTP_IDEMPOTENCY_KEY="same-key",
+            )
+            if res.status_code == status.HTTP_409_CONFLICT:
+                # the first copy is still running
+                self.assertIn("Retry-After", res.headers)
+                return res.status_code, None
+            return res.status_code, res.data["id"]
+        finally:
+            connection.close()
+
+    def test_only_one_order_is_created(self):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(self.place_order, range(self.COPIES)))
+
+        codes = {code for code, _ in results}
+        self.assertIn(status.HTTP_201_CREATED, codes)
+        self.assertLessEqual(codes, {status.HTTP_201_CREATED, status.HTTP_409_CONFLICT})
+        created = {
+            order_id for code, order_id in results if code == status.HTTP_201_CREATED
+        }
+        self.assertEqual(len(created), 1)
+        self.assertEqual(Order.objects.count(), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 49)
@@ -0,0 +1,198 @@
+import re
+import tempfile
+from pathlib import Path
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from api.metrics import MetricsRegistry
+from api.models import User, Category, Product
+
+
+def sample(text, name, **labels):
+    """Value of the sample `name{labels}` in a Prometheus text payload."""
+    for line in text.splitlines():
+        match = re.fullmatch(r"(\w+)(?:\{(.*)\})? (\S+)", line)
+        if not match or match[1] != name:
+            continue
+        found = dict(re.findall(r'(\w+)="([^"]*)"', match[2] or ""))
+        if found == labels:
+            return float(match[3])
+    return None
+
+
+@override_settings(
+    METRICS={"DIRECTORY": None},
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}},
+)
+class MetricsEndpointTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser(
+            email="admin@example.com", password="adminpass123"
+        )
+        farmer = User.objects.create_user(
+            email="farmer@example.com", password="farmerpass123", role="farmer"
+        )
+        self.product = Product.objects.create(
+            name="Bananas",
+            price=2,
+            quantity=5,
+            unit="kg",
+            farmer=farmer,
+            category=Category.objects.create(name="Fruits"),
+        )
+
+    def scrape(self):
+        self.client.force_authenticate(self.admin)
+        res = self.client.get(reverse("metrics"))
+        self.client.force_authenticate(None)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res["Content-Type"].startswith("text/plain; version=0.0.4"))
+        return res.content.decode()
+
+    def test_counts_requests_per_route_and_status(self):
+        for _ in range(3):
+            self.client.get(reverse("product-list"))
+        self.client.get(reverse("product-detail", args=[self.product.pk]))
+        self.client.get(reverse("product-detail", args=[self.product.pk + 100]))
+        self.client.get("/api/nowhere/")
+
+        text = self.scrape()
+        total = "api_requests_total"
+        self.assertEqual(
+            sample(text, total, route="product-list", method="GET", status="200"), 3
+        )
+        self.assertEqual(
+            sample(text, total, route="product-detail", method="GET", status="200"), 1
+        )
+        self.assertEqual(
+            sample(text, total, route="product-detail", method="GET", status="404"), 1
+        )
+        self.assertEqual(
+            sample(text, total, route="unmatched", method="GET", status="404"), 1
+        )
+
+    def test_admin_only_unless_public(self):
+        res = self.client.get(reverse("metrics"))
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(
+            res.content, b"Authentication credentials were not provided.\n"
+        )
+        self.client.force_authenticate(self.product.farmer)
+        self.assertEqual(
+            self.client.get(reverse("metrics")).status_code, status.HTTP_403_FORBIDDEN
+        )
+        self.client.force_authenticate(None)
+        with override_settings(METRICS={"DIRECTORY": None, "PUBLIC": True}):
+            res = self.client.get(reverse("metrics"))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_histograms(self):
+        for _ in range(2):
+            self.client.get(reverse("product-detail", args=[self.product.pk]))
+        text = self.scrape()
+
+        name = "api_request_duration_seconds"
+        self.assertEqual(sample(text, f"{name}_count", route="product-detail"), 2)
+        self.assertEqual(
+            sample(text, f"{name}_bucket", route="product-detail", le="+Inf"), 2
+        )
+        self.assertGreater(sample(text, f"{name}_sum", route="product-detail"), 0)
+
+        # conditional validators + the row
+        queries = "api_db_queries_per_request"
+        self.assertEqual(
+            sample(text, f"{queries}_bucket", route="product-detail", le="1.0"), 0
+        )
+        self.assertEqual(
+            sample(text, f"{queries}_bucket", route="product-detail", le="2.0"), 2
+        )
+        self.assertEqual(sample(text, f"{queries}_sum", route="product-detail"), 4)
+        self.assertIn("# TYPE api_db_duration_seconds histogram", text)
+
+    @override_settings(METRICS={"ENABLED": False})
+    def test_disabled(self):
+        self.client.get(reverse("product-list"))
+        self.assertIsNone(
+            sample(
+                self.scrape(),
+                "api_requests_total",
+                route="product-list",
+                method="GET",
+                status="200",
+            )
+        )
+
+
+class MultiProcessTests(TestCase):
+    def test_scrape_adds_up_every_worker(self):
+        with tempfile.TemporaryDirectory() as directory:
+            workers = [MetricsRegistry(directory, flush_interval=60) for _ in range(3)]
+            for n, worker in enumerate(workers, start=1):
+                for _ in range(n):
+                    worker.observe("order-list", "GET", 200, 0.02, 3, 0.004)
+            workers[2].observe("order-list", "POST", 201, 0.2, 8, 0.05)
+            for worker in workers[1:]:
+                worker.flush()
+
+            # workers[0] never flushed, so only it knows its own counts
+            text = workers[0].render()
+            self.assertEqual(
+                sample(
+                    text,
+                    "api_requests_total",
+                    route="order-list",
+                    method="GET",
+                    status="200",
+                ),
+                6,
+            )
+            duration = "api_request_duration_seconds"
+            self.assertEqual(sample(text, f"{duration}_count", route="order-list"), 7)
+            self.assertEqual(
+                sample(text, f"{duration}_bucket", route="order-list", le="0.025"), 6
+            )
+            self.assertAlmostEqual(
+                sample(text, f"{duration}_sum", route="order-list"), 0.32
+            )
+
+            # a flush replaces the worker's file rather than adding to it
+            workers[1].flush()
+            text = workers[1].render()
+            self.assertEqual(sample(text, f"{duration}_count", route="order-list"), 6)
+
+    def test_rolls_into_files_on_its_own(self):
+        with tempfile.TemporaryDirectory() as directory:
+            worker = MetricsRegistry(directory, flush_interval=0)
+            worker.observe("health-check", "GET", 200, 0.001, 0, 0.0)
+            other = MetricsRegistry(directory)
+            self.assertEqual(
+                sample(
+                    other.render(),
+                    "api_requests_total",
+                    route="health-check",
+                    method="GET",
+                    status="200",
+                ),
+                1,
+            )
+
+    def test_idle_worker_flushes_on_a_timer(self):
+        with tempfile.TemporaryDirectory() as directory:
+            worker = MetricsRegistry(directory, flush_interval=0.05)
+            worker.observe("health-check", "GET", 200, 0.001, 0, 0.0)
+            self.assertEqual(list(Path(directory).glob("*.json")), [])
+            worker.timer.join(timeout=1)
+            other = MetricsRegistry(directory)
+            self.assertEqual(
+                sample(
+                    other.render(),
+                    "api_requests_total",
+                    route="health-check",
+                    method="GET",
+                    status="200",
+                ),
+                1,
+            )
@@ -0,0 +1,192 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api import order_states
+from api.models import Category, DailyProductSales, Order, Product, User
+
+
+class OrderTransitionTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser(
+            email="admin@example.com", password="adminpass123"
+        )
+        self.buyer = User.objects.create_user(
+            email="buyer@example.com", password="buyerpass123", role="buyer"
+        )
+        farmer = User.objects.create_user(
+            email="farmer@example.com", password="farmerpass123", role="farmer"
+        )
+        category = Category.objects.create(name="Grains")
+        self.products = [
+            Product.objects.create(
+                name=f"Grain {i}",
+                price=Decimal("3.00"),
+                quantity=0,
+                unit="bag",
+                status="sold",
+                category=category,
+                farmer=farmer,
+            )
+            for i in range(3)
+        ]
+
+    def orders(self, count, status="pending", quantity=2):
+        return Order.objects.bulk_create(
+            Order(
+                buyer=self.buyer,
+                product=self.products[i % len(self.products)],
+                quantity=quantity,
+                total_price=Decimal("3.00") * quantity,
+                status=status,
+            )
+            for i in range(count)
+        )
+
+    def post(self, ids, status, user=None):
+        self.client.force_authenticate(user or self.admin)
+        return self.client.post(
+            reverse("order-transitions"), {"ids": ids, "status": status}, format="json"
+        )
+
+    def statuses(self, orders):
+        return list(
+            Order.objects.filter(pk__in=[o.pk for o in orders])
+            .order_by("pk")
+            .values_list("status", flat=True)
+        )
+
+    def test_state_machine(self):
+        self.assertTrue(order_states.can_transition("pending", "confirmed"))
+        self.assertTrue(order_states.can_transition("confirmed", "cancelled"))
+        self.assertFalse(order_states.can_transition("pending", "delivered"))
+        self.assertFalse(order_states.can_transition("delivered", "cancelled"))
+        self.assertFalse(order_states.can_transition("cancelled", "pending"))
+
+    def test_bulk_confirm_and_deliver(self):
+        orders = self.orders(2000)
+        ids = [order.pk for order in orders]
+
+        response = self.post(ids, "confirmed")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["updated"], ids)
+        self.assertEqual(response.data["failed"], [])
+        self.assertEqual(set(self.statuses(orders)), {"confirmed"})
+        self.assertEqual(
+            sum(DailyProductSales.objects.values_list("orders", flat=True)), 2000
+        )
+
+        response = self.post(ids[:10], "delivered")
+        self.assertEqual(response.data["updated"], ids[:10])
+        self.assertEqual(Order.objects.filter(status="delivered").count(), 10)
+        # still counted once
+        self.assertEqual(
+            sum(DailyProductSales.objects.values_list("orders", flat=True)), 2000
+        )
+
+    def test_set_based_updates(self):
+        ids = [order.pk for order in self.orders(1000)]
+        # 2 chunked SELECTs, 2 chunked UPDATEs, 1 rollup upsert, 2 chunked
+        # delivery job INSERTs, and the savepoints around them
+        with self.assertNumQueries(11):
+            result = order_states.transition(ids, "confirmed")
+        self.assertEqual(len(result.updated), 1000)
+
+    def test_reports_per_id_failures(self):
+        pending, confirmed, delivered, cancelled = (
+            self.orders(1, status=status)[0]
+            for status in ("pending", "confirmed", "delivered", "cancelled")
+        )
+
+        response = self.post(
+            [pending.pk, confirmed.pk, delivered.pk, cancelled.pk, 999999], "delivered"
+        )
+
+        self.assertEqual(response.data["updated"], [confirmed.pk])
+        self.assertEqual(response.data["unchanged"], [delivered.pk])
+        failed = {item["id"]: item["error"] for item in response.data["failed"]}
+        self.assertEqual(set(failed), {pending.pk, cancelled.pk, 999999})
+        self.assertEqual(failed[pending.pk], "Cannot go from pending to delivered.")
+        self.assertEqual(failed[999999], "Order not found.")
+        self.assertEqual(Order.objects.get(pk=pending.pk).status, "pending")
+
+    def test_cancelling_releases_stock_and_sales(self):
+        pending = self.orders(3, status="pending", quantity=2)
+        confirmed = self.orders(3, status="pending", quantity=5)
+        order_states.transition([o.pk for o in confirmed], "confirmed")
+
+        response = self.post([o.pk for o in pending + confirmed], "cancelled")
+
+        self.assertEqual(len(response.data["updated"]), 6)
+        for product in self.products:
+            product.refresh_from_db()
+            self.assertEqual(product.quantity, 7)
+            self.assertEqual(product.status, "available")
+        self.assertEqual(
+            list(DailyProductSales.objects.values_list("orders", "units").distinct()),
+            [(0, 0)],
+        )
+
+    def test_a_concurrent_change_is_not_overwritten(self):
+        orders = self.orders(3)
+        claim = order_states.claim
+
+        def racing(rows, current, target, now):
+            # another request cancels one of them after the read
+            Order.objects.filter(pk=orders[1].pk).update(status="cancelled")
+            return claim(rows, current, target, now)
+
+        with mock.patch("api.order_states.claim", side_effect=racing):
+            result = order_states.transition([o.pk for o in orders], "confirmed")
+
+        self.assertEqual(result.updated, [orders[0].pk, orders[2].pk])
+        self.assertIn(orders[1].pk, result.failed)
+        self.assertEqual(self.statuses(orders), ["confirmed", "cancelled", "confirmed"])
+
+    def test_validation(self):
+        self.assertEqual(self.post([], "confirmed").status_code, 400)
+        self.assertEqual(self.post([1], "shipped").status_code, 400)
+        self.assertEqual(self.post(["x"], "confirmed").status_code, 400)
+        self.assertEqual(self.post([1], "confirmed", user=self.buyer).status_code, 403)
+
+    def test_patch_follows_the_state_machine(self):
+        order = self.orders(1)[0]
+        self.client.force_authenticate(self.admin)
+        url = reverse("order-detail", args=[order.pk])
+
+        response = self.client.patch(url, {"status": "delivered"}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data["status"], ["Cannot go from pending to delivered."]
+        )
+        response = self.client.patch(url, {"status": "confirmed"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["status"], "confirmed")
+
+    def test_admin_actions(self):
+        orders = self.orders(3)
+        self.client.force_login(self.admin)
+        response = self.client.post(
+            reverse("admin:api_order_changelist"),
+            {
+                "action": "mark_confirmed",
+                "_selected_action": [o.pk for o in orders[:2]],
+            },
+            follow=True,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "2 orders marked as confirmed.")
+        self.assertEqual(self.statuses(orders), ["confirmed", "confirmed", "pending"])
+
+        response = self.client.post(
+            reverse("admin:api_order_changelist"),
+            {"action": "mark_delivered", "_selected_action": [orders[2].pk]},
+            follow=True,
+        )
+        self.assertContains(response, "Cannot go from pending to delivered.")
+        self.assertEqual(self.statuses(orders)[2], "pending")
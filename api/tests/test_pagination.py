@@ -0,0 +1,110 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from api.models import User, Category, Product, Order
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.farmer = User.objects.create_user(
+            email="farmer@example.com", password="farmerpass123", role="farmer"
+        )
+        self.buyer = User.objects.create_user(
+            email="buyer@example.com", password="buyerpass123", role="buyer"
+        )
+        self.category = Category.objects.create(name="Fruits")
+        Product.objects.bulk_create(
+            Product(
+                name=f"Product {i}",
+                price=1,
+                quantity=10,
+                unit="kg",
+                farmer=self.farmer,
+                category=self.category,
+            )
+            for i in range(25)
+        )
+        # pairs of products share a timestamp so the id tie-breaker matters
+        now = timezone.now()
+        for i, product in enumerate(Product.objects.order_by("id")):
+            Product.objects.filter(pk=product.pk).update(
+                created_at=now - timedelta(minutes=25 - i // 2)
+            )
+        self.expected = list(
+            Product.objects.order_by("-created_at", "-id").values_list("id", flat=True)
+        )
+
+    def walk(self, url):
+        seen = []
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", res.data)
+            seen.extend(item["id"] for item in res.data["results"])
+            url = res.data["next"]
+        return seen
+
+    def test_default_is_still_page_number(self):
+        res = self.client.get(reverse("product-list"))
+        self.assertEqual(res.data["count"], 25)
+
+    def test_walks_every_product_once_in_order(self):
+        seen = self.walk(reverse("product-list") + "?pagination=cursor")
+        self.assertEqual(seen, self.expected)
+
+    def test_previous_link_returns_previous_page(self):
+        first = self.client.get(reverse("product-list") + "?pagination=cursor")
+        self.assertIsNone(first.data["previous"])
+        second = self.client.get(first.data["next"])
+        back = self.client.get(second.data["previous"])
+        self.assertEqual(
+            [p["id"] for p in back.data["results"]],
+            [p["id"] for p in first.data["results"]],
+        )
+        self.assertIsNotNone(back.data["next"])
+
+    def test_never_counts_the_table(self):
+        url = reverse("product-list") + "?pagination=cursor"
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(url)
+        self.assertFalse(any("COUNT(" in q["sql"].upper() for q in ctx.captured_queries))
+
+    def test_invalid_cursor_returns_404(self):
+        res = self.client.get(reverse("product-list") + "?cursor=garbage")
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_search_and_other_orderings_need_page_numbers(self):
+        url = reverse("product-list")
+        for params in ({"q": "product"}, {"ordering": "price"}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(url, params).status_code, 200)
+                res = self.client.get(url, {**params, "pagination": "cursor"})
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn("pagination", res.data)
+
+        res = self.client.get(url, {"ordering": "newest", "pagination": "cursor"})
+        self.assertEqual([p["id"] for p in res.data["results"]], self.expected[:10])
+
+    def test_buyer_orders_cursor(self):
+        product = Product.objects.first()
+        for _ in range(12):
+            Order.objects.create(
+                buyer=self.buyer, product=product, quantity=1, total_price=1
+            )
+        self.client.force_authenticate(user=self.buyer)
+        seen = self.walk(reverse("order-list") + "?pagination=cursor")
+        self.assertEqual(
+            seen,
+            list(
+                Order.objects.order_by("-created_at", "-id").values_list(
+                    "id", flat=True
+                )
+            ),
+        )
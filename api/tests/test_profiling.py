@@ -0,0 +1,164 @@
+import tempfile
+import threading
+import time
+from io import StringIO
+from collections import Counter
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from api import profiling
+
+
+class ProfilingMiddlewareTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.directory = Path(tmp.name)
+        settings = override_settings(
+            PROFILING={
+                "ENABLED": True,
+                "DIRECTORY": self.directory,
+                "INTERVAL_MS": 1,
+                "MAX_FILES": 3,
+            },
+            CACHES={
+                "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+            },
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        # workers re-read the control file at once instead of once a second
+        patcher = mock.patch.object(profiling, "CONTROL_TTL", 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+
+    def profiles(self):
+        return sorted(self.directory.glob("*.txt"))
+
+    def switch(self, *args):
+        call_command("profiling", *args, stdout=StringIO(), stderr=StringIO())
+
+    def test_idle_until_switched_on(self):
+        self.client.get(reverse("category-list"))
+        self.assertEqual(self.profiles(), [])
+
+        self.switch("on", "--every", "2")
+        for _ in range(4):
+            self.client.get(reverse("category-list"))
+        profiles = self.profiles()
+        self.assertEqual(len(profiles), 2)
+        meta, _ = profiling.read_profile(profiles[0])
+        self.assertEqual(meta["route"], "category-list")
+        self.assertEqual(meta["trigger"], "every")
+        self.assertEqual(meta["status"], "200")
+
+        self.switch("off")
+        self.client.get(reverse("category-list"))
+        self.assertEqual(len(self.profiles()), 2)
+
+    def test_keeps_only_slow_requests(self):
+        self.switch("on", "--slower-than-ms", "60000")
+        self.client.get(reverse("product-list"))
+        self.assertEqual(self.profiles(), [])
+
+        self.switch("on", "--slower-than-ms", "0")
+        self.client.get(reverse("product-list"))
+        meta, _ = profiling.read_profile(self.profiles()[0])
+        self.assertEqual(meta["trigger"], "slow")
+        self.assertEqual(meta["route"], "product-list")
+
+    def test_rotates_oldest_out(self):
+        self.switch("on", "--every", "1")
+        for _ in range(5):
+            self.client.get(reverse("health-check"))
+        self.assertEqual(len(self.profiles()), 3)
+
+    def test_samples_the_request_thread(self):
+        sampler = profiling.Sampler(0.001)
+        thread_id = threading.get_ident()
+        sampler.start(thread_id)
+
+        def busy():
+            deadline = time.perf_counter() + 0.05
+            while time.perf_counter() < deadline:
+                pass
+
+        busy()
+        stacks = sampler.stop(thread_id)
+        self.assertTrue(stacks)
+        top = profiling.hot_functions(stacks)[0][0]
+        self.assertEqual(
+            top,
+            f"{__name__}.{type(self).__name__}.{self._testMethodName}.<locals>.busy",
+        )
+
+    def test_replaced_sampler_thread_exits(self):
+        profiler = profiling.Profiler(self.directory, max_files=3)
+        self.switch("on", "--every", "1", "--interval-ms", "1")
+        handle = profiler.begin()
+        old = handle[0]
+        thread = old.thread
+
+        self.switch("on", "--every", "1", "--interval-ms", "2")
+        current = profiler.begin()
+        self.addCleanup(current[0].stop, current[1])
+        self.assertIsNot(profiler.sampler, old)
+        # still sampling the request it started with
+        self.assertTrue(thread.is_alive())
+        profiler.end(handle, mock.Mock(resolver_match=None), mock.Mock())
+        thread.join(timeout=1)
+        self.assertFalse(thread.is_alive())
+
+    def test_frame_label_without_qualname(self):
+        frame = mock.Mock(f_globals={"__name__": "api.views"})
+        frame.f_code = mock.Mock(spec=["co_name"], co_name="get")
+        self.assertEqual(profiling.frame_label(frame), "api.views.get")
+
+
+class MergeProfilesTests(TestCase):
+    def test_ranks_hot_functions_across_profiles(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            profiler = profiling.Profiler(Path(tmp), max_files=10)
+            profiler.save(
+                Counter({"main;view;serialize": 6, "main;view;query": 2}),
+                route="product-list",
+                duration_ms=40,
+            )
+            profiler.save(
+                Counter({"main;view;query": 4}), route="product-list", duration_ms=20
+            )
+            profiler.save(
+                Counter({"main;login;hash": 50}), route="auth-login", duration_ms=250
+            )
+
+            out = StringIO()
+            call_command(
+                "merge_profiles",
+                "--directory",
+                tmp,
+                "--route",
+                "product-list",
+                "--collapsed",
+                f"{tmp}/merged.collapsed",
+                stdout=out,
+            )
+            lines = out.getvalue().splitlines()
+            self.assertEqual(lines[0], "2 profiles, 12 samples")
+            rows = [line.split() for line in lines[2:]]
+            self.assertEqual(
+                rows[:3],
+                [
+                    ["50.0%", "50.0%", "query"],
+                    ["50.0%", "50.0%", "serialize"],
+                    ["0.0%", "100.0%", "main"],
+                ],
+            )
+            self.assertEqual(
+                Path(f"{tmp}/merged.collapsed").read_text().splitlines(),
+                ["main;view;serialize 6", "main;view;query 6"],
+            )
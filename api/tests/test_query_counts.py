@@ -0,0 +1,206 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from api.models import User, Category, Product, Order, DeliveryJob
+from api.urls import urlpatterns
+
+# Max queries per request, token auth included. Every named route in
+# api/urls.py needs an entry; list endpoints are measured with several
+# pages' worth of rows so a per-row query blows the budget.
+QUERY_BUDGETS = {
+    ("health-check", "get"): 0,
+    ("metrics", "get"): 1,
+    ("slow-query-log", "get"): 1,
+    ("auth-register", "post"): 6,
+    ("auth-login", "post"): 3,
+    ("user-list", "get"): 3,
+    ("user-detail", "get"): 2,
+    ("category-list", "get"): 3,
+    ("category-detail", "get"): 1,
+    ("product-list", "get"): 3,
+    ("product-list", "post"): 5,
+    ("product-detail", "get"): 2,
+    ("order-list", "get"): 3,
+    ("order-list", "post"): 6,
+    ("order-checkout", "post"): 7,
+    ("order-transitions", "post"): 8,
+    ("order-detail", "get"): 2,
+    ("farmer-sales", "get"): 2,
+    ("delivery-list", "get"): 3,
+    ("delivery-assign", "post"): 6,
+}
+
+
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            email="admin@example.com", password="adminpass123"
+        )
+        cls.buyer = User.objects.create_user(
+            email="buyer@example.com", password="buyerpass123", role="buyer"
+        )
+        cls.farmers = [
+            User.objects.create_user(email=f"farmer{i}@example.com", role="farmer")
+            for i in range(5)
+        ]
+        cls.categories = [Category.objects.create(name=f"Cat {i}") for i in range(5)]
+        cls.products = [
+            Product.objects.create(
+                name=f"Product {i}",
+                price=2,
+                quantity=100,
+                unit="kg",
+                farmer=cls.farmers[i % 5],
+                category=cls.categories[i % 5],
+            )
+            for i in range(15)
+        ]
+        cls.orders = [
+            Order.objects.create(
+                buyer=cls.buyer, product=product, quantity=1, total_price=2
+            )
+            for product in cls.products
+        ]
+        cls.transporter, idle = (
+            User.objects.create_user(
+                email=f"transporter{i}@example.com",
+                role="transporter",
+                latitude=6.5,
+                longitude=3.4,
+            )
+            for i in range(2)
+        )
+        # a few pages of jobs for one transporter, and a batch waiting for
+        # the idle one
+        DeliveryJob.objects.bulk_create(
+            DeliveryJob(
+                order=Order.objects.create(
+                    buyer=cls.buyer,
+                    product=cls.products[i % 15],
+                    quantity=1,
+                    total_price=2,
+                    status="confirmed",
+                ),
+                transporter=cls.transporter if i < 30 else None,
+                status="assigned" if i < 30 else "pending",
+                pickup_latitude=6.51,
+                pickup_longitude=3.41,
+            )
+            for i in range(35)
+        )
+        cls.tokens = {
+            user.pk: Token.objects.create(user=user).key
+            for user in [cls.admin, cls.buyer, cls.farmers[0], cls.transporter]
+        }
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def login(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.tokens[user.pk]}")
+
+    def requests(self):
+        """(name, method) -> (user, url, payload) for every budgeted request."""
+        product, order = self.products[0], self.orders[0]
+        return {
+            ("health-check", "get"): (None, reverse("health-check"), None),
+            ("metrics", "get"): (self.admin, reverse("metrics"), None),
+            ("slow-query-log", "get"): (self.admin, reverse("slow-query-log"), None),
+            ("auth-register", "post"): (
+                None,
+                reverse("auth-register"),
+                {"email": "new@example.com", "password": "newpass123", "role": "buyer"},
+            ),
+            ("auth-login", "post"): (
+                None,
+                reverse("auth-login"),
+                {"email": "buyer@example.com", "password": "buyerpass123"},
+            ),
+            ("user-list", "get"): (self.admin, reverse("user-list"), None),
+            ("user-detail", "get"): (
+                self.buyer,
+                reverse("user-detail", args=[self.buyer.pk]),
+                None,
+            ),
+            ("category-list", "get"): (None, reverse("category-list"), None),
+            ("category-detail", "get"): (
+                None,
+                reverse("category-detail", args=[self.categories[0].pk]),
+                None,
+            ),
+            ("product-list", "get"): (None, reverse("product-list"), None),
+            ("product-list", "post"): (
+                self.farmers[0],
+                reverse("product-list"),
+                {
+                    "name": "Yams",
+                    "price": "3.00",
+                    "quantity": 5,
+                    "unit": "kg",
+                    "category": self.categories[0].pk,
+                },
+            ),
+            ("product-detail", "get"): (
+                None,
+                reverse("product-detail", args=[product.pk]),
+                None,
+            ),
+            ("order-list", "get"): (self.admin, reverse("order-list"), None),
+            ("order-list", "post"): (
+                self.buyer,
+                reverse("order-list"),
+                {"product": product.pk, "quantity": 1},
+            ),
+            ("order-checkout", "post"): (
+                self.buyer,
+                reverse("order-checkout"),
+                {
+                    "items": [
+                        {"product": p.pk, "quantity": 1} for p in self.products[:10]
+                    ]
+                },
+            ),
+            ("order-transitions", "post"): (
+                self.admin,
+                reverse("order-transitions"),
+                {"ids": [o.pk for o in self.orders], "status": "cancelled"},
+            ),
+            ("order-detail", "get"): (
+                self.buyer,
+                reverse("order-detail", args=[order.pk]),
+                None,
+            ),
+            ("farmer-sales", "get"): (self.farmers[0], reverse("farmer-sales"), None),
+            ("delivery-list", "get"): (
+                self.transporter,
+                reverse("delivery-list"),
+                None,
+            ),
+            ("delivery-assign", "post"): (self.admin, reverse("delivery-assign"), {}),
+        }
+
+    def test_every_route_has_a_budget(self):
+        budgeted = {name for name, _ in QUERY_BUDGETS}
+        routes = {pattern.name for pattern in urlpatterns}
+        self.assertEqual(routes - budgeted, set())
+        self.assertEqual(set(self.requests()), set(QUERY_BUDGETS))
+
+    def test_query_budgets(self):
+        for (name, method), (user, url, payload) in self.requests().items():
+            with self.subTest(route=name, method=method):
+                self.client.credentials()
+                if user is not None:
+                    self.login(user)
+                with CaptureQueriesContext(connection) as ctx:
+                    res = getattr(self.client, method)(url, payload, format="json")
+                self.assertLess(res.status_code, 300, res.data)
+                budget = QUERY_BUDGETS[(name, method)]
+                self.assertLessEqual(
+                    len(ctx.captured_queries),
+                    budget,
+                    "\n".join(q["sql"] for q in ctx.captured_queries),
+                )
@@ -0,0 +1,180 @@
+import time
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api import replicas
+from api.models import Category, ReplicationHeartbeat, User
+
+REPLICAS = {
+    "ALIASES": ["replica"],
+    "STICKY_SECONDS": 60,
+    "MAX_LAG_SECONDS": 5,
+    "CHECK_INTERVAL": 0,
+}
+
+
+@override_settings(DATABASE_REPLICAS=REPLICAS)
+class ReplicaRoutingTests(TestCase):
+    """
+    "default" and "replica" are two SQLite files. Category 500 exists in
+    both under different names, so a response shows which one served it.
+    """
+
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        caches["default"].clear()
+        replicas.reset_monitor(setting="DATABASE_REPLICAS")
+        self.client = APIClient()
+        self.buyer = User.objects.create_user(
+            email="buyer@example.com", password="buyerpass123", role="buyer"
+        )
+        self.other = User.objects.create_user(
+            email="other@example.com", password="otherpass123", role="buyer"
+        )
+        self.admin = User.objects.create_superuser(
+            email="admin@example.com", password="adminpass123"
+        )
+        # tokens exist on the primary only
+        self.tokens = {
+            user: {"Authorization": f"Token {Token.objects.create(user=user).key}"}
+            for user in (self.buyer, self.other, self.admin)
+        }
+        Category.objects.create(pk=500, name="on primary")
+        Category.objects.using("replica").create(pk=500, name="on replica")
+        now = timezone.now()
+        ReplicationHeartbeat.objects.create(pk=1, beat_at=now)
+        ReplicationHeartbeat.objects.using("replica").create(pk=1, beat_at=now)
+
+    def served_by(self, user=None):
+        headers = self.tokens[user] if user else None
+        response = self.client.get(
+            reverse("category-detail", args=[500]), headers=headers
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()["name"]
+
+    def test_safe_reads_go_to_the_replica(self):
+        self.assertEqual(self.served_by(), "on replica")
+        # authentication read the token from the primary
+        self.assertEqual(self.served_by(self.buyer), "on replica")
+
+    def test_async_reads_go_to_the_replica(self):
+        response = async_to_sync(self.async_client.get)(reverse("category-list"))
+        names = [category["name"] for category in response.json()["results"]]
+        self.assertEqual(names, ["on replica"])
+
+    def test_writes_go_to_the_primary(self):
+        response = self.client.patch(
+            reverse("category-detail", args=[500]),
+            {"description": "updated"},
+            format="json",
+            headers=self.tokens[self.admin],
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["name"], "on primary")
+        self.assertEqual(Category.objects.get(pk=500).description, "updated")
+        self.assertEqual(Category.objects.using("replica").get(pk=500).description, "")
+
+    def test_reads_outside_requests_go_to_the_primary(self):
+        self.assertEqual(Category.objects.get(pk=500).name, "on primary")
+
+    def test_reads_after_a_write_stick_to_the_primary(self):
+        response = self.client.patch(
+            reverse("user-detail", args=[self.buyer.pk]),
+            {"name": "Ama"},
+            format="json",
+            headers=self.tokens[self.buyer],
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.served_by(self.buyer), "on primary")
+        # other users are not affected
+        self.assertEqual(self.served_by(self.other), "on replica")
+        self.assertEqual(self.served_by(), "on replica")
+
+    @override_settings(DATABASE_REPLICAS={**REPLICAS, "STICKY_SECONDS": 1})
+    def test_stickiness_expires(self):
+        self.client.patch(
+            reverse("user-detail", args=[self.buyer.pk]),
+            {"name": "Ama"},
+            format="json",
+            headers=self.tokens[self.buyer],
+        )
+        self.assertEqual(self.served_by(self.buyer), "on primary")
+        time.sleep(1.1)
+        self.assertEqual(self.served_by(self.buyer), "on replica")
+
+    def test_lagging_replica_fails_over_to_the_primary(self):
+        ReplicationHeartbeat.objects.using("replica").filter(pk=1).update(
+            beat_at=timezone.now() - timedelta(seconds=60)
+        )
+        self.assertEqual(self.served_by(), "on primary")
+        self.assertEqual(replicas.get_monitor().status["replica"].healthy, True)
+        self.assertGreater(replicas.get_monitor().status["replica"].lag, 5)
+
+        # the replica catches up
+        ReplicationHeartbeat.objects.using("replica").filter(pk=1).update(
+            beat_at=ReplicationHeartbeat.objects.get(pk=1).beat_at
+        )
+        self.assertEqual(self.served_by(), "on replica")
+
+    def test_reads_do_not_write_the_heartbeat(self):
+        before = ReplicationHeartbeat.objects.get(pk=1).beat_at
+        with mock.patch("api.replicas.write_heartbeat") as write_heartbeat:
+            self.assertEqual(self.served_by(), "on replica")
+        write_heartbeat.assert_not_called()
+        self.assertEqual(ReplicationHeartbeat.objects.get(pk=1).beat_at, before)
+
+    def test_replica_without_a_heartbeat_is_not_used(self):
+        ReplicationHeartbeat.objects.using("replica").all().delete()
+        self.assertEqual(self.served_by(), "on primary")
+        self.assertIsNone(replicas.get_monitor().status["replica"].lag)
+
+    def test_heartbeat_command_writes_the_primary(self):
+        ReplicationHeartbeat.objects.all().delete()
+        replica_beat = ReplicationHeartbeat.objects.using("replica").get(pk=1).beat_at
+        call_command("replication_heartbeat", "--once", stdout=mock.Mock())
+        beat = ReplicationHeartbeat.objects.get(pk=1).beat_at
+        self.assertLess((timezone.now() - beat).total_seconds(), 5)
+        self.assertEqual(
+            ReplicationHeartbeat.objects.using("replica").get(pk=1).beat_at,
+            replica_beat,
+        )
+
+    def test_unreachable_replica_fails_over_to_the_primary(self):
+        read_heartbeat = replicas.read_heartbeat
+
+        def failing(alias):
+            if alias == "replica":
+                raise OperationalError("unable to open database file")
+            return read_heartbeat(alias)
+
+        with mock.patch("api.replicas.read_heartbeat", side_effect=failing):
+            self.assertEqual(self.served_by(), "on primary")
+        status = replicas.get_monitor().status["replica"]
+        self.assertFalse(status.healthy)
+        self.assertIn("unable to open", status.error)
+
+        self.assertEqual(self.served_by(), "on replica")
+
+    def test_checks_are_rate_limited(self):
+        with override_settings(DATABASE_REPLICAS={**REPLICAS, "CHECK_INTERVAL": 60}):
+            with mock.patch.object(
+                replicas.ReplicaMonitor, "check", autospec=True
+            ) as check:
+                check.side_effect = lambda monitor: monitor.status.update(
+                    replica=replicas.ReplicaStatus(healthy=True, lag=0.0)
+                )
+                self.served_by()
+                self.served_by()
+            self.assertEqual(check.call_count, 1)
@@ -0,0 +1,231 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib import admin
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from api import sales
+from api.models import Category, DailyProductSales, Order, Product, User
+
+
+class DailySalesTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser(
+            email="admin@example.com", password="adminpass123"
+        )
+        self.buyer = User.objects.create_user(
+            email="buyer@example.com", password="buyerpass123", role="buyer"
+        )
+        self.farmer = User.objects.create_user(
+            email="farmer@example.com", password="farmerpass123", role="farmer"
+        )
+        self.other_farmer = User.objects.create_user(
+            email="other@example.com", password="otherpass123", role="farmer"
+        )
+        category = Category.objects.create(name="Tubers")
+        self.yam = self.product("Yam", self.farmer, category)
+        self.cassava = self.product("Cassava", self.farmer, category)
+        self.maize = self.product("Maize", self.other_farmer, category)
+        self.today = timezone.localdate()
+
+    def product(self, name, farmer, category):
+        return Product.objects.create(
+            name=name,
+            price=Decimal("2.50"),
+            quantity=1000,
+            unit="kg",
+            category=category,
+            farmer=farmer,
+        )
+
+    def order(self, product, quantity=2, status="pending", days_ago=0):
+        order = Order.objects.create(
+            buyer=self.buyer,
+            product=product,
+            quantity=quantity,
+            total_price=product.price * quantity,
+            status=status,
+        )
+        if days_ago:
+            Order.objects.filter(pk=order.pk).update(
+                created_at=order.created_at - timedelta(days=days_ago)
+            )
+        return order
+
+    def set_status(self, order, *statuses):
+        self.client.force_authenticate(self.admin)
+        for status in statuses:
+            response = self.client.patch(
+                reverse("order-detail", args=[order.pk]),
+                {"status": status},
+                format="json",
+            )
+            self.assertEqual(response.status_code, 200, response.content)
+
+    def rollup(self, product):
+        return list(
+            DailyProductSales.objects.filter(product=product).values_list(
+                "day", "orders", "units", "revenue"
+            )
+        )
+
+    def test_status_changes_update_the_rollup(self):
+        order = self.order(self.yam, quantity=4)
+        self.assertEqual(self.rollup(self.yam), [])
+
+        self.set_status(order, "confirmed")
+        self.assertEqual(self.rollup(self.yam), [(self.today, 1, 4, Decimal("10.00"))])
+
+        self.set_status(order, "delivered")
+        self.assertEqual(self.rollup(self.yam), [(self.today, 1, 4, Decimal("10.00"))])
+
+        other = self.order(self.yam, quantity=2)
+        self.set_status(other, "confirmed")
+        self.assertEqual(self.rollup(self.yam), [(self.today, 2, 6, Decimal("15.00"))])
+
+        self.set_status(other, "cancelled")
+        self.assertEqual(self.rollup(self.yam), [(self.today, 1, 4, Decimal("10.00"))])
+        self.yam.refresh_from_db()
+        self.assertEqual(self.yam.quantity, 1002)
+
+    def test_cancelling_a_pending_order_leaves_the_rollup_alone(self):
+        self.set_status(self.order(self.yam), "cancelled")
+        self.assertEqual(self.rollup(self.yam), [])
+
+    def test_deleting_counted_orders_takes_them_out(self):
+        first, second, third = (self.order(self.yam) for _ in range(3))
+        pending = self.order(self.yam)
+        for order in (first, second, third):
+            self.set_status(order, "confirmed")
+
+        response = self.client.delete(reverse("order-detail", args=[first.pk]))
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.rollup(self.yam), [(self.today, 2, 4, Decimal("10.00"))])
+
+        order_admin = admin.site._registry[Order]
+        order_admin.delete_queryset(None, Order.objects.filter(pk=pending.pk))
+        order_admin.delete_model(None, second)
+        self.assertEqual(self.rollup(self.yam), [(self.today, 1, 2, Decimal("5.00"))])
+        self.assertEqual(Order.objects.get().pk, third.pk)
+
+    def test_backfill_matches_the_incremental_rollup(self):
+        for days_ago in (0, 0, 3, 40):
+            self.set_status(self.order(self.yam, days_ago=days_ago), "confirmed")
+        self.set_status(self.order(self.cassava, days_ago=3), "confirmed", "delivered")
+        self.order(self.cassava, days_ago=3, status="cancelled")
+        self.order(self.maize)
+        fields = ("product", "day", "orders", "units", "revenue")
+        incremental = set(DailyProductSales.objects.values_list(*fields))
+        DailyProductSales.objects.all().delete()
+
+        output = StringIO()
+        call_command("backfill_sales", days_per_batch=7, stdout=output)
+
+        self.assertIn("Wrote 4 daily rollups", output.getvalue())
+        self.assertEqual(
+            set(DailyProductSales.objects.values_list(*fields)), incremental
+        )
+
+    def test_backfill_replaces_only_the_given_days(self):
+        self.set_status(self.order(self.yam, days_ago=10), "confirmed")
+        self.set_status(self.order(self.yam), "confirmed")
+        DailyProductSales.objects.update(orders=99)
+        call_command(
+            "backfill_sales",
+            f"--since={self.today - timedelta(days=1)}",
+            f"--until={self.today}",
+            stdout=StringIO(),
+        )
+        self.assertEqual(
+            dict(DailyProductSales.objects.values_list("day", "orders")),
+            {self.today - timedelta(days=10): 99, self.today: 1},
+        )
+
+    def test_dashboard(self):
+        self.set_status(self.order(self.yam, quantity=4, days_ago=1), "confirmed")
+        self.set_status(self.order(self.yam, quantity=2), "confirmed", "delivered")
+        self.set_status(self.order(self.cassava, quantity=10), "confirmed")
+        self.set_status(self.order(self.maize, quantity=1), "confirmed")
+        self.order(self.yam, quantity=50)
+
+        self.client.force_authenticate(self.farmer)
+        response = self.client.get(reverse("farmer-sales"))
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["farmer"], self.farmer.pk)
+        self.assertEqual(data["end"], self.today.isoformat())
+        self.assertEqual(data["totals"], {"orders": 3, "units": 16, "revenue": "40.00"})
+        cassava, yam = data["products"]
+        self.assertEqual(cassava["product_name"], "Cassava")
+        self.assertEqual(cassava["revenue"], "25.00")
+        self.assertEqual(
+            yam["days"],
+            [
+                {
+                    "day": (self.today - timedelta(days=1)).isoformat(),
+                    "orders": 1,
+                    "units": 4,
+                    "revenue": "10.00",
+                },
+                {
+                    "day": self.today.isoformat(),
+                    "orders": 1,
+                    "units": 2,
+                    "revenue": "5.00",
+                },
+            ],
+        )
+
+        response = self.client.get(
+            reverse("farmer-sales"),
+            {"start": self.today.isoformat(), "product": self.yam.pk},
+        )
+        self.assertEqual(response.json()["totals"]["units"], 2)
+
+    def test_dashboard_access(self):
+        self.set_status(self.order(self.maize), "confirmed")
+        url = reverse("farmer-sales")
+
+        self.client.force_authenticate(self.buyer)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.client.get(url).status_code, 400)
+        response = self.client.get(url, {"farmer": self.other_farmer.pk})
+        self.assertEqual(response.json()["totals"]["orders"], 1)
+
+        # farmers cannot look at someone else's sales
+        self.client.force_authenticate(self.farmer)
+        response = self.client.get(url, {"farmer": self.other_farmer.pk})
+        self.assertEqual(response.json()["totals"]["orders"], 0)
+
+    def test_dashboard_rejects_bad_ranges(self):
+        self.client.force_authenticate(self.farmer)
+        for params in (
+            {"start": "yesterday"},
+            {"start": "2024-02-01", "end": "2024-01-01"},
+            {"start": "2020-01-01", "end": "2024-01-01"},
+            {"product": "yam"},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(reverse("farmer-sales"), params)
+                self.assertEqual(response.status_code, 400)
+
+    def test_record_folds_rows_per_product_and_day(self):
+        now = timezone.now()
+        rows = [
+            (self.yam.pk, self.farmer.pk, now, 1, Decimal("2.50")),
+            (self.yam.pk, self.farmer.pk, now, 3, Decimal("7.50")),
+            (self.cassava.pk, self.farmer.pk, now, 2, Decimal("5.00")),
+        ]
+        with self.assertNumQueries(1):
+            sales.record(rows)
+        sales.record(rows[:1], sign=-1)
+        self.assertEqual(self.rollup(self.yam), [(self.today, 1, 3, Decimal("7.50"))])
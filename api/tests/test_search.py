@@ -0,0 +1,107 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from api.models import User, Category, Product
+from api.search import build_match_query
+
+
+class ProductSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.farmer = User.objects.create_user(
+            email="farmer@example.com", password="farmerpass123", role="farmer"
+        )
+        self.fruits = Category.objects.create(name="Fruits")
+        self.grains = Category.objects.create(name="Grains")
+        self.bananas = Product.objects.create(
+            name="Bananas",
+            description="Sweet yellow fruit",
+            price=10,
+            quantity=5,
+            unit="kg",
+            farmer=self.farmer,
+            category=self.fruits,
+        )
+        self.maize = Product.objects.create(
+            name="Maize",
+            description="Dried maize, good with bananas",
+            price=4,
+            quantity=50,
+            unit="bag",
+            farmer=self.farmer,
+            category=self.grains,
+        )
+
+    def search(self, q):
+        res = self.client.get(reverse("product-list"), {"q": q})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [p["id"] for p in res.data["results"]]
+
+    def test_name_match_ranks_above_description_match(self):
+        self.assertEqual(self.search("bananas"), [self.bananas.id, self.maize.id])
+
+    def test_matches_category_name_and_prefix(self):
+        self.assertEqual(self.search("grains"), [self.maize.id])
+        self.assertEqual(self.search("grai*"), [self.maize.id])
+        self.assertEqual(self.search("grai"), [])
+
+    def test_index_follows_save_and_delete(self):
+        self.bananas.name = "Plantain"
+        self.bananas.save()
+        self.assertEqual(self.search("plantain"), [self.bananas.id])
+
+        self.maize.delete()
+        self.assertEqual(self.search("maize"), [])
+
+    def test_category_rename_reindexes_products(self):
+        self.grains.name = "Cereals"
+        self.grains.save()
+        self.assertEqual(self.search("cereals"), [self.maize.id])
+
+    def test_query_syntax_is_escaped(self):
+        self.assertEqual(build_match_query('ba"na OR (x'), '"ba" "na" "or" "x"')
+        self.assertEqual(self.search('"*()'), [])
+
+    def test_rebuild_command_picks_up_bulk_writes(self):
+        Product.objects.filter(pk=self.maize.pk).update(name="Sorghum")
+        self.assertEqual(self.search("sorghum"), [])
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual(self.search("sorghum"), [self.maize.id])
+
+    def test_search_is_not_keyset_paginated(self):
+        # cursor pages are newest first, which would drop the relevance order
+        res = self.client.get(
+            reverse("product-list"), {"q": "bananas", "pagination": "cursor"}
+        )
+        self.assertEqual(res.status_code, 400)
+
+    @mock.patch("api.search.MAX_CANDIDATES", 3)
+    def test_matches_past_the_ranked_candidates_are_kept(self):
+        newer = [
+            Product.objects.create(
+                name=f"Bananas {i}",
+                price=1,
+                quantity=1,
+                unit="kg",
+                farmer=self.farmer,
+                category=self.fruits,
+            )
+            for i in range(5)
+        ]
+        # the 3 newest matches are ranked, older ones follow newest first
+        self.assertEqual(
+            self.search("bananas"),
+            [p.id for p in newer[:1:-1]]
+            + [p.id for p in newer[1::-1]]
+            + [self.maize.id, self.bananas.id],
+        )
+        res = self.client.get(
+            reverse("product-list"), {"q": "bananas", "category": self.grains.id}
+        )
+        self.assertEqual(res.data["count"], 1)
+        self.assertEqual(res.data["results"][0]["id"], self.maize.id)
@@ -0,0 +1,122 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from rest_framework import status
+from api import slow_queries
+from api.models import User, Category, Product
+
+
+class SlowQueryLogTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name) / "slow.log"
+        self.log_settings(THRESHOLD_MS=0)
+        # the test connection was opened before the threshold was set
+        slow_queries.install(connection)
+        self.addCleanup(
+            connection.execute_wrappers.remove, slow_queries.record_slow_query
+        )
+
+        farmer = User.objects.create_user(
+            email="farmer@example.com", password="farmerpass123", role="farmer"
+        )
+        self.product = Product.objects.create(
+            name="Bananas",
+            price=2,
+            quantity=5,
+            unit="kg",
+            farmer=farmer,
+            category=Category.objects.create(name="Fruits"),
+        )
+        slow_queries.clear()
+
+    def log_settings(self, **options):
+        settings = override_settings(SLOW_QUERY_LOG={"FILE": self.path, **options})
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_logs_sql_call_site_and_plan(self):
+        list(Product.objects.filter(quantity__gt=1))
+        [entry] = slow_queries.read()
+        self.assertIn('FROM "api_product"', entry["sql"])
+        self.assertEqual(entry["params"], [1])
+        self.assertEqual(entry["alias"], "default")
+        self.assertRegex(
+            entry["call_site"],
+            r"^api/tests/test_slow_queries\.py:\d+ in test_logs_sql_call_site_and_plan$",
+        )
+        # no index on quantity: a full scan
+        self.assertEqual(entry["plan"], ["SCAN api_product"])
+
+        Product.objects.filter(pk=self.product.pk).exists()
+        newest = slow_queries.read(limit=1)[0]
+        self.assertIn("USING INTEGER PRIMARY KEY", newest["plan"][0])
+
+    def test_credentials_are_masked(self):
+        user = User.objects.create_user(email="buyer@example.com", password="secret")
+        token = Token.objects.create(user=user)
+        User.objects.filter(pk=user.pk).update(name="Ada")
+        list(Token.objects.filter(key=token.key))
+        list(User.objects.filter(password=user.password))
+        list(User.objects.filter(email=user.email))
+
+        entries = slow_queries.read()
+        logged = json.dumps(entries)
+        self.assertNotIn(token.key, logged)
+        self.assertNotIn(user.password, logged)
+        self.assertEqual(entries[0]["params"], [user.email])
+        # the hash, the token key and the update's name and id
+        self.assertEqual(entries[1]["params"], [slow_queries.MASK])
+        self.assertEqual(entries[2]["params"], [slow_queries.MASK])
+        self.assertTrue(entries[3]["sql"].startswith('UPDATE "api_user"'))
+        self.assertEqual(entries[3]["params"], [slow_queries.MASK] * 2)
+
+    def test_queries_under_the_threshold_are_not_logged(self):
+        self.log_settings(THRESHOLD_MS=60_000)
+        list(Product.objects.all())
+        self.assertEqual(slow_queries.read(), [])
+
+    def test_log_is_bounded(self):
+        self.log_settings(THRESHOLD_MS=0, MAX_BYTES=2000, BACKUPS=1)
+        for _ in range(20):
+            list(Product.objects.filter(quantity__gt=1))
+        self.assertTrue(Path(f"{self.path}.1").exists())
+        self.assertFalse(Path(f"{self.path}.2").exists())
+        total = self.path.stat().st_size + Path(f"{self.path}.1").stat().st_size
+        self.assertLessEqual(total, 4000)
+        self.assertLess(len(slow_queries.read()), 20)
+
+    def test_admin_endpoint(self):
+        list(Product.objects.filter(quantity__gt=1))
+        client = APIClient()
+        buyer = User.objects.create_user(email="buyer@example.com", role="buyer")
+        client.force_authenticate(user=buyer)
+        res = client.get(reverse("slow-query-log"))
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        admin = User.objects.create_superuser(
+            email="admin@example.com", password="adminpass123"
+        )
+        client.force_authenticate(user=admin)
+        res = client.get(reverse("slow-query-log"), {"limit": 500})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["threshold_ms"], 0)
+        self.assertTrue(
+            any("SCAN api_product" in (e["plan"] or []) for e in res.data["results"])
+        )
+
+    def test_command(self):
+        list(Product.objects.filter(quantity__gt=1))
+        out = StringIO()
+        call_command("slow_queries", "--clear", stdout=out)
+        self.assertIn("plan: SCAN api_product", out.getvalue())
+        self.assertEqual(slow_queries.read(), [])
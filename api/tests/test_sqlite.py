@@ -0,0 +1,88 @@
+import os
+import runpy
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from api import sqlite
+
+PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "busy_timeout": 1234,
+    "cache_size": -2048,
+    "mmap_size": 1048576,
+}
+
+
+class SQLitePragmaTests(TestCase):
+    def new_connection(self):
+        connection = connections.create_connection("default")
+        self.addCleanup(connection.close)
+        connection.ensure_connection()
+        return connection
+
+    @override_settings(SQLITE_PRAGMAS=PRAGMAS)
+    def test_new_connections_get_the_pragmas(self):
+        connection = self.new_connection()
+        self.assertEqual(
+            sqlite.current(connection, PRAGMAS),
+            {
+                "journal_mode": "wal",
+                "synchronous": 1,  # NORMAL
+                "busy_timeout": 1234,
+                "cache_size": -2048,
+                "mmap_size": 1048576,
+            },
+        )
+
+    @override_settings(SQLITE_PRAGMAS={"journal_mode": "wal"})
+    def test_pragmas_are_not_recorded_as_queries(self):
+        connection = self.new_connection()
+        connection.force_debug_cursor = True
+        connection.close()
+        connection.ensure_connection()
+        self.assertEqual(connection.queries, [])
+
+    def test_profiles(self):
+        default = settings.DATABASE_PROFILES["default"]
+        production = settings.DATABASE_PROFILES["production"]
+        self.assertEqual(default["CONN_MAX_AGE"], 0)
+        self.assertEqual(default["PRAGMAS"]["journal_mode"], "delete")
+        self.assertGreater(production["CONN_MAX_AGE"], 0)
+        self.assertTrue(production["CONN_HEALTH_CHECKS"])
+        self.assertEqual(production["PRAGMAS"]["journal_mode"], "wal")
+
+    def test_profile_from_the_environment(self):
+        settings_file = settings.BASE_DIR / "config" / "settings.py"
+        with patch.dict(os.environ):
+            os.environ.pop("DATABASE_PROFILE", None)
+            loaded = runpy.run_path(settings_file)
+            self.assertEqual(loaded["DATABASE_PROFILE"], "default")
+            self.assertEqual(loaded["DATABASES"]["default"]["CONN_MAX_AGE"], 0)
+
+            os.environ["DATABASE_PROFILE"] = "prod"
+            with self.assertRaisesMessage(
+                ImproperlyConfigured, "use one of: default, production."
+            ):
+                runpy.run_path(settings_file)
+
+
+class PragmaStatementTests(SimpleTestCase):
+    def test_busy_timeout_goes_first(self):
+        self.assertEqual(
+            list(sqlite.statements({"journal_mode": "wal", "busy_timeout": 10})),
+            ["PRAGMA busy_timeout = 10", "PRAGMA journal_mode = wal"],
+        )
+
+    def test_rejects_anything_but_a_name_and_a_value(self):
+        for pragmas in (
+            {"journal_mode": "wal; DROP TABLE api_user"},
+            {"journal_mode = wal; --": "x"},
+        ):
+            with self.subTest(pragmas=pragmas):
+                with self.assertRaises(ValueError):
+                    list(sqlite.statements(pragmas))
@@ -0,0 +1,230 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from api.models import User, Category, Product, Order
+
+
+class StockTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_superuser(
+            email="admin@example.com", password="adminpass123"
+        )
+        self.buyer = User.objects.create_user(
+            email="buyer@example.com", password="buyerpass123", role="buyer"
+        )
+        farmer = User.objects.create_user(
+            email="farmer@example.com", password="farmerpass123", role="farmer"
+        )
+        self.product = Product.objects.create(
+            name="Bananas",
+            price=2,
+            quantity=5,
+            unit="kg",
+            farmer=farmer,
+            category=Category.objects.create(name="Fruits"),
+        )
+
+    def order(self, quantity):
+        self.client.force_authenticate(user=self.buyer)
+        return self.client.post(
+            reverse("order-list"),
+            {"product": self.product.id, "quantity": quantity},
+            format="json",
+        )
+
+    def test_order_decrements_stock_and_sells_out(self):
+        self.assertEqual(self.order(3).status_code, status.HTTP_201_CREATED)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 2)
+        self.assertEqual(self.product.status, "available")
+
+        self.assertEqual(self.order(2).status_code, status.HTTP_201_CREATED)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 0)
+        self.assertEqual(self.product.status, "sold")
+
+    def test_cannot_order_more_than_stock(self):
+        res = self.order(6)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("quantity", res.data)
+        self.assertFalse(Order.objects.exists())
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 5)
+
+    def test_zero_quantity_rejected(self):
+        self.assertEqual(self.order(0).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_cancel_restores_stock_once(self):
+        order_id = self.order(5).data["id"]
+        self.client.force_authenticate(user=self.admin)
+        url = reverse("order-detail", args=[order_id])
+        for _ in range(2):
+            res = self.client.patch(url, {"status": "cancelled"}, format="json")
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 5)
+        self.assertEqual(self.product.status, "available")
+
+        res = self.client.patch(url, {"status": "pending"}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CheckoutTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.buyer = User.objects.create_user(
+            email="buyer@example.com", password="buyerpass123", role="buyer"
+        )
+        farmer = User.objects.create_user(
+            email="farmer@example.com", password="farmerpass123", role="farmer"
+        )
+        category = Category.objects.create(name="Fruits")
+        self.products = [
+            Product.objects.create(
+                name=f"Product {i}",
+                price=i + 1,
+                quantity=10,
+                unit="kg",
+                farmer=farmer,
+                category=category,
+            )
+            for i in range(60)
+        ]
+        self.client.force_authenticate(user=self.buyer)
+
+    def checkout(self, items):
+        return self.client.post(
+            reverse("order-checkout"), {"items": items}, format="json"
+        )
+
+    def test_places_one_order_per_line(self):
+        res = self.checkout(
+            [
+                {"product": self.products[0].id, "quantity": 2},
+                {"product": self.products[1].id, "quantity": 10},
+            ]
+        )
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        orders = res.data["orders"]
+        self.assertEqual([o["quantity"] for o in orders], [2, 10])
+        self.assertEqual([o["total_price"] for o in orders], ["2.00", "20.00"])
+        self.assertEqual(orders[1]["product_name"], "Product 1")
+        self.assertEqual(orders[0]["buyer"], self.buyer.id)
+
+        self.products[1].refresh_from_db()
+        self.assertEqual(self.products[1].quantity, 0)
+        self.assertEqual(self.products[1].status, "sold")
+
+    def test_all_or_nothing(self):
+        res = self.checkout(
+            [
+                {"product": self.products[0].id, "quantity": 2},
+                {"product": self.products[1].id, "quantity": 6},
+                # the same product twice: 6 + 6 > 10
+                {"product": self.products[1].id, "quantity": 6},
+            ]
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            res.data["items"],
+            [
+                {},
+                {"quantity": ["Not enough stock available."]},
+                {"quantity": ["Not enough stock available."]},
+            ],
+        )
+        self.assertFalse(Order.objects.exists())
+        self.products[0].refresh_from_db()
+        self.assertEqual(self.products[0].quantity, 10)
+
+    def test_only_short_lines_are_flagged(self):
+        Product.objects.filter(pk=self.products[1].pk).update(quantity=1)
+        res = self.checkout(
+            [
+                {"product": self.products[0].id, "quantity": 6},
+                {"product": self.products[1].id, "quantity": 5},
+            ]
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            res.data["items"], [{}, {"quantity": ["Not enough stock available."]}]
+        )
+        self.products[0].refresh_from_db()
+        self.assertEqual(self.products[0].quantity, 10)
+
+    def test_unknown_product_rejected(self):
+        res = self.checkout([{"product": 9999, "quantity": 1}])
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data["items"][0]["product"], ["Product not found."])
+
+    def test_cost_does_not_grow_with_cart_size(self):
+        def queries(products):
+            with CaptureQueriesContext(connection) as ctx:
+                res = self.checkout(
+                    [{"product": p.id, "quantity": 1} for p in products]
+                )
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(queries(self.products[:1]), queries(self.products[10:60]))
+
+    def test_buyer_only(self):
+        self.client.force_authenticate(user=None)
+        res = self.checkout([{"product": self.products[0].id, "quantity": 1}])
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class ConcurrentOrderStressTests(TransactionTestCase):
+    """Hundreds of buyers racing for the same product through the real view."""
+
+    STOCK = 50
+    ORDERS = 300
+
+    def setUp(self):
+        farmer = User.objects.create_user(email="farmer@example.com", role="farmer")
+        self.buyers = [
+            User.objects.create_user(email=f"buyer{i}@example.com", role="buyer")
+            for i in range(10)
+        ]
+        self.product = Product.objects.create(
+            name="Bananas",
+            price=2,
+            quantity=self.STOCK,
+            unit="kg",
+            farmer=farmer,
+            category=Category.objects.create(name="Fruits"),
+        )
+
+    def place_order(self, i):
+        client = APIClient()
+        client.force_authenticate(user=self.buyers[i % len(self.buyers)])
+        try:
+            return client.post(
+                reverse("order-list"),
+                {"product": self.product.id, "quantity": 1},
+                format="json",
+            ).status_code
+        finally:
+            connection.close()
+
+    def test_no_overselling_under_concurrency(self):
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            codes = list(pool.map(self.place_order, range(self.ORDERS)))
+
+        created = codes.count(status.HTTP_201_CREATED)
+        self.assertEqual(created, self.STOCK)
+        self.assertEqual(
+            codes.count(status.HTTP_400_BAD_REQUEST), self.ORDERS - self.STOCK
+        )
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.quantity, 0)
+        self.assertEqual(self.product.status, "sold")
+        sold = sum(Order.objects.values_list("quantity", flat=True))
+        self.assertEqual(sold, self.STOCK)
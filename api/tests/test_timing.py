@@ -0,0 +1,131 @@
+import json
+import time
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework import status
+from api.fast_serializers import ValuesSerializer
+from api.serializers import OrderSerializer
+from api.timing import install_query_recorder
+from api.models import User, Category, Product, Order
+
+PHASES = ("db", "auth", "view", "serialize", "render")
+
+
+def slow(function):
+    def wrapper(*args):
+        time.sleep(0.02)
+        return function(*args)
+
+    return wrapper
+
+
+def parse_server_timing(header):
+    timings = {}
+    for entry in header.split(", "):
+        name, *params = entry.split(";")
+        timings[name] = dict(param.split("=", 1) for param in params)
+    return timings
+
+
+@override_settings(
+    SERVER_TIMING={"SAMPLE_RATE": 1.0},
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}},
+)
+class ServerTimingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.buyer = User.objects.create_user(
+            email="buyer@example.com", password="buyerpass123", role="buyer"
+        )
+        farmer = User.objects.create_user(
+            email="farmer@example.com", password="farmerpass123", role="farmer"
+        )
+        product = Product.objects.create(
+            name="Bananas",
+            price=2,
+            quantity=5,
+            unit="kg",
+            farmer=farmer,
+            category=Category.objects.create(name="Fruits"),
+        )
+        self.order = Order.objects.create(
+            buyer=self.buyer, product=product, quantity=1, total_price=2
+        )
+
+    def get(self, url):
+        # every sampled request logs a line; keep it off the test output
+        with self.assertLogs("api.timing", level="INFO"):
+            return self.client.get(url)
+
+    def test_header_breaks_down_the_request(self):
+        self.client.force_authenticate(user=self.buyer)
+        res = self.get(reverse("order-list"))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        timings = parse_server_timing(res["Server-Timing"])
+        self.assertEqual(list(timings), [*PHASES, "total"])
+        # page count + page rows
+        self.assertEqual(timings["db"]["desc"], '"2 queries"')
+        parts = sum(float(timings[p]["dur"]) for p in PHASES)
+        self.assertAlmostEqual(parts, float(timings["total"]["dur"]), delta=0.05)
+
+    def test_serialization_is_its_own_phase(self):
+        self.client.force_authenticate(user=self.buyer)
+        with patch(
+            "api.serializers.OrderSerializer.to_representation",
+            side_effect=slow(OrderSerializer.to_representation),
+            autospec=True,
+        ):
+            res = self.get(reverse("order-detail", args=[self.order.pk]))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        timings = parse_server_timing(res["Server-Timing"])
+        self.assertGreaterEqual(float(timings["serialize"]["dur"]), 20)
+        self.assertLess(float(timings["view"]["dur"]), 20)
+
+        # the fast list path
+        with patch(
+            "api.fast_serializers.ValuesSerializer.accessors",
+            side_effect=slow(ValuesSerializer.accessors),
+            autospec=True,
+        ):
+            res = self.get(reverse("order-list"))
+        timings = parse_server_timing(res["Server-Timing"])
+        self.assertGreater(float(timings["serialize"]["dur"]), 0)
+
+    def test_logs_one_line_per_request(self):
+        self.client.force_authenticate(user=self.buyer)
+        with self.assertLogs("api.timing", level="INFO") as logs:
+            self.client.get(reverse("order-list"))
+        self.assertEqual(len(logs.records), 1)
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line["route"], "order-list")
+        self.assertEqual(line["method"], "GET")
+        self.assertEqual(line["status"], 200)
+        self.assertEqual(line["queries"], 2)
+        self.assertEqual(
+            set(line),
+            {"route", "method", "path", "status", "queries"}
+            | {f"{p}_ms" for p in (*PHASES, "total")},
+        )
+
+    def test_async_views_are_timed(self):
+        # a server loads its middleware before opening any connection; the
+        # test connection is older than the async client's middleware and
+        # belongs to another thread, so it would not get the wrapper
+        install_query_recorder(connection)
+        with self.assertLogs("api.timing", level="INFO"):
+            res = async_to_sync(self.async_client.get)(reverse("product-list"))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        timings = parse_server_timing(res["Server-Timing"])
+        self.assertIn('queries"', timings["db"]["desc"])
+        self.assertNotEqual(timings["db"]["desc"], '"0 queries"')
+
+    @override_settings(SERVER_TIMING={"SAMPLE_RATE": 0})
+    def test_disabled_by_default(self):
+        res = self.client.get(reverse("product-list"))
+        self.assertNotIn("Server-Timing", res)
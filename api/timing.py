@@ -0,0 +1,149 @@
+"""
+Per-request timing breakdown, reported as a Server-Timing header and a
+structured log line (see api.middleware.server_timing_middleware).
+
+For a sampled request the middleware puts a RequestTimings in a context
+variable; the pieces below add to it:
+
+- db: every query, through a wrapper installed on each new connection
+  (query count and time)
+- auth: DRF's initial() (authentication, permissions, throttles), via
+  TimedViewMixin
+- serialize: turning instances into primitives (a serializer's .data or
+  the fast list path), via TimedViewMixin and api.fast_serializers
+- render: turning the Response into bytes, via TimedViewMixin
+- view: the rest of the request, i.e. view code, querysets and validation
+
+Each phase excludes the DB time spent inside it, so the parts add up to
+the total. api.middleware.metrics_middleware sets a RequestTimings for
+every request, for its per-route query counts; without it, unsampled
+requests leave the context variable unset and pay for one ContextVar
+lookup per query.
+"""
+
+import contextvars
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+DEFAULTS = {
+    # fraction of requests to time; 0 removes the middleware entirely
+    "SAMPLE_RATE": 0.0,
+    "LOGGER": "api.timing",
+}
+
+current = contextvars.ContextVar("request_timings", default=None)
+
+
+def get_setting(name):
+    return getattr(settings, "SERVER_TIMING", {}).get(name, DEFAULTS[name])
+
+
+class RequestTimings:
+    phases = ("auth", "db", "view", "serialize", "render")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.total = None
+        self.queries = 0
+        self.durations = dict.fromkeys(self.phases, 0.0)
+
+    def finish(self):
+        self.total = time.perf_counter() - self.start
+        measured = sum(self.durations[p] for p in self.phases if p != "view")
+        self.durations["view"] = max(self.total - measured, 0.0)
+
+    def header(self):
+        parts = [
+            f'db;dur={self.durations["db"] * 1000:.2f};desc="{self.queries} queries"'
+        ]
+        parts += [
+            f"{phase};dur={self.durations[phase] * 1000:.2f}"
+            for phase in self.phases
+            if phase != "db"
+        ]
+        parts.append(f"total;dur={self.total * 1000:.2f}")
+        return ", ".join(parts)
+
+    def as_dict(self):
+        data = {
+            f"{phase}_ms": round(d * 1000, 2) for phase, d in self.durations.items()
+        }
+        data["queries"] = self.queries
+        data["total_ms"] = round(self.total * 1000, 2)
+        return data
+
+
+def record_query(execute, sql, params, many, context):
+    timings = current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries += 1
+        timings.durations["db"] += time.perf_counter() - start
+
+
+def install_query_recorder(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def phase(name):
+    timings = current.get()
+    if timings is None:
+        yield
+        return
+    start, db_before = time.perf_counter(), timings.durations["db"]
+    try:
+        yield
+    finally:
+        db_spent = timings.durations["db"] - db_before
+        timings.durations[name] += time.perf_counter() - start - db_spent
+
+
+def timed_serializer(serializer):
+    """Time the serializer's to_representation() (and so .data) as `serialize`."""
+    to_representation = serializer.to_representation
+
+    def timed(instance):
+        with phase("serialize"):
+            return to_representation(instance)
+
+    serializer.to_representation = timed
+    return serializer
+
+
+class TimedViewMixin:
+    """
+    Report DRF auth/permission checks, serialization and rendering as their
+    own phases.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        with phase("auth"):
+            super().initial(request, *args, **kwargs)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        if current.get() is None:
+            return serializer
+        return timed_serializer(serializer)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        timings = current.get()
+        if timings is not None and hasattr(response, "add_post_render_callback"):
+            # Django renders the response right after the view returns
+            start, db_before = time.perf_counter(), timings.durations["db"]
+
+            def rendered(response):
+                db_spent = timings.durations["db"] - db_before
+                timings.durations["render"] += time.perf_counter() - start - db_spent
+
+            response.add_post_render_callback(rendered)
+        return response
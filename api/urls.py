@@ -3,6 +3,8 @@ from .views import (
     HealthCheckView,
     RegisterAPIView,
     LoginAPIView,
+    MetricsView,
+    SlowQueryLogView,
     UserListAPIView,
     UserDetailAPIView,
     CategoryDetailAPIView,
@@ -10,11 +12,18 @@ from .views import (
     ProductListCreateAPIView,
     ProductDetailAPIView,
     OrderListCreateAPIView,
+    CheckoutAPIView,
+    OrderTransitionAPIView,
     OrderDetailAPIView,
+    FarmerSalesAPIView,
+    DeliveryJobListAPIView,
+    DeliveryAssignAPIView,
 )
 
 urlpatterns = [
     path("health/", HealthCheckView.as_view(), name="health-check"),
+    path("metrics/", MetricsView.as_view(), name="metrics"),
+    path("admin/slow-queries/", SlowQueryLogView.as_view(), name="slow-query-log"),
     # Authentication
     path("auth/register/", RegisterAPIView.as_view(), name="auth-register"),
     path("auth/login/", LoginAPIView.as_view(), name="auth-login"),
@@ -31,5 +40,20 @@ urlpatterns = [
     path("products/<int:pk>/", ProductDetailAPIView.as_view(), name="product-detail"),
     # Orders
     path("orders/", OrderListCreateAPIView.as_view(), name="order-list"),
+    path("orders/checkout/", CheckoutAPIView.as_view(), name="order-checkout"),
+    path(
+        "orders/transitions/",
+        OrderTransitionAPIView.as_view(),
+        name="order-transitions",
+    ),
     path("orders/<int:pk>/", OrderDetailAPIView.as_view(), name="order-detail"),
+    # Sales
+    path("sales/daily/", FarmerSalesAPIView.as_view(), name="farmer-sales"),
+    # Deliveries
+    path("deliveries/", DeliveryJobListAPIView.as_view(), name="delivery-list"),
+    path(
+        "deliveries/assign/",
+        DeliveryAssignAPIView.as_view(),
+        name="delivery-assign",
+    ),
 ]
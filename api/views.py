@@ -1,8 +1,9 @@
 from rest_framework.permissions import IsAdminUser, AllowAny
 from rest_framework.authtoken.models import Token
 from rest_framework.response import Response
-from rest_framework import status, generics
+from rest_framework import status, generics, serializers
 from rest_framework.views import APIView
+from asgiref.sync import sync_to_async
 
 from .serializers import (
     RegisterSerializer,
@@ -10,20 +11,80 @@ from .serializers import (
     UserSerializer,
     CategorySerializer,
 )
-from .models import User, Category, Product, Order
+from .models import User, Category, Product, Order, DeliveryJob
 from .permissions import IsFarmerOrAdminOwner
 from .serializers import ProductSerializer
-from .serializers import OrderSerializer
+from .serializers import OrderSerializer, OrderUpdateSerializer, CheckoutSerializer
+from .serializers import OrderTransitionSerializer
+from .serializers import DeliveryJobSerializer, DeliveryAssignSerializer
 from .permissions import IsBuyerOrAdmin
-from .permissions import IsAdminOrSelf
+from .permissions import IsAdminOrSelf, IsFarmerOrAdmin, IsTransporterOrAdmin
+from .pagination import OptInKeysetPagination
+from .search import search_products
+from .conditional import ConditionalGetMixin
+from .cache import CachedResponseMixin
+from .filters import (
+    ProductFilterBackend,
+    order_date_range,
+    parse_id,
+    product_facets,
+    sales_date_range,
+)
+from .archive import order_model
+from .idempotency import IdempotentPostMixin
+from .async_generics import AsyncListModelMixin, AsyncRetrieveModelMixin
+from .fast_serializers import FastListMixin
+from .replicas import ReplicaReadMixin
+from .timing import TimedViewMixin
+from . import assignment, metrics, order_states, sales, slow_queries
+from .metrics import CONTENT_TYPE, PrometheusRenderer, get_registry
 
 
-class HealthCheckView(APIView):
+class HealthCheckView(TimedViewMixin, APIView):
     def get(self, request):
         return Response({"status": "ok"}, status=status.HTTP_200_OK)
 
 
-class RegisterAPIView(APIView):
+class MetricsView(TimedViewMixin, APIView):
+    """
+    GET /api/metrics/ -> admin only (anyone with METRICS["PUBLIC"]); request
+    counts and latency/query histograms per route, in the Prometheus text
+    format (all workers when METRICS_DIR is set)
+    """
+
+    renderer_classes = [PrometheusRenderer]
+
+    def get_permissions(self):
+        if metrics.get_setting("PUBLIC"):
+            return [AllowAny()]
+        return [IsAdminUser()]
+
+    def get(self, request):
+        return Response(get_registry().render(), content_type=CONTENT_TYPE)
+
+
+class SlowQueryLogView(TimedViewMixin, APIView):
+    """
+    GET /api/admin/slow-queries/?limit=50 -> admin only; the slow-query log,
+    newest first (see api/slow_queries.py)
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get("limit", 50))
+        except ValueError:
+            limit = 50
+        return Response(
+            {
+                "threshold_ms": slow_queries.get_setting("THRESHOLD_MS"),
+                "results": slow_queries.read(limit=max(limit, 1)),
+            }
+        )
+
+
+class RegisterAPIView(TimedViewMixin, APIView):
     """
     POST /api/auth/register/
     - Create a new user (farmer/buyer/transporter)
@@ -43,7 +104,7 @@ class RegisterAPIView(APIView):
         )
 
 
-class LoginAPIView(APIView):
+class LoginAPIView(TimedViewMixin, APIView):
     """
     POST /api/auth/login/
     - Returns token + user object for valid credentials
@@ -59,7 +120,9 @@ class LoginAPIView(APIView):
         return Response({"token": token.key, "user": UserSerializer(user).data})
 
 
-class UserListAPIView(generics.ListAPIView):
+class UserListAPIView(
+    TimedViewMixin, ReplicaReadMixin, FastListMixin, generics.ListAPIView
+):
     """
     GET /api/users/  -- admin only
     """
@@ -69,7 +132,9 @@ class UserListAPIView(generics.ListAPIView):
     serializer_class = UserSerializer
 
 
-class UserDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
+class UserDetailAPIView(
+    TimedViewMixin, ReplicaReadMixin, generics.RetrieveUpdateDestroyAPIView
+):
     """
     GET / PUT / DELETE /api/users/{id}/
     - GET: admin or owner
@@ -82,14 +147,23 @@ class UserDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [IsAdminOrSelf]
 
 
-class CategoryListCreateAPIView(generics.ListCreateAPIView):
+class CategoryListCreateAPIView(
+    TimedViewMixin,
+    ReplicaReadMixin,
+    CachedResponseMixin,
+    ConditionalGetMixin,
+    FastListMixin,
+    AsyncListModelMixin,
+    generics.ListCreateAPIView,
+):
     """
-    GET /api/categories/  -> list all categories (public)
+    GET /api/categories/  -> list all categories (public, cached, ETag/Last-Modified)
     POST /api/categories/ -> create new category (admin only)
     """
 
     queryset = Category.objects.all().order_by("name")
     serializer_class = CategorySerializer
+    cache_dependencies = (Category,)
 
     def get_permissions(self):
         if self.request.method == "POST":
@@ -97,7 +171,9 @@ class CategoryListCreateAPIView(generics.ListCreateAPIView):
         return [AllowAny()]
 
 
-class CategoryDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
+class CategoryDetailAPIView(
+    TimedViewMixin, ReplicaReadMixin, generics.RetrieveUpdateDestroyAPIView
+):
     """
     GET /api/categories/<id>/  -> public
     PUT/PATCH/DELETE -> admin only
@@ -112,58 +188,180 @@ class CategoryDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
         return [AllowAny()]
 
 
-class ProductListCreateAPIView(generics.ListCreateAPIView):
+class ProductListCreateAPIView(
+    TimedViewMixin,
+    ReplicaReadMixin,
+    CachedResponseMixin,
+    ConditionalGetMixin,
+    IdempotentPostMixin,
+    FastListMixin,
+    AsyncListModelMixin,
+    generics.ListCreateAPIView,
+):
     """
-    GET /api/products/ -> public list
-    POST /api/products/ -> only farmers or admin
+    GET /api/products/ -> public list (cached, ETag/Last-Modified)
+        (?pagination=cursor switches to keyset pagination)
+        (?q=<text> full-text search, best matches first)
+        (?category=&min_price=&max_price=&unit=&status=&ordering= filters,
+         ?facets=true adds counts per category/status/price bucket)
+    POST /api/products/ -> only farmers or admin (honours Idempotency-Key)
     """
 
-    queryset = Product.objects.all().order_by("-created_at")
+    # category_name is serialized for every row
+    queryset = Product.objects.select_related("category").order_by("-created_at")
     serializer_class = ProductSerializer
     permission_classes = [IsFarmerOrAdminOwner]
+    pagination_class = OptInKeysetPagination
+    filter_backends = [ProductFilterBackend]
+    conditional_timestamp_fields = ("updated_at", "category__updated_at")
+    cache_dependencies = (Product, Category)
+    cache_row_model = Product
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        q = self.request.query_params.get("q", "").strip()
+        if q:
+            queryset = search_products(queryset, q)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if self.wants_facets():
+            response.data["facets"] = product_facets(
+                self.filter_queryset(self.get_queryset())
+            )
+        return response
+
+    async def alist(self, request, *args, **kwargs):
+        response = await super().alist(request, *args, **kwargs)
+        if self.wants_facets():
+            queryset = await self.aget_filtered_queryset()
+            response.data["facets"] = await sync_to_async(product_facets)(queryset)
+        return response
+
+    def wants_facets(self):
+        return self.request.query_params.get("facets") in ("1", "true")
 
     def perform_create(self, serializer):
         serializer.save(farmer=self.request.user)
 
 
-class ProductDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
+class ProductDetailAPIView(
+    TimedViewMixin,
+    ReplicaReadMixin,
+    CachedResponseMixin,
+    ConditionalGetMixin,
+    AsyncRetrieveModelMixin,
+    generics.RetrieveUpdateDestroyAPIView,
+):
     """
-    GET /api/products/<id>/ -> public
+    GET /api/products/<id>/ -> public (cached, ETag/Last-Modified)
     PUT/PATCH/DELETE -> only product owner (farmer) or admin
     """
 
-    queryset = Product.objects.all()
+    queryset = Product.objects.select_related("category")
     serializer_class = ProductSerializer
     permission_classes = [IsFarmerOrAdminOwner]
-
-
-class OrderListCreateAPIView(generics.ListCreateAPIView):
+    conditional_timestamp_fields = ("updated_at", "category__updated_at")
+    cache_dependencies = (Product, Category)
+    cache_row_model = Product
+
+
+class OrderListCreateAPIView(
+    TimedViewMixin,
+    ReplicaReadMixin,
+    IdempotentPostMixin,
+    FastListMixin,
+    AsyncListModelMixin,
+    generics.ListCreateAPIView,
+):
     """
     GET /api/orders/ -> buyer sees their orders, admin sees all
-    POST /api/orders/ -> buyer only
+        (?pagination=cursor switches to keyset pagination)
+        (?created_after=&created_before= ISO dates or datetimes; only these
+         reach archived orders)
+    POST /api/orders/ -> buyer only (honours Idempotency-Key)
     """
 
     serializer_class = OrderSerializer
     permission_classes = [IsBuyerOrAdmin]
+    pagination_class = OptInKeysetPagination
 
     def get_queryset(self):
         user = self.request.user
+        created_after, created_before = order_date_range(self.request.query_params)
+        # product_name is serialized for every row
+        orders = order_model(created_after, created_before).objects.select_related(
+            "product"
+        )
+        if created_after is not None:
+            orders = orders.filter(created_at__gte=created_after)
+        if created_before is not None:
+            orders = orders.filter(created_at__lt=created_before)
         if user.is_staff:
-            return Order.objects.all().order_by("-created_at")
-        return Order.objects.filter(buyer=user).order_by("-created_at")
+            return orders.order_by("-created_at")
+        return orders.filter(buyer=user).order_by("-created_at")
+
+
+class CheckoutAPIView(TimedViewMixin, IdempotentPostMixin, generics.CreateAPIView):
+    """
+    POST /api/orders/checkout/ -> buyer only (honours Idempotency-Key)
+    - body: {"items": [{"product": <id>, "quantity": <n>}, ...]}
+    - places one order per line, all or nothing
+    - returns {"orders": [...]}
+    """
+
+    permission_classes = [IsBuyerOrAdmin]
+    serializer_class = CheckoutSerializer
 
 
-class OrderDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
+class OrderTransitionAPIView(TimedViewMixin, APIView):
+    """
+    POST /api/orders/transitions/ -> admin only
+    - body: {"ids": [<id>, ...], "status": "confirmed"|"delivered"|"cancelled"}
+    - moves every order that can make the move (pending -> confirmed ->
+      delivered, pending/confirmed -> cancelled) in one transaction
+    - returns {"status", "updated": [...], "unchanged": [...],
+      "failed": [{"id", "error"}, ...]}
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        serializer = OrderTransitionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        target = serializer.validated_data["status"]
+        result = order_states.transition(serializer.validated_data["ids"], target)
+        return Response(
+            {
+                "status": target,
+                "updated": result.updated,
+                "unchanged": result.unchanged,
+                "failed": [
+                    {"id": pk, "error": error} for pk, error in result.failed.items()
+                ],
+            }
+        )
+
+
+class OrderDetailAPIView(
+    TimedViewMixin, ReplicaReadMixin, generics.RetrieveUpdateDestroyAPIView
+):
     """
     GET /api/orders/<id>/ -> buyer sees own, admin sees all
-    PUT/PATCH -> admin can update status, buyer cannot
+    PUT/PATCH -> admin can update status, buyer cannot (cancelling restocks)
     DELETE -> admin only
     """
 
-    queryset = Order.objects.all()
+    queryset = Order.objects.select_related("product")
     serializer_class = OrderSerializer
     permission_classes = [IsBuyerOrAdmin]
 
+    def get_serializer_class(self):
+        if self.request.method in ("PUT", "PATCH"):
+            return OrderUpdateSerializer
+        return OrderSerializer
+
     def update(self, request, *args, **kwargs):
         # only admins can update order status/delivery_date
         if not request.user.is_staff:
@@ -181,3 +379,76 @@ class OrderDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
         return super().destroy(request, *args, **kwargs)
+
+    def perform_destroy(self, instance):
+        sales.delete_orders(Order.objects.filter(pk=instance.pk))
+
+
+class FarmerSalesAPIView(TimedViewMixin, ReplicaReadMixin, APIView):
+    """
+    GET /api/sales/daily/ -> farmers see their own sales, admins pass ?farmer=<id>
+        (?start=&end= days, inclusive, default the last 30; ?product=<id>)
+    - orders, units and revenue per product and day, from the daily rollups
+      (confirmed and delivered orders)
+    """
+
+    permission_classes = [IsFarmerOrAdmin]
+
+    def get(self, request):
+        params = request.query_params
+        start, end = sales_date_range(params)
+        if request.user.is_staff:
+            farmer_id = parse_id(params, "farmer", required=True)
+        else:
+            farmer_id = request.user.pk
+        product_id = parse_id(params, "product")
+        return Response(sales.dashboard(farmer_id, start, end, product_id))
+
+
+class DeliveryJobListAPIView(
+    TimedViewMixin, ReplicaReadMixin, FastListMixin, generics.ListAPIView
+):
+    """
+    GET /api/deliveries/ -> transporters see the jobs assigned to them,
+        admins see all (?status=pending|assigned|delivered|cancelled)
+    """
+
+    serializer_class = DeliveryJobSerializer
+    permission_classes = [IsTransporterOrAdmin]
+    statuses = {value for value, _ in DeliveryJob.STATUS_CHOICES}
+
+    def get_queryset(self):
+        jobs = DeliveryJob.objects.order_by("-created_at", "-id")
+        if not self.request.user.is_staff:
+            jobs = jobs.filter(transporter=self.request.user)
+        status_param = self.request.query_params.get("status")
+        if status_param:
+            if status_param not in self.statuses:
+                raise serializers.ValidationError(
+                    {"status": f"Expected one of {', '.join(sorted(self.statuses))}."}
+                )
+            jobs = jobs.filter(status=status_param)
+        return jobs
+
+
+class DeliveryAssignAPIView(TimedViewMixin, APIView):
+    """
+    POST /api/deliveries/assign/ -> admin only; one assignment round
+    (see api/assignment.py)
+    - body (optional): {"limit": <n>} pending jobs to consider, oldest first
+    - returns {"assigned", "transporters", "unmatched"}
+    """
+
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        serializer = DeliveryAssignSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        result = assignment.assign(serializer.validated_data.get("limit"))
+        return Response(
+            {
+                "assigned": result.assigned,
+                "transporters": result.transporters,
+                "unmatched": result.unmatched,
+            }
+        )
@@ -0,0 +1,95 @@
+"""
+Read throughput through the WSGI handler (DRF views, a thread per
+in-flight request) vs the ASGI handler (async read views, one event loop).
+
+    python -m benchmarks.asgi_reads [--requests 2000] [--concurrency 32]
+        [--no-cache] [--slow-client-ms 50 --wsgi-threads 8]
+
+Both run in-process through Django's test clients, so the numbers exclude
+the server and network. --no-cache disables the response cache so every
+request queries.
+
+--slow-client-ms models clients that take that long to receive each
+response. A WSGI worker thread is held for the whole time, so only
+--wsgi-threads requests make progress at once; the ASGI loop awaits the
+write and keeps serving the other --concurrency clients.
+"""
+
+import argparse
+
+from benchmarks.common import percentile, run_asgi, run_wsgi, setup_django
+
+
+def seed():
+    from rest_framework.authtoken.models import Token
+    from api.models import Category, Order, Product, User
+
+    farmer = User.objects.create_user(email="bench-farmer@example.com", role="farmer")
+    buyer = User.objects.create_user(email="bench-buyer@example.com", role="buyer")
+    categories = [Category.objects.create(name=f"Category {i}") for i in range(10)]
+    Product.objects.bulk_create(
+        Product(
+            name=f"Product {i}",
+            price=i % 100 + 1,
+            quantity=100,
+            unit="kg",
+            farmer=farmer,
+            category=categories[i % len(categories)],
+        )
+        for i in range(5000)
+    )
+    product = Product.objects.first()
+    Order.objects.bulk_create(
+        Order(buyer=buyer, product=product, quantity=1, total_price=1)
+        for _ in range(200)
+    )
+    return product.pk, Token.objects.create(user=buyer).key
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--slow-client-ms", type=float, default=0)
+    parser.add_argument("--wsgi-threads", type=int, help="default: --concurrency")
+    args = parser.parse_args()
+    slow_client = args.slow_client_ms / 1000
+    runs = (
+        ("WSGI", run_wsgi, args.wsgi_threads or args.concurrency),
+        ("ASGI", run_asgi, args.concurrency),
+    )
+
+    setup_django()
+
+    from django.test.utils import override_settings
+    from django.urls import reverse
+
+    product_id, token = seed()
+    cases = [
+        ("product list", [reverse("product-list") + f"?page={p}" for p in (1, 2, 3)]),
+        ("product detail", [reverse("product-detail", args=[product_id])]),
+        ("category list", [reverse("category-list")]),
+        ("buyer order list", [reverse("order-list")]),
+    ]
+    headers = {"Authorization": f"Token {token}"}
+
+    caches = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+    with override_settings(**({"CACHES": caches} if args.no_cache else {})):
+        for label, urls in cases:
+            for handler, run, concurrency in runs:
+                samples, elapsed = run(
+                    lambda i: ("get", urls[i % len(urls)], None, headers),
+                    args.requests,
+                    concurrency,
+                    slow_client,
+                )
+                print(
+                    f"{label + ' ' + handler:<28} {len(samples) / elapsed:8.1f} req/s "
+                    f"p50={percentile(samples, 50) * 1000:8.2f}ms "
+                    f"p95={percentile(samples, 95) * 1000:8.2f}ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+One delivery assignment round (api/assignment.py) over a country's worth
+of open jobs and transporters.
+
+    python -m benchmarks.assignment [--jobs 100000] [--transporters 10000]
+        [--towns 60] [--scan-sample 200]
+
+Jobs and transporters are scattered around --towns towns, as real pickups
+cluster around markets. The round is timed per step (load, match, write)
+and summarized: how many jobs were assigned, how many transporters they
+went to and how far those travel to their pickups.
+
+The grid is then checked against a matcher that scans every pair: both
+must agree on a subset, and the scan's time for its first --scan-sample
+seeds is extrapolated to the full round.
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from benchmarks.common import setup_django
+
+BATCH = 5000
+
+
+def towns(count, rng):
+    # roughly Nigeria
+    return [(rng.uniform(4.5, 13), rng.uniform(3, 14)) for _ in range(count)]
+
+
+def around(centres, rng, spread=0.15):
+    lat, lon = rng.choice(centres)
+    return lat + rng.gauss(0, spread), lon + rng.gauss(0, spread)
+
+
+def seed(jobs, transporters, centres, rng):
+    from api.models import Category, DeliveryJob, Order, Product, User
+
+    buyer = User.objects.create_user(email="bench-buyer@example.com", role="buyer")
+    farmer = User.objects.create_user(email="bench-farmer@example.com", role="farmer")
+    product = Product.objects.create(
+        name="Bench yams",
+        price=1,
+        quantity=0,
+        unit="kg",
+        farmer=farmer,
+        category=Category.objects.create(name="Bench"),
+    )
+    for start in range(0, jobs, BATCH):
+        orders = Order.objects.bulk_create(
+            Order(
+                buyer=buyer,
+                product=product,
+                quantity=1,
+                total_price=1,
+                status="confirmed",
+            )
+            for _ in range(start, min(jobs, start + BATCH))
+        )
+        DeliveryJob.objects.bulk_create(
+            DeliveryJob(
+                order=order,
+                pickup_latitude=lat,
+                pickup_longitude=lon,
+            )
+            for order, (lat, lon) in ((o, around(centres, rng)) for o in orders)
+        )
+    for start in range(0, transporters, BATCH):
+        User.objects.bulk_create(
+            User(
+                email=f"bench-transporter{i}@example.com",
+                role="transporter",
+                latitude=lat,
+                longitude=lon,
+            )
+            for i, (lat, lon) in (
+                (i, around(centres, rng, spread=0.3))
+                for i in range(start, min(transporters, start + BATCH))
+            )
+        )
+
+
+def scan_match(jobs, transporters, max_pickup_km, batch_radius_km, seeds=None):
+    """api.assignment.match() without the grid: every seed scans every row."""
+    from api.assignment import distance_km
+
+    taken = [False] * len(jobs)
+    spare = [row[3] for row in transporters]
+    assignments = {}
+    for seed, (job_id, lat, lon) in enumerate(jobs[:seeds]):
+        if taken[seed]:
+            continue
+        nearest, best = None, max_pickup_km
+        for t, (_, t_lat, t_lon, _) in enumerate(transporters):
+            if spare[t]:
+                km = distance_km(lat, lon, t_lat, t_lon)
+                if km <= best:
+                    nearest, best = t, km
+        if nearest is None:
+            continue
+        batch = [(0.0, seed)]
+        if spare[nearest] > 1:
+            for j, (_, j_lat, j_lon) in enumerate(jobs):
+                if j != seed and not taken[j]:
+                    km = distance_km(lat, lon, j_lat, j_lon)
+                    if km <= batch_radius_km:
+                        batch.append((km, j))
+            batch.sort()
+        for _, j in batch[: spare[nearest]]:
+            taken[j] = True
+            assignments[jobs[j][0]] = transporters[nearest][0]
+        spare[nearest] -= min(len(batch), spare[nearest])
+    return assignments
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=100_000)
+    parser.add_argument("--transporters", type=int, default=10_000)
+    parser.add_argument("--towns", type=int, default=60)
+    parser.add_argument("--scan-sample", type=int, default=200)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from api import assignment
+    from api.models import DeliveryJob
+
+    rng = random.Random(1)
+    centres = towns(args.towns, rng)
+    start = time.perf_counter()
+    seed(args.jobs, args.transporters, centres, rng)
+    print(
+        f"{args.jobs:,} open jobs, {args.transporters:,} transporters around "
+        f"{args.towns} towns (seeded in {time.perf_counter() - start:.1f}s)"
+    )
+
+    jobs = assignment.load_jobs()
+    transporters = assignment.load_transporters(assignment.get_setting("CAPACITY"))
+    max_pickup_km = assignment.get_setting("MAX_PICKUP_KM")
+    batch_radius_km = assignment.get_setting("BATCH_RADIUS_KM")
+
+    result = assignment.assign()
+    for step, seconds in result.timings.items():
+        print(f"{step:<40} {seconds * 1000:10.1f}ms")
+    print(f"{'round':<40} {sum(result.timings.values()) * 1000:10.1f}ms")
+
+    located = {pk: (lat, lon) for pk, lat, lon, _ in transporters}
+    pickups = {pk: (lat, lon) for pk, lat, lon in jobs}
+    held = DeliveryJob.objects.filter(status="assigned").values_list(
+        "pk", "transporter_id"
+    )
+    distances = [
+        assignment.distance_km(*pickups[pk], *located[transporter])
+        for pk, transporter in held
+    ]
+    print(
+        f"assigned {result.assigned:,} jobs to {result.transporters:,} transporters "
+        f"({result.assigned / max(result.transporters, 1):.2f} each), "
+        f"{result.unmatched:,} unmatched"
+    )
+    print(
+        f"transporter to pickup: mean {statistics.mean(distances):.1f}km, "
+        f"max {max(distances):.1f}km"
+    )
+
+    subset_jobs, subset_transporters = jobs[: len(jobs) // 20], transporters[:500]
+    assert scan_match(
+        subset_jobs, subset_transporters, max_pickup_km, batch_radius_km
+    ) == assignment.match(
+        subset_jobs, subset_transporters, max_pickup_km, batch_radius_km
+    ), "the grid and the scan disagree"
+
+    start = time.perf_counter()
+    scan_match(jobs, transporters, max_pickup_km, batch_radius_km, args.scan_sample)
+    per_seed = (time.perf_counter() - start) / args.scan_sample
+    # a round has a seed per batch, so at least one per transporter used,
+    # plus one per unmatched job
+    seeds = result.transporters + result.unmatched
+    print(
+        f"{'pair scan, extrapolated':<40} >={per_seed * seeds * 1000:9.1f}ms "
+        f"({seeds:,}+ seeds at {per_seed * 1000:.1f}ms)"
+    )
+    print(f"{'grid match':<40} {result.timings['match'] * 1000:10.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
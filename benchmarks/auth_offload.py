@@ -0,0 +1,118 @@
+"""
+Catalog read latency while logins are hashing passwords, through ASGI.
+
+    python -m benchmarks.auth_offload [--logins 64] [--concurrency 8]
+
+Runs `GET /api/products/` in a loop while `--concurrency` clients keep
+logging in, three ways:
+
+- catalog only (baseline)
+- logins hashing on the shared sync thread, which is what the old DRF
+  views did under ASGI
+- logins hashing in the bounded pool (api/hashing.py)
+
+With the hash on the sync thread every catalog read queues behind ~100ms
+hashes; with the pool, reads stay close to the baseline.
+"""
+
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import report, setup_django
+
+
+class SyncThreadPool:
+    """Stand-in for HashingPool that hashes where a sync view would."""
+
+    async def run(self, fn, *args):
+        from asgiref.sync import sync_to_async
+
+        return await sync_to_async(fn)(*args)
+
+
+async def mixed(client, logins, concurrency):
+    from django.urls import reverse
+
+    catalog_url = reverse("product-list")
+    login_url = reverse("auth-login")
+    body = {"email": "bench-buyer@example.com", "password": "benchpass123"}
+    codes = []
+    done = asyncio.Event()
+
+    async def login_client(count):
+        for _ in range(count):
+            response = await client.post(
+                login_url, body, content_type="application/json"
+            )
+            codes.append(response.status_code)
+
+    async def reader():
+        samples = []
+        while not done.is_set():
+            start = time.perf_counter()
+            response = await client.get(catalog_url)
+            assert response.status_code == 200, response.status_code
+            samples.append(time.perf_counter() - start)
+        return samples
+
+    reading = asyncio.create_task(reader())
+    start = time.perf_counter()
+    if logins:
+        per_client = max(1, logins // concurrency)
+        await asyncio.gather(*(login_client(per_client) for _ in range(concurrency)))
+    else:
+        await asyncio.sleep(2)
+    elapsed = time.perf_counter() - start
+    done.set()
+    return await reading, codes, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.test import AsyncClient
+    from api import async_views
+    from api.models import Category, Product, User
+
+    User.objects.create_user(
+        email="bench-buyer@example.com", password="benchpass123", role="buyer"
+    )
+    farmer = User.objects.create_user(email="bench-farmer@example.com", role="farmer")
+    category = Category.objects.create(name="Bench")
+    Product.objects.bulk_create(
+        Product(
+            name=f"Product {i}",
+            price=1,
+            quantity=1,
+            unit="kg",
+            farmer=farmer,
+            category=category,
+        )
+        for i in range(100)
+    )
+    client = AsyncClient()
+
+    cases = [
+        ("catalog only", 0, async_views.get_pool),
+        ("logins on the sync thread", args.logins, SyncThreadPool),
+        ("logins in the hashing pool", args.logins, async_views.get_pool),
+    ]
+    for label, logins, get_pool in cases:
+        async_views.get_pool = get_pool
+        samples, codes, elapsed = asyncio.run(mixed(client, logins, args.concurrency))
+        report(f"catalog read, {label}", samples)
+        if codes:
+            print(
+                f"{'':<40} {len(codes) / elapsed:8.1f} logins/s, "
+                f"{codes.count(429)} x 429"
+            )
+
+
+if __name__ == "__main__":
+    main()
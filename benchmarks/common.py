@@ -0,0 +1,121 @@
+"""
+Shared helpers for the standalone benchmark scripts.
+
+Run them from the repo root, e.g. `python -m benchmarks.pagination`.
+Each script works against a throwaway test database, never db.sqlite3.
+"""
+
+import asyncio
+import os
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def setup_django(test_db_name=None):
+    """Configure Django and create a fresh test database to benchmark against."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+    # measure what deployments run; the baselines were taken with it
+    os.environ.setdefault("DATABASE_PROFILE", "production")
+
+    import django
+    from django.conf import settings
+
+    if test_db_name:
+        settings.DATABASES["default"].setdefault("TEST", {})["NAME"] = test_db_name
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment(debug=False)
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+
+def measure(fn, repeat=50, warmup=5):
+    """Call `fn` repeatedly and return the wall-clock samples in seconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(label, samples):
+    print(
+        f"{label:<40} p50={statistics.median(samples) * 1000:8.3f}ms "
+        f"p95={percentile(samples, 95) * 1000:8.3f}ms"
+    )
+
+
+def send(client, method, path, data=None, headers=None):
+    """Issue one request through a Django test client (sync or async)."""
+    if data is None:
+        return getattr(client, method)(path, headers=headers)
+    return getattr(client, method)(
+        path, data, content_type="application/json", headers=headers
+    )
+
+
+def run_wsgi(make_request, requests, threads, slow_client=0):
+    """
+    Send `requests` requests through the WSGI handler from `threads` threads,
+    each with its own test client. make_request(i) returns (method, path,
+    data, headers). Returns (latency samples in seconds, elapsed seconds).
+    """
+    from django.db import connection
+    from django.test import Client
+
+    def worker(offset):
+        client = Client()
+        samples = []
+        try:
+            for i in range(offset, requests, threads):
+                start = time.perf_counter()
+                response = send(client, *make_request(i))
+                assert response.status_code < 400, (response.status_code, i)
+                samples.append(time.perf_counter() - start)
+                time.sleep(slow_client)
+        finally:
+            connection.close()
+        return samples
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        start = time.perf_counter()
+        results = list(pool.map(worker, range(threads)))
+        elapsed = time.perf_counter() - start
+    return [s for samples in results for s in samples], elapsed
+
+
+def run_asgi(make_request, requests, concurrency, slow_client=0):
+    """As run_wsgi(), through the ASGI handler with `concurrency` tasks."""
+    from django.test import AsyncClient
+
+    async def worker(client, offset):
+        samples = []
+        for i in range(offset, requests, concurrency):
+            start = time.perf_counter()
+            response = await send(client, *make_request(i))
+            assert response.status_code < 400, (response.status_code, i)
+            samples.append(time.perf_counter() - start)
+            await asyncio.sleep(slow_client)
+        return samples
+
+    async def main():
+        client = AsyncClient()
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(worker(client, offset) for offset in range(concurrency))
+        )
+        return [s for samples in results for s in samples], time.perf_counter() - start
+
+    return asyncio.run(main())
@@ -0,0 +1,359 @@
+"""
+Latency and throughput of every route in api/urls.py, under WSGI and ASGI,
+checked against a stored baseline.
+
+    python -m benchmarks.endpoints [--users 2000] [--requests 300]
+        [--concurrency 8] [--only product-list,order-list]
+        [--baseline benchmarks/baselines/endpoints.json] [--tolerance 0.5]
+        [--save-baseline] [--output results.json]
+
+The database is filled by `manage.py generate_marketplace_data --seed 1`,
+plus a buyer, farmer and admin with tokens. Each (route, method) in CASES
+gets --requests requests (scaled by the case's share, so password hashing
+routes do not dominate the run), sent by --concurrency in-process clients:
+threads through the WSGI handler, then tasks through the ASGI handler.
+POST cases create new rows on every request.
+
+Every case is warmed up, then run --rounds times; it reports the median
+over rounds of p50/p95/p99 and requests per second. With a baseline file,
+a case regresses when its p50 is more than --tolerance slower, its p95
+more than --tail-tolerance slower (both by at least --min-delta-ms, so
+sub-millisecond noise does not count) or its throughput more than
+--tolerance lower; the run then exits with status 1, as it does for a
+case missing from the baseline. --save-baseline writes this run as the
+new baseline (with --only, just those routes' cases).
+Baselines only compare runs on the same machine and settings; the
+committed one is from a single-CPU box.
+"""
+
+import argparse
+import itertools
+import json
+import statistics
+import sys
+from io import StringIO
+from pathlib import Path
+
+from benchmarks.common import percentile, run_asgi, run_wsgi, setup_django
+
+BASELINE = Path(__file__).parent / "baselines" / "endpoints.json"
+
+# (route, method) -> share of --requests
+CASES = {
+    ("health-check", "get"): 1,
+    ("metrics", "get"): 1,
+    ("slow-query-log", "get"): 1,
+    ("auth-register", "post"): 0.1,
+    ("auth-login", "post"): 0.1,
+    ("user-list", "get"): 1,
+    ("user-detail", "get"): 1,
+    ("category-list", "get"): 1,
+    ("category-detail", "get"): 1,
+    ("product-list", "get"): 1,
+    ("product-list", "post"): 0.5,
+    ("product-detail", "get"): 1,
+    ("order-list", "get"): 1,
+    ("order-list", "post"): 0.5,
+    ("order-checkout", "post"): 0.5,
+    ("order-transitions", "post"): 0.5,
+    ("order-detail", "get"): 1,
+    ("farmer-sales", "get"): 1,
+    ("delivery-list", "get"): 1,
+    ("delivery-assign", "post"): 0.1,
+}
+
+
+def seed(users):
+    from django.core.management import call_command
+    from rest_framework.authtoken.models import Token
+    from api import order_states
+    from api.models import Category, Order, Product, User
+
+    call_command("generate_marketplace_data", users=users, seed=1, stdout=StringIO())
+    admin = User.objects.create_superuser(
+        email="bench-admin@example.com", password="benchpass123"
+    )
+    buyer = User.objects.create_user(
+        email="bench-buyer@example.com", password="benchpass123", role="buyer"
+    )
+    farmer = User.objects.create_user(
+        email="bench-farmer@example.com", password="benchpass123", role="farmer"
+    )
+    transporter = User.objects.create_user(
+        email="bench-transporter@example.com",
+        password="benchpass123",
+        role="transporter",
+    )
+    category = Category.objects.first()
+    # enough stock that no order or checkout runs out
+    stocked = [
+        Product.objects.create(
+            name=f"Bench stock {i}",
+            price=2,
+            quantity=10**9,
+            unit="kg",
+            farmer=farmer,
+            category=category,
+        )
+        for i in range(5)
+    ]
+    orders = Order.objects.bulk_create(
+        Order(buyer=buyer, product=stocked[0], quantity=1, total_price=2)
+        for _ in range(30)
+    )
+    confirmed = Order.objects.bulk_create(
+        Order(buyer=buyer, product=stocked[1], quantity=1, total_price=2)
+        for _ in range(30)
+    )
+    order_states.transition([order.pk for order in confirmed], "confirmed")
+    tokens = {
+        user: {"Authorization": f"Token {Token.objects.create(user=user).key}"}
+        for user in (admin, buyer, farmer, transporter)
+    }
+    return {
+        "admin": tokens[admin],
+        "buyer": tokens[buyer],
+        "farmer": tokens[farmer],
+        "transporter": tokens[transporter],
+        "buyer_id": buyer.pk,
+        "category_id": category.pk,
+        "stocked": [product.pk for product in stocked],
+        "product_ids": list(
+            Product.objects.filter(status="available").values_list("pk", flat=True)[:50]
+        ),
+        "order_ids": [order.pk for order in orders],
+        "confirmed_ids": [order.pk for order in confirmed],
+    }
+
+
+def request_makers(fixtures):
+    """(route, method) -> make_request(i) -> (method, path, data, headers)."""
+    from django.urls import reverse
+
+    admin, buyer, farmer = fixtures["admin"], fixtures["buyer"], fixtures["farmer"]
+    product_ids, order_ids = fixtures["product_ids"], fixtures["order_ids"]
+    stocked = fixtures["stocked"]
+    registrations = itertools.count()
+    product_pages = [
+        "",
+        "?page=2",
+        "?pagination=cursor",
+        "?q=cassava",
+        f"?category={fixtures['category_id']}&ordering=price",
+        "?facets=true",
+    ]
+
+    def get(route, headers=None, args=None):
+        return lambda i: ("get", reverse(route, args=args), None, headers)
+
+    return {
+        ("health-check", "get"): get("health-check"),
+        ("metrics", "get"): get("metrics", admin),
+        ("slow-query-log", "get"): get("slow-query-log", admin),
+        ("auth-register", "post"): lambda i: (
+            "post",
+            reverse("auth-register"),
+            {
+                "email": f"bench-new{next(registrations)}@example.com",
+                "password": "benchpass123",
+                "role": "buyer",
+            },
+            None,
+        ),
+        ("auth-login", "post"): lambda i: (
+            "post",
+            reverse("auth-login"),
+            {"email": "bench-buyer@example.com", "password": "benchpass123"},
+            None,
+        ),
+        ("user-list", "get"): get("user-list", admin),
+        ("user-detail", "get"): get("user-detail", buyer, args=[fixtures["buyer_id"]]),
+        ("category-list", "get"): get("category-list"),
+        ("category-detail", "get"): get(
+            "category-detail", args=[fixtures["category_id"]]
+        ),
+        ("product-list", "get"): lambda i: (
+            "get",
+            reverse("product-list") + product_pages[i % len(product_pages)],
+            None,
+            None,
+        ),
+        ("product-list", "post"): lambda i: (
+            "post",
+            reverse("product-list"),
+            {
+                "name": f"Bench yams {i}",
+                "price": "3.00",
+                "quantity": 5,
+                "unit": "kg",
+                "category": fixtures["category_id"],
+            },
+            farmer,
+        ),
+        ("product-detail", "get"): lambda i: (
+            "get",
+            reverse("product-detail", args=[product_ids[i % len(product_ids)]]),
+            None,
+            None,
+        ),
+        ("order-list", "get"): get("order-list", buyer),
+        ("order-list", "post"): lambda i: (
+            "post",
+            reverse("order-list"),
+            {"product": stocked[i % len(stocked)], "quantity": 1},
+            buyer,
+        ),
+        ("order-checkout", "post"): lambda i: (
+            "post",
+            reverse("order-checkout"),
+            {"items": [{"product": pk, "quantity": 1} for pk in stocked]},
+            buyer,
+        ),
+        ("order-transitions", "post"): lambda i: (
+            "post",
+            reverse("order-transitions"),
+            # already confirmed: every request reads and reports them
+            # unchanged, so concurrent clients never contend for the write
+            {"ids": fixtures["confirmed_ids"], "status": "confirmed"},
+            admin,
+        ),
+        ("order-detail", "get"): lambda i: (
+            "get",
+            reverse("order-detail", args=[order_ids[i % len(order_ids)]]),
+            None,
+            buyer,
+        ),
+        ("farmer-sales", "get"): get("farmer-sales", farmer),
+        ("delivery-list", "get"): get("delivery-list", fixtures["transporter"]),
+        ("delivery-assign", "post"): lambda i: (
+            "post",
+            reverse("delivery-assign"),
+            {},
+            admin,
+        ),
+    }
+
+
+def summarize(rounds):
+    """Median over rounds of each round's percentiles and throughput."""
+    per_round = [
+        {
+            "p50_ms": percentile(samples, 50) * 1000,
+            "p95_ms": percentile(samples, 95) * 1000,
+            "p99_ms": percentile(samples, 99) * 1000,
+            "rps": len(samples) / elapsed,
+        }
+        for samples, elapsed in rounds
+    ]
+    summary = {
+        metric: round(statistics.median(r[metric] for r in per_round), 3)
+        for metric in ("p50_ms", "p95_ms", "p99_ms", "rps")
+    }
+    summary["requests"] = sum(len(samples) for samples, _ in rounds)
+    return summary
+
+
+def regressions(results, baseline, tolerance, tail_tolerance, min_delta_ms):
+    """
+    Human-readable lines for every case that got worse than its baseline,
+    or has none to compare against.
+    """
+    found = []
+    for key, result in results.items():
+        before = baseline.get(key)
+        if before is None:
+            found.append(f"{key}: not in the baseline; save one with --only")
+            continue
+        for metric, allowed in (("p50_ms", tolerance), ("p95_ms", tail_tolerance)):
+            delta = result[metric] - before[metric]
+            if delta > before[metric] * allowed and delta >= min_delta_ms:
+                found.append(
+                    f"{key}: {metric} {before[metric]:.2f} -> {result[metric]:.2f}"
+                )
+        if result["rps"] < before["rps"] / (1 + tolerance):
+            found.append(f"{key}: rps {before['rps']:.1f} -> {result['rps']:.1f}")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--only", help="comma-separated route names")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--rounds", type=int, default=3)
+    # in-process runs on a shared machine vary by ~30% between identical
+    # runs, so the defaults only catch real slowdowns (an extra query per
+    # row, a lost cache); tighten them on dedicated hardware
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    parser.add_argument(
+        "--tail-tolerance", type=float, default=1.0, help="for p95, which is noisier"
+    )
+    parser.add_argument("--min-delta-ms", type=float, default=1.0)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from api.urls import urlpatterns
+
+    routes = {pattern.name for pattern in urlpatterns}
+    missing = routes - {route for route, _ in CASES}
+    if missing:
+        sys.exit(f"No benchmark case for: {', '.join(sorted(missing))}")
+
+    makers = request_makers(seed(args.users))
+    only = set(args.only.split(",")) if args.only else None
+    results = {}
+    for (route, method), share in CASES.items():
+        if only and route not in only:
+            continue
+        requests = max(int(args.requests * share), args.concurrency)
+        for handler, run in (("wsgi", run_wsgi), ("asgi", run_asgi)):
+            make_request = makers[route, method]
+            # fills caches and opens the connections of every client
+            run(make_request, args.concurrency * 2, args.concurrency)
+            rounds = [
+                run(make_request, requests, args.concurrency)
+                for _ in range(args.rounds)
+            ]
+            key = f"{handler} {method.upper()} {route}"
+            r = results[key] = summarize(rounds)
+            print(
+                f"{key:<36} {r['rps']:8.1f} req/s  p50={r['p50_ms']:8.2f}ms  "
+                f"p95={r['p95_ms']:8.2f}ms  p99={r['p99_ms']:8.2f}ms"
+            )
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+    if args.save_baseline:
+        # with --only, the other cases keep their baseline
+        if only and args.baseline.exists():
+            results = {**json.loads(args.baseline.read_text()), **results}
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+        print(f"Saved baseline to {args.baseline}")
+        return
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --save-baseline first.")
+        return
+
+    baseline = json.loads(args.baseline.read_text())
+    found = regressions(
+        results, baseline, args.tolerance, args.tail_tolerance, args.min_delta_ms
+    )
+    if found:
+        print(
+            f"\n{len(found)} regressions beyond {args.tolerance:.0%} "
+            f"or missing baselines:"
+        )
+        for line in found:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"\nNo regressions beyond {args.tolerance:.0%} of {args.baseline}.")
+
+
+if __name__ == "__main__":
+    main()
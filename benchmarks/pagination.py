@@ -0,0 +1,75 @@
+"""
+Page 1 vs page 10,000 on /api/products/, page-number vs keyset pagination.
+
+    python -m benchmarks.pagination [--rows 120000]
+
+Page-number pagination runs COUNT(*) plus an OFFSET scan, so the deep page
+is much slower; the keyset pages should take the same time.
+"""
+
+import argparse
+
+from benchmarks.common import measure, report, setup_django
+
+DEEP_PAGE = 10_000
+
+
+def seed(rows):
+    from api.models import Category, Product, User
+
+    farmer = User.objects.create_user(email="bench-farmer@example.com", role="farmer")
+    category = Category.objects.create(name="Bench")
+    batch = 5000
+    for start in range(0, rows, batch):
+        Product.objects.bulk_create(
+            Product(
+                name=f"Product {i}",
+                price=1,
+                quantity=1,
+                unit="kg",
+                farmer=farmer,
+                category=category,
+            )
+            for i in range(start, min(rows, start + batch))
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=120_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.test import Client
+    from django.urls import reverse
+    from api.models import Product
+    from api.pagination import KeysetPagination
+
+    seed(args.rows)
+    client = Client()
+    url = reverse("product-list")
+    page_size = KeysetPagination.page_size
+
+    # the cursor a client would hold after walking to page DEEP_PAGE - 1
+    boundary = Product.objects.order_by("-created_at", "-id")[
+        (DEEP_PAGE - 1) * page_size - 1
+    ]
+    deep_cursor = KeysetPagination.cursor_for(boundary)
+
+    cases = [
+        ("page-number page 1", {"page": 1}),
+        (f"page-number page {DEEP_PAGE:,}", {"page": DEEP_PAGE}),
+        ("keyset page 1", {"pagination": "cursor"}),
+        (f"keyset page {DEEP_PAGE:,}", {"cursor": deep_cursor}),
+    ]
+    print(f"{args.rows:,} products, page size {page_size}")
+    for label, params in cases:
+        response = client.get(url, params)
+        assert response.status_code == 200, response.status_code
+        report(label, measure(lambda: client.get(url, params), repeat=args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Full-text product search latency.
+
+    python -m benchmarks.search [--rows 1000000]
+
+Times the ranked FTS5 lookup on its own (first page of ids) and the whole
+`GET /api/products/?q=` request.
+
+The generated vocabulary is deliberately small, so words like "cassava"
+match ~1 in 3 products. bm25 has to walk a word's whole posting list for its
+document frequency, so those are the worst case; farm and town names behave
+like a real catalog's long tail.
+"""
+
+import argparse
+import random
+
+from benchmarks.common import measure, report, setup_django
+
+PRODUCE = [
+    "banana", "plantain", "cassava", "yam", "maize", "sorghum", "millet",
+    "tomato", "onion", "pepper", "okra", "cocoa", "cashew", "groundnut",
+    "cowpea", "soybean", "mango", "pineapple", "orange", "avocado",
+]
+ADJECTIVES = [
+    "fresh", "dried", "organic", "ripe", "green", "red", "sweet", "large",
+    "small", "premium", "local", "smoked", "white", "yellow",
+]
+TOWNS = [f"town{n}" for n in range(500)]
+QUERIES = [
+    "cassava",
+    "ripe plantain",
+    "pepp*",
+    "tubers yam",
+    "town17 cassava",
+    "farm4242",
+]
+
+
+def seed(rows):
+    from api import search
+    from api.models import Category, Product, User
+
+    rng = random.Random(42)
+    farmer = User.objects.create_user(email="bench-farmer@example.com", role="farmer")
+    categories = [
+        Category.objects.create(name=name)
+        for name in ("Fruits", "Grains", "Tubers", "Vegetables", "Cash crops")
+    ]
+    batch = 10_000
+    for start in range(0, rows, batch):
+        Product.objects.bulk_create(
+            Product(
+                name=f"{rng.choice(ADJECTIVES)} {rng.choice(PRODUCE)}",
+                description=" ".join(
+                    rng.choices(ADJECTIVES + PRODUCE, k=10)
+                    + [rng.choice(TOWNS), f"farm{rng.randrange(rows // 20 + 1)}"]
+                ),
+                price=1,
+                quantity=1,
+                unit="kg",
+                farmer=farmer,
+                category=rng.choice(categories),
+            )
+            for _ in range(start, min(rows, start + batch))
+        )
+    search.rebuild_index()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.test import Client
+    from django.urls import reverse
+    from api.models import Product
+    from api.search import search_products
+
+    seed(args.rows)
+    client = Client()
+    url = reverse("product-list")
+    print(f"{args.rows:,} products")
+    for q in QUERIES:
+        ids = lambda: list(
+            search_products(Product.objects.all(), q).values_list("id", flat=True)[:10]
+        )
+        report(f"fts top 10 {q!r}", measure(ids, repeat=args.repeat))
+    for q in QUERIES:
+        report(
+            f"GET ?q={q}",
+            measure(lambda: client.get(url, {"q": q}), repeat=args.repeat),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+DRF serializers vs their compiled .values() counterparts
+(api/fast_serializers.py) on 1,000-row pages.
+
+    python -m benchmarks.serializers [--rows 1000] [--repeat 30]
+
+For each of ProductSerializer, OrderSerializer, UserSerializer and
+CategorySerializer it times:
+
+- serialize: turning already fetched rows into response data
+- fetch+serialize: the page query plus serialization, as a list view does
+- fetch+serialize+render: the same, through JSONRenderer
+
+and checks that both paths render exactly the same bytes.
+"""
+
+import argparse
+import statistics
+from io import StringIO
+
+from benchmarks.common import measure, report, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.core.management import call_command
+    from rest_framework.renderers import JSONRenderer
+    from api.fast_serializers import get_values_serializer
+    from api.models import Category, Order, Product, User
+    from api.serializers import (
+        CategorySerializer,
+        OrderSerializer,
+        ProductSerializer,
+        UserSerializer,
+    )
+
+    # enough of every model for a full page
+    call_command(
+        "generate_marketplace_data",
+        users=max(args.rows, 1000),
+        categories=args.rows,
+        seed=1,
+        skip_search_index=True,
+        stdout=StringIO(),
+    )
+    renderer = JSONRenderer()
+    cases = [
+        (ProductSerializer, Product.objects.select_related("category")),
+        (OrderSerializer, Order.objects.select_related("product")),
+        (UserSerializer, User.objects.all()),
+        (CategorySerializer, Category.objects.all()),
+    ]
+    for serializer_class, queryset in cases:
+        queryset = queryset.order_by("-pk")
+        fast = get_values_serializer(serializer_class)
+        page = slice(0, args.rows)
+        instances = list(queryset[page])
+        rows = list(fast.values(queryset)[page])
+        assert len(rows) == args.rows, f"only {len(rows)} rows"
+        assert renderer.render(fast.serialize(rows)) == renderer.render(
+            serializer_class(instances, many=True).data
+        ), f"{serializer_class.__name__}: output differs"
+
+        def drf(render=False):
+            data = serializer_class(list(queryset[page]), many=True).data
+            return renderer.render(data) if render else data
+
+        def compiled(render=False):
+            data = fast.serialize(list(fast.values(queryset)[page]))
+            return renderer.render(data) if render else data
+
+        print(f"\n{serializer_class.__name__}, {args.rows:,} rows")
+        for label, slow, quick in (
+            (
+                "serialize",
+                lambda: serializer_class(instances, many=True).data,
+                lambda: fast.serialize(rows),
+            ),
+            ("fetch+serialize", drf, compiled),
+            (
+                "fetch+serialize+render",
+                lambda: drf(render=True),
+                lambda: compiled(render=True),
+            ),
+        ):
+            slow_samples = measure(slow, repeat=args.repeat, warmup=3)
+            quick_samples = measure(quick, repeat=args.repeat, warmup=3)
+            report(f"  drf      {label}", slow_samples)
+            report(f"  compiled {label}", quick_samples)
+            speedup = statistics.median(slow_samples) / statistics.median(quick_samples)
+            print(f"  {'':<38} {speedup:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
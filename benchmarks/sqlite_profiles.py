@@ -0,0 +1,212 @@
+"""
+Concurrent readers and writers against each DATABASE_PROFILE
+(config/settings.py): lock errors, throughput and latency.
+
+    python -m benchmarks.sqlite_profiles [--readers 24] [--writers 32]
+        [--duration 10] [--profiles default,production] [--rounds 2]
+
+Requests go through the real WSGI handler rather than the test client, so
+request_started/request_finished close connections exactly as in
+production: with CONN_MAX_AGE=0 every request opens (and configures) a new
+one. Readers alternate GET /api/orders/ and GET /api/users/<id>/; writers
+POST /api/orders/, which takes stock and inserts the order in one
+transaction. A request that fails with "database is locked" counts as a
+lock error. Profiles take turns for --rounds rounds, so data growth and
+machine noise hit each of them alike.
+"""
+
+import argparse
+import json
+import logging
+import statistics
+import sys
+import threading
+import time
+from io import BytesIO
+
+from benchmarks.common import percentile, setup_django
+from benchmarks.endpoints import seed
+
+LOCK_MESSAGE = "database is locked"
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {"read": [], "write": []}
+        self.errors = {"locked": 0, "other": 0}
+
+    def add(self, kind, seconds):
+        with self.lock:
+            self.samples[kind].append(seconds)
+
+    def error(self, kind):
+        with self.lock:
+            self.errors[kind] += 1
+
+
+def call(app, method, path, body=None, token=None):
+    """One request through the WSGI app; returns the status code."""
+    data = json.dumps(body).encode() if body is not None else b""
+    environ = {
+        "REQUEST_METHOD": method,
+        "PATH_INFO": path,
+        "QUERY_STRING": "",
+        "SERVER_NAME": "testserver",
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "CONTENT_TYPE": "application/json",
+        "CONTENT_LENGTH": str(len(data)),
+        "wsgi.input": BytesIO(data),
+        "wsgi.errors": sys.stderr,
+        "wsgi.url_scheme": "http",
+    }
+    if token:
+        environ["HTTP_AUTHORIZATION"] = token
+    status = []
+    response = app(environ, lambda s, headers, exc_info=None: status.append(s))
+    try:
+        b"".join(response)
+    finally:
+        # sends request_finished, which closes expired connections
+        response.close()
+    return int(status[0].split()[0])
+
+
+def apply_profile(name):
+    from django.conf import settings
+    from django.db import connections
+
+    profile = settings.DATABASE_PROFILES[name]
+    connections.close_all()
+    settings.SQLITE_PRAGMAS = profile["PRAGMAS"]
+    # every thread's connection is built from this dict
+    db = connections.settings["default"]
+    db["CONN_MAX_AGE"] = profile["CONN_MAX_AGE"]
+    db["CONN_HEALTH_CHECKS"] = profile["CONN_HEALTH_CHECKS"]
+    # a new connection switches the file's journal mode
+    connections["default"].ensure_connection()
+    connections.close_all()
+
+
+def run(app, fixtures, readers, writers, duration):
+    from django.core.signals import got_request_exception
+    from django.db import connection
+    from django.urls import reverse
+
+    stats = Stats()
+    stop = time.monotonic() + duration
+    buyer = fixtures["buyer"]["Authorization"]
+    reads = [
+        reverse("order-list"),
+        reverse("user-detail", args=[fixtures["buyer_id"]]),
+    ]
+    stocked = fixtures["stocked"]
+
+    def classify(sender, request=None, **kwargs):
+        exc = sys.exc_info()[1]
+        stats.error("locked" if exc and LOCK_MESSAGE in str(exc) else "other")
+
+    def worker(kind, n):
+        i = n
+        try:
+            while time.monotonic() < stop:
+                start = time.perf_counter()
+                if kind == "read":
+                    status = call(app, "GET", reads[i % len(reads)], token=buyer)
+                else:
+                    status = call(
+                        app,
+                        "POST",
+                        reverse("order-list"),
+                        {"product": stocked[i % len(stocked)], "quantity": 1},
+                        token=buyer,
+                    )
+                if status < 400:
+                    stats.add(kind, time.perf_counter() - start)
+                i += 1
+        finally:
+            connection.close()
+
+    got_request_exception.connect(classify)
+    threads = [
+        threading.Thread(target=worker, args=(kind, n))
+        for kind, count in (("read", readers), ("write", writers))
+        for n in range(count)
+    ]
+    started = time.perf_counter()
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        got_request_exception.disconnect(classify)
+    return stats, time.perf_counter() - started
+
+
+def summarize(results):
+    rows = {}
+    for kind in ("read", "write"):
+        samples = [s for stats, _ in results for s in stats.samples[kind]]
+        elapsed = sum(seconds for _, seconds in results)
+        rows[kind] = {
+            "rps": len(samples) / elapsed,
+            "p50_ms": statistics.median(samples) * 1000 if samples else 0,
+            "p95_ms": percentile(samples, 95) * 1000 if samples else 0,
+        }
+    rows["locked"] = sum(stats.errors["locked"] for stats, _ in results)
+    rows["other_errors"] = sum(stats.errors["other"] for stats, _ in results)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--readers", type=int, default=24)
+    # enough writers to queue on the write lock for seconds
+    parser.add_argument("--writers", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10, help="seconds per run")
+    parser.add_argument("--rounds", type=int, default=2)
+    parser.add_argument("--profiles", default="default,production")
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.core.wsgi import get_wsgi_application
+    from django.db import connection
+    from api import sqlite
+
+    # failed requests are counted, not logged with a traceback each
+    logging.getLogger("django.request").setLevel(logging.CRITICAL)
+    fixtures = seed(args.users)
+    app = get_wsgi_application()
+    profiles = args.profiles.split(",")
+    results = {name: [] for name in profiles}
+    for _ in range(args.rounds):
+        for name in profiles:
+            apply_profile(name)
+            results[name].append(
+                run(app, fixtures, args.readers, args.writers, args.duration)
+            )
+
+    print(
+        f"{args.readers} readers, {args.writers} writers, "
+        f"{args.rounds} x {args.duration:g}s per profile"
+    )
+    for name in profiles:
+        apply_profile(name)
+        pragmas = sqlite.current(connection, ["journal_mode", "synchronous"])
+        connection.close()
+        r = summarize(results[name])
+        print(f"\n{name} ({', '.join(f'{k}={v}' for k, v in pragmas.items())})")
+        for kind in ("read", "write"):
+            print(
+                f"  {kind:<6} {r[kind]['rps']:8.1f} req/s  "
+                f"p50={r[kind]['p50_ms']:8.2f}ms  p95={r[kind]['p95_ms']:8.2f}ms"
+            )
+        print(f"  database is locked: {r['locked']}  other errors: {r['other_errors']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Token authentication with and without the in-process lookup cache.
+
+    python -m benchmarks.token_auth [--repeat 500]
+
+Sends authenticated `GET /api/orders/` requests with DRF's plain
+TokenAuthentication and then with CachedTokenAuthentication, and reports
+queries per request alongside latency.
+"""
+
+import argparse
+
+from benchmarks.common import measure, report, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import CaptureQueriesContext
+    from django.urls import reverse
+    from rest_framework.authentication import TokenAuthentication
+    from rest_framework.authtoken.models import Token
+    from api.authentication import CachedTokenAuthentication, token_cache
+    from api.models import User
+    from api.views import OrderListCreateAPIView
+
+    buyer = User.objects.create_user(email="bench-buyer@example.com", role="buyer")
+    token = Token.objects.create(user=buyer)
+    client = Client(HTTP_AUTHORIZATION=f"Token {token.key}")
+    url = reverse("order-list")
+
+    def request():
+        response = client.get(url)
+        assert response.status_code == 200, response.status_code
+
+    # authentication_classes is bound when the view class is defined, so
+    # swap it on the view rather than through settings
+    for authentication in (TokenAuthentication, CachedTokenAuthentication):
+        OrderListCreateAPIView.authentication_classes = [authentication]
+        token_cache.clear()
+        samples = measure(request, repeat=args.repeat)
+        with CaptureQueriesContext(connection) as ctx:
+            request()
+        label = f"{authentication.__name__} ({len(ctx.captured_queries)} queries)"
+        report(label, samples)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,10 @@ ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Login and register are native async views (api/async_views.py) that hash
+passwords in a bounded pool instead of on the thread Django shares between
+sync views.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 """
@@ -0,0 +1,39 @@
+"""
+URLconf for requests that come in through config/asgi.py (see
+api.middleware.asgi_urlconf_middleware).
+
+The hot read endpoints answer GET from their async path, and login and
+register hash passwords off the shared sync thread (api.async_views);
+their other methods, and every other route, behave exactly as in
+config.urls.
+"""
+
+from django.urls import path
+
+from api.async_generics import as_async_view
+from api.async_views import AsyncLoginView, AsyncRegisterView
+from api.views import (
+    CategoryListCreateAPIView,
+    OrderListCreateAPIView,
+    ProductDetailAPIView,
+    ProductListCreateAPIView,
+)
+
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path("api/auth/register/", AsyncRegisterView.as_view(), name="auth-register"),
+    path("api/auth/login/", AsyncLoginView.as_view(), name="auth-login"),
+    path(
+        "api/categories/",
+        as_async_view(CategoryListCreateAPIView),
+        name="category-list",
+    ),
+    path("api/products/", as_async_view(ProductListCreateAPIView), name="product-list"),
+    path(
+        "api/products/<int:pk>/",
+        as_async_view(ProductDetailAPIView),
+        name="product-detail",
+    ),
+    path("api/orders/", as_async_view(OrderListCreateAPIView), name="order-list"),
+] + sync_urlpatterns
@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -47,6 +49,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # outermost, so its total covers every other middleware
+    "api.middleware.server_timing_middleware",
+    "api.middleware.metrics_middleware",
+    "api.middleware.profiling_middleware",
+    # early, so every later middleware resolves against the ASGI URLconf
+    "api.middleware.asgi_urlconf_middleware",
+    "api.middleware.replica_routing_middleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -77,18 +86,168 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "config.wsgi.application"
 ASGI_APPLICATION = "config.asgi.application"
+# requests served through ASGI_APPLICATION use async views for the hot reads
+ASGI_ROOT_URLCONF = "config.asgi_urls"
 
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# DATABASE_PROFILE=default (the default) keeps SQLite's behaviour: a
+# rollback journal, a 5s lock wait (Python's sqlite3 default) and a new
+# connection per request. "production" turns on WAL (readers and the writer no longer block each
+# other), waits up to 10s for the write lock before failing with "database
+# is locked", and keeps connections open between requests, checking them
+# before reuse. See api/sqlite.py and benchmarks/sqlite_profiles.py
+DATABASE_PROFILES = {
+    "default": {
+        "CONN_MAX_AGE": 0,
+        "CONN_HEALTH_CHECKS": False,
+        # journal_mode is kept in the database file, so it is set back
+        "PRAGMAS": {"journal_mode": "delete", "synchronous": "full"},
+    },
+    "production": {
+        "CONN_MAX_AGE": 600,
+        "CONN_HEALTH_CHECKS": True,
+        "PRAGMAS": {
+            "busy_timeout": 10000,  # ms
+            "journal_mode": "wal",
+            # durable across crashes of the process; a power cut may lose
+            # the last commits, never corrupt the file
+            "synchronous": "normal",
+            "mmap_size": 256 * 1024 * 1024,
+            "cache_size": -64 * 1024,  # negative: KiB, i.e. 64 MB
+            "temp_store": "memory",
+        },
+    },
+}
+DATABASE_PROFILE = os.environ.get("DATABASE_PROFILE", "default")
+if DATABASE_PROFILE not in DATABASE_PROFILES:
+    raise ImproperlyConfigured(
+        f"Unknown DATABASE_PROFILE {DATABASE_PROFILE!r}; "
+        f"use one of: {', '.join(DATABASE_PROFILES)}."
+    )
+_database_profile = DATABASE_PROFILES[DATABASE_PROFILE]
+SQLITE_PRAGMAS = _database_profile["PRAGMAS"]
+
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        "CONN_MAX_AGE": _database_profile["CONN_MAX_AGE"],
+        "CONN_HEALTH_CHECKS": _database_profile["CONN_HEALTH_CHECKS"],
+        # a file, not the in-memory default: shared-cache in-memory SQLite
+        # fails concurrent writers with "table is locked" instead of
+        # waiting, which breaks the concurrency tests
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
+    },
+    # a copy of "default" kept up to date by replication outside Django.
+    # The alias always exists (the router tests run against a second
+    # file), but reads only go to it when DATABASE_REPLICAS lists it
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.environ.get(
+            "REPLICA_DATABASE_PATH", BASE_DIR / "db_replica.sqlite3"
+        ),
+        "CONN_MAX_AGE": _database_profile["CONN_MAX_AGE"],
+        "CONN_HEALTH_CHECKS": _database_profile["CONN_HEALTH_CHECKS"],
+        "TEST": {"NAME": BASE_DIR / "test_replica.sqlite3"},
+    },
+}
+
+DATABASE_ROUTERS = ["api.replicas.ReplicaRouter"]
+
+# safe-method API reads go to these aliases, except for users who wrote in
+# the last STICKY_SECONDS; replicas that fail their health check or lag
+# more than MAX_LAG_SECONDS behind are skipped. See api/replicas.py
+DATABASE_REPLICAS = {
+    "ALIASES": ["replica"] if os.environ.get("REPLICA_DATABASE_PATH") else [],
+    "STICKY_SECONDS": 10,
+    "MAX_LAG_SECONDS": 5,
+    "CHECK_INTERVAL": 1,  # seconds between health/lag checks, per process
+    # seconds between heartbeat writes by `manage.py replication_heartbeat`
+    "HEARTBEAT_INTERVAL": 1,
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
     }
 }
 
+# Versioned response cache for public product/category reads (api/cache.py)
+API_RESPONSE_CACHE = {
+    "ALIAS": "default",
+    "TIMEOUT": 60,  # seconds an entry is served as fresh
+    "STALE_TIMEOUT": 30,  # extra seconds it may be served while one request rebuilds it
+    "LOCK_TIMEOUT": 5,
+}
+
+# token -> user lookups cached per process; see api/authentication.py
+TOKEN_AUTH_CACHE = {
+    "MAX_SIZE": 1024,
+    "TTL": 60,  # seconds; also how long other workers may see a revoked token
+}
+
+# bounded pool the async login/register views hash passwords in;
+# see api/hashing.py
+PASSWORD_HASHING_POOL = {
+    # queued + running hashes before answering 429; None for no bound
+    "MAX_PENDING": 64,
+    "RETRY_AFTER": 1,
+}
+
+# Server-Timing header + "api.timing" log line for a sample of requests;
+# 0 disables it at no cost. See api/timing.py
+SERVER_TIMING = {
+    "SAMPLE_RATE": float(os.environ.get("SERVER_TIMING_SAMPLE_RATE", "0")),
+}
+
+# per-route request/latency/query metrics at /api/metrics/; see api/metrics.py.
+# With several worker processes, point METRICS_DIR at a directory they
+# share (emptied on restart) so every scrape sees the totals of all of them.
+# Scrapes need an admin token unless METRICS_PUBLIC=1.
+METRICS = {
+    "DIRECTORY": os.environ.get("METRICS_DIR"),
+    "FLUSH_INTERVAL": 1.0,  # seconds between a worker's writes to its file
+    "PUBLIC": os.environ.get("METRICS_PUBLIC", "") == "1",
+}
+
+# sampled request profiles; installed but idle until
+# `manage.py profiling on --every N / --slower-than-ms MS`. See api/profiling.py
+PROFILING = {
+    "ENABLED": os.environ.get("PROFILING_ENABLED", "") == "1",
+    "DIRECTORY": BASE_DIR / "profiles",
+    "MAX_FILES": 200,  # oldest profiles are deleted beyond this
+}
+
+# queries slower than THRESHOLD_MS are logged with their call site and
+# query plan (api/slow_queries.py); read them at /api/admin/slow-queries/
+# or with `manage.py slow_queries`
+SLOW_QUERY_LOG = {
+    "THRESHOLD_MS": (
+        float(os.environ["SLOW_QUERY_MS"]) if os.environ.get("SLOW_QUERY_MS") else None
+    ),
+    "FILE": BASE_DIR / "slow_queries.log",
+    "MAX_BYTES": 1024 * 1024,  # rotated to .1 beyond this
+}
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "api.timing": {"handlers": ["console"], "level": "INFO", "propagate": False},
+    },
+}
+
+# seconds a stored Idempotency-Key response is replayed for
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -138,7 +297,7 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # DRF baseline — adjust later when we add auth/permissions
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "api.authentication.CachedTokenAuthentication",
         "rest_framework.authentication.SessionAuthentication",
         "rest_framework.authentication.BasicAuthentication",
     ],
@@ -146,7 +305,7 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
         "rest_framework.permissions.AllowAny",
     ],
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+    "DEFAULT_PAGINATION_CLASS": "api.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
 }
 